@@ -0,0 +1,136 @@
+"""
+Blocking vs async database path under concurrent load
+
+Serves GrossProfitService.get_gross_profit_allocations twice in one in-process
+app: once on a sync Session straight from an async endpoint (how every
+controller used to run), once through AsyncServiceProxy on an AsyncSession.
+While --concurrency GP requests are in flight, a client polls a trivial /ping
+endpoint; its latency shows how long the event loop was blocked.
+
+    python benchmarks/async_db.py --concurrency 8 --requests 40
+    python benchmarks/async_db.py --live   # GP from raw sales instead of the baseline
+
+Needs DATABASE_URL (and the aiomysql driver) like the app itself.
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx  # noqa: E402
+from fastapi import Depends, FastAPI  # noqa: E402
+from sqlmodel import Session  # noqa: E402
+from sqlmodel.ext.asyncio.session import AsyncSession  # noqa: E402
+
+from db.core import get_async_readonly_session, get_readonly_session  # noqa: E402
+from services.async_service import AsyncServiceProxy  # noqa: E402
+from services.gross_profit_service import GrossProfitService  # noqa: E402
+
+
+def build_app(use_snapshot: bool) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/blocking")
+    async def blocking(db: Session = Depends(get_readonly_session)):
+        data = GrossProfitService(db).get_gross_profit_allocations(
+            use_snapshot=use_snapshot
+        )
+        return {"count": len(data)}
+
+    @app.get("/async")
+    async def non_blocking(db: AsyncSession = Depends(get_async_readonly_session)):
+        service = AsyncServiceProxy(GrossProfitService, db)
+        data = await service.get_gross_profit_allocations(use_snapshot=use_snapshot)
+        return {"count": len(data)}
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    return app
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+async def run(client: httpx.AsyncClient, path: str, concurrency: int, requests: int):
+    """Latencies (ms) of the GP requests and of /ping polled alongside them"""
+    heavy: List[float] = []
+    ping: List[float] = []
+    queue = asyncio.Queue()
+    for _ in range(requests):
+        queue.put_nowait(None)
+
+    async def worker():
+        while not queue.empty():
+            queue.get_nowait()
+            started = time.perf_counter()
+            response = await client.get(path)
+            response.raise_for_status()
+            heavy.append((time.perf_counter() - started) * 1000)
+
+    async def poller(done: asyncio.Event):
+        while not done.is_set():
+            started = time.perf_counter()
+            await client.get("/ping")
+            ping.append((time.perf_counter() - started) * 1000)
+            await asyncio.sleep(0.01)
+
+    done = asyncio.Event()
+    polling = asyncio.create_task(poller(done))
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    done.set()
+    await polling
+    return heavy, ping
+
+
+def summarize(label: str, samples: List[float]) -> Dict[str, float]:
+    return {
+        "path": label,
+        "n": len(samples),
+        "p50_ms": round(statistics.median(samples), 1),
+        "p95_ms": round(percentile(samples, 95), 1),
+        "max_ms": round(max(samples), 1),
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=40)
+    parser.add_argument("--live", action="store_true")
+    args = parser.parse_args()
+
+    app = build_app(use_snapshot=not args.live)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench", timeout=None
+    ) as client:
+        # Warm both pools and the baseline check
+        await client.get("/blocking")
+        await client.get("/async")
+
+        rows = []
+        for path in ("/blocking", "/async"):
+            heavy, ping = await run(client, path, args.concurrency, args.requests)
+            rows.append(summarize(f"{path} gp", heavy))
+            rows.append(summarize(f"{path} ping", ping))
+
+    print(f"{'path':<16}{'n':>6}{'p50_ms':>10}{'p95_ms':>10}{'max_ms':>10}")
+    for row in rows:
+        print(
+            f"{row['path']:<16}{row['n']:>6}{row['p50_ms']:>10}"
+            f"{row['p95_ms']:>10}{row['max_ms']:>10}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
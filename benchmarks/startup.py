@@ -0,0 +1,44 @@
+"""
+Time to import the app in a fresh interpreter (what every uvicorn worker pays)
+
+    python benchmarks/startup.py --runs 10
+
+Runs `import main` --runs times in new processes and prints min/median/max
+wall time. Tables and migrations are not part of this; manage.py migrate
+applies them on deploy.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def time_import(module: str) -> float:
+    started = time.perf_counter()
+    subprocess.run([sys.executable, "-c", f"import {module}"], cwd=ROOT, check=True)
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--module", default="main")
+    args = parser.parse_args()
+
+    # One untimed run so .pyc compilation isn't counted
+    time_import(args.module)
+    samples = [time_import(args.module) * 1000 for _ in range(args.runs)]
+    print(
+        f"import {args.module}: min {min(samples):.0f} ms, "
+        f"median {statistics.median(samples):.0f} ms, max {max(samples):.0f} ms "
+        f"({args.runs} runs)"
+    )
+
+
+if __name__ == "__main__":
+    main()
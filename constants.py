@@ -1,5 +1,9 @@
 SUPERADMIN = 0
 ADMIN = None
+ROLE_SUPERADMIN = "superadmin"
+ROLE_ADMIN = "admin"
+ROLE_SALESPERSON = "salesperson"
+ADMIN_ROLES = (ROLE_SUPERADMIN, ROLE_ADMIN)
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 * 30
 ALLOWED_ORIGINS = [
@@ -1,8 +1,20 @@
-from fastapi import APIRouter, Depends, Request, HTTPException
+from fastapi import APIRouter, Depends, Request, Response, HTTPException
 from sqlmodel import Session
-from db.core import get_readonly_session
-from services.admin_service import AdminService
+from sqlmodel.ext.asyncio.session import AsyncSession
+from db.core import (
+    async_engine,
+    async_readonly_engine,
+    engine,
+    get_async_readonly_session,
+    get_readonly_session,
+    readonly_engine,
+)
+from db.pool import pool_stats
+from services.admin_service import AdminService, admin_summary_snapshot
+from services.async_service import AsyncServiceProxy
+from services.bulkhead import bulkhead, HEAVY
 from typing import Dict, Any
+import os
 
 router = APIRouter(
     tags=["admin"],
@@ -10,12 +22,16 @@ router = APIRouter(
 
 
 @router.get("/admin/summary")
-async def get_admin_summary(
-    request: Request, db: Session = Depends(get_readonly_session)
+@bulkhead(HEAVY)
+def get_admin_summary(
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_readonly_session),
 ) -> Dict[str, Any]:
     """
     Get admin summary of all salespeople with their sales and budget data
     Only accessible by admin users (salesman_id = 0 or null)
+    Served from a snapshot refreshed in the background; X-Snapshot-Age is its age in seconds
     """
     try:
         # Get username from request state (set by auth middleware)
@@ -25,13 +41,14 @@ async def get_admin_summary(
         admin_service = AdminService(db)
 
         # Check if user is admin
-        if not admin_service.is_admin(username):
+        if not admin_service.is_admin(username, request.state.user["payload"]):
             raise HTTPException(
                 status_code=403, detail="Access denied. Admin privileges required."
             )
 
         # Get admin summary data
-        summary_data = admin_service.get_admin_summary()
+        summary_data, age = admin_summary_snapshot.get()
+        response.headers["X-Snapshot-Age"] = str(int(age))
 
         return {
             "success": True,
@@ -50,7 +67,9 @@ async def get_admin_summary(
 
 @router.get("/salesperson/{salesperson_id}/info")
 async def get_salesperson_info(
-    salesperson_id: int, request: Request, db: Session = Depends(get_readonly_session)
+    salesperson_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_async_readonly_session),
 ) -> Dict[str, Any]:
     """
     Get salesperson information (admin only)
@@ -60,10 +79,10 @@ async def get_salesperson_info(
         username = request.state.user["username"]
 
         # Initialize admin service
-        admin_service = AdminService(db)
+        admin_service = AsyncServiceProxy(AdminService, db)
 
         # Check if user is admin
-        if not admin_service.is_admin(username):
+        if not await admin_service.is_admin(username, request.state.user["payload"]):
             raise HTTPException(
                 status_code=403, detail="Access denied. Admin privileges required."
             )
@@ -72,8 +91,10 @@ async def get_salesperson_info(
         from db.dfm_reflect import Salesperson
         from sqlmodel import select
 
-        salesperson = db.exec(
-            select(Salesperson).where(Salesperson.salesman_no == salesperson_id)
+        salesperson = (
+            await db.exec(
+                select(Salesperson).where(Salesperson.salesman_no == salesperson_id)
+            )
         ).first()
 
         if not salesperson:
@@ -98,3 +119,46 @@ async def get_salesperson_info(
         raise HTTPException(
             status_code=500, detail=f"Error fetching salesperson info: {str(e)}"
         )
+
+
+@router.get("/admin/db-pool")
+async def get_db_pool_stats(
+    request: Request, db: AsyncSession = Depends(get_async_readonly_session)
+) -> Dict[str, Any]:
+    """
+    Connection pool usage for this worker process (admin only)
+    checked_out / idle / overflow counts plus checkout wait percentiles in ms
+    readonly_sync / readonly_async are included when the read-only engines are separate
+    """
+    try:
+        # Get username from request state (set by auth middleware)
+        username = request.state.user["username"]
+
+        # Initialize admin service
+        admin_service = AsyncServiceProxy(AdminService, db)
+
+        # Check if user is admin
+        if not await admin_service.is_admin(username, request.state.user["payload"]):
+            raise HTTPException(
+                status_code=403, detail="Access denied. Admin privileges required."
+            )
+
+        data = {
+            "pid": os.getpid(),
+            "sync": pool_stats(engine.pool),
+            "async": pool_stats(async_engine.sync_engine.pool),
+        }
+        # READONLY_DATABASE_URL gives the read-only sessions pools of their own
+        if readonly_engine is not engine:
+            data["readonly_sync"] = pool_stats(readonly_engine.pool)
+        if async_readonly_engine is not async_engine:
+            data["readonly_async"] = pool_stats(async_readonly_engine.sync_engine.pool)
+
+        return {"success": True, "data": data}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Error fetching pool stats: {str(e)}"
+        )
@@ -10,7 +10,13 @@ from datetime import timedelta
 from fastapi.security import OAuth2PasswordBearer
 from sqlmodel import select
 from constants import ACCESS_TOKEN_EXPIRE_MINUTES, SUPERADMIN, ADMIN
-from services.auth_service import authenticate_user, create_access_token
+from services.auth_service import (
+    LOGIN,
+    authenticate_user,
+    create_access_token,
+    token_claims,
+)
+from services.bulkhead import bulkhead
 
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
@@ -21,7 +27,8 @@ router = APIRouter(
 
 
 @router.post("/login")
-async def login(
+@bulkhead(LOGIN)
+def login(
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
     db: Session = Depends(get_readonly_session),
 ):
@@ -30,12 +37,11 @@ async def login(
         raise HTTPException(status_code=401, detail="Invalid username or password")
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.username}, expires_delta=access_token_expires
+        data=token_claims(user), expires_delta=access_token_expires
     )
     # Check if user is admin
     is_admin = user.salesman_id == SUPERADMIN or user.salesman_id is ADMIN
     is_superadmin = user.salesman_id == SUPERADMIN
-    print(user.salesman_id, is_admin, is_superadmin)
 
     response = {
         "access_token": access_token,
@@ -1,9 +1,12 @@
 from fastapi import APIRouter, Depends, Request, HTTPException
 from sqlmodel import Session
-from db.core import get_readonly_session, get_session
+from sqlmodel.ext.asyncio.session import AsyncSession
+from db.core import get_async_readonly_session, get_session
 from services.budget_service import BudgetService
 from services.sales_service import SalesService
 from services.admin_service import AdminService
+from services.async_service import AsyncServiceProxy
+from services.bulkhead import bulkhead, LIGHT
 from typing import Dict, Any, List
 from pydantic import BaseModel
 
@@ -40,7 +43,7 @@ class BudgetUpdate(BaseModel):
 
 @router.get("/budget")
 async def get_budgets(
-    request: Request, db: Session = Depends(get_readonly_session)
+    request: Request, db: AsyncSession = Depends(get_async_readonly_session)
 ) -> Dict[str, Any]:
     """Get all budgets for the current salesperson"""
     try:
@@ -48,18 +51,18 @@ async def get_budgets(
         username = request.state.user["username"]
 
         # Get salesperson info
-        sales_service = SalesService(db)
-        user_salesperson = sales_service._get_user_salesperson(username)
+        sales_service = AsyncServiceProxy(SalesService, db)
+        user_salesperson = await sales_service._get_user_salesperson(username)
 
         if not user_salesperson:
             raise HTTPException(status_code=404, detail="Salesperson not found")
 
         # Get budgets
-        budget_service = BudgetService(db)
-        budgets = budget_service.get_budgets_by_salesperson(
+        budget_service = AsyncServiceProxy(BudgetService, db)
+        budgets = await budget_service.get_budgets_by_salesperson(
             user_salesperson.salesman_no
         )
-        summary = budget_service.get_budget_summary(user_salesperson.salesman_no)
+        summary = await budget_service.get_budget_summary(user_salesperson.salesman_no)
 
         return {
             "success": True,
@@ -80,7 +83,8 @@ async def get_budgets(
 
 
 @router.post("/budget")
-async def create_budget(
+@bulkhead(LIGHT)
+def create_budget(
     budget_data: BudgetCreate, request: Request, db: Session = Depends(get_session)
 ) -> Dict[str, Any]:
     """Create a new budget entry, ensuring no duplicate (salesperson_id, salesperson_name, brand, flag, customer_name, customer_class)"""
@@ -131,7 +135,8 @@ async def create_budget(
 
 
 @router.put("/budget/{budget_id}")
-async def update_budget(
+@bulkhead(LIGHT)
+def update_budget(
     budget_id: int,
     budget_data: BudgetUpdate,
     request: Request,
@@ -170,7 +175,8 @@ async def update_budget(
 
 
 @router.delete("/budget/{budget_id}")
-async def delete_budget(
+@bulkhead(LIGHT)
+def delete_budget(
     budget_id: int, request: Request, db: Session = Depends(get_session)
 ) -> Dict[str, Any]:
     """Delete a budget entry"""
@@ -189,16 +195,16 @@ async def delete_budget(
 
 @router.get("/budget/autosuggest")
 async def get_autosuggest_data(
-    request: Request, db: Session = Depends(get_readonly_session)
+    request: Request, db: AsyncSession = Depends(get_async_readonly_session)
 ) -> Dict[str, Any]:
     """Returns customer_classes, customer_names, brands, and flags for autosuggest"""
     try:
         # Get autosuggest data
-        budget_service = BudgetService(db)
-        customer_classes = budget_service.get_unique_customer_classes()
-        customer_names = budget_service.get_unique_customer_names()
-        brands = budget_service.get_unique_brands()
-        flags = budget_service.get_unique_flags()
+        budget_service = AsyncServiceProxy(BudgetService, db)
+        customer_classes = await budget_service.get_unique_customer_classes()
+        customer_names = await budget_service.get_unique_customer_names()
+        brands = await budget_service.get_unique_brands()
+        flags = await budget_service.get_unique_flags()
 
         return {
             "success": True,
@@ -217,7 +223,8 @@ async def get_autosuggest_data(
 
 
 @router.post("/budget/generate-from-sales")
-async def generate_budget_from_sales(
+@bulkhead(LIGHT)
+def generate_budget_from_sales(
     request: Request, db: Session = Depends(get_session)
 ) -> Dict[str, Any]:
     """Generate budget entries from current sales data"""
@@ -240,16 +247,7 @@ async def generate_budget_from_sales(
         )
 
         # Save budgets to database
-        created_budgets = []
-        for budget in budgets:
-            db.add(budget)
-            created_budgets.append(budget)
-
-        db.commit()
-
-        # Refresh to get IDs
-        for budget in created_budgets:
-            db.refresh(budget)
+        created_budgets = budget_service.save_budgets(budgets)
 
         return {
             "success": True,
@@ -281,7 +279,9 @@ async def generate_budget_from_sales(
 
 @router.get("/budget/{salesperson_id}")
 async def get_salesperson_budgets(
-    salesperson_id: int, request: Request, db: Session = Depends(get_readonly_session)
+    salesperson_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_async_readonly_session),
 ) -> Dict[str, Any]:
     """Get all budgets for a specific salesperson (admin only)"""
     try:
@@ -289,10 +289,10 @@ async def get_salesperson_budgets(
         username = request.state.user["username"]
 
         # Initialize admin service to check admin privileges
-        admin_service = AdminService(db)
+        admin_service = AsyncServiceProxy(AdminService, db)
 
         # Check if user is admin
-        if not admin_service.is_admin(username):
+        if not await admin_service.is_admin(username, request.state.user["payload"]):
             raise HTTPException(
                 status_code=403, detail="Access denied. Admin privileges required."
             )
@@ -301,8 +301,10 @@ async def get_salesperson_budgets(
         from db.dfm_reflect import Salesperson
         from sqlmodel import select
 
-        salesperson = db.exec(
-            select(Salesperson).where(Salesperson.salesman_no == salesperson_id)
+        salesperson = (
+            await db.exec(
+                select(Salesperson).where(Salesperson.salesman_no == salesperson_id)
+            )
         ).first()
 
         if not salesperson:
@@ -312,9 +314,9 @@ async def get_salesperson_budgets(
             )
 
         # Get budgets
-        budget_service = BudgetService(db)
-        budgets = budget_service.get_budgets_by_salesperson(salesperson_id)
-        summary = budget_service.get_budget_summary(salesperson_id)
+        budget_service = AsyncServiceProxy(BudgetService, db)
+        budgets = await budget_service.get_budgets_by_salesperson(salesperson_id)
+        summary = await budget_service.get_budget_summary(salesperson_id)
 
         return {
             "success": True,
@@ -337,7 +339,8 @@ async def get_salesperson_budgets(
 
 
 @router.post("/budget/{salesperson_id}")
-async def create_salesperson_budget(
+@bulkhead(LIGHT)
+def create_salesperson_budget(
     salesperson_id: int,
     budget_data: BudgetCreate,
     request: Request,
@@ -352,7 +355,7 @@ async def create_salesperson_budget(
         admin_service = AdminService(db)
 
         # Check if user is admin
-        if not admin_service.is_admin(username):
+        if not admin_service.is_admin(username, request.state.user["payload"]):
             raise HTTPException(
                 status_code=403, detail="Access denied. Admin privileges required."
             )
@@ -422,7 +425,8 @@ async def create_salesperson_budget(
 
 
 @router.put("/budget/{salesperson_id}/{budget_id}")
-async def update_salesperson_budget(
+@bulkhead(LIGHT)
+def update_salesperson_budget(
     salesperson_id: int,
     budget_id: int,
     budget_data: BudgetUpdate,
@@ -438,7 +442,7 @@ async def update_salesperson_budget(
         admin_service = AdminService(db)
 
         # Check if user is admin
-        if not admin_service.is_admin(username):
+        if not admin_service.is_admin(username, request.state.user["payload"]):
             raise HTTPException(
                 status_code=403, detail="Access denied. Admin privileges required."
             )
@@ -492,7 +496,8 @@ async def update_salesperson_budget(
 
 
 @router.delete("/budget/{salesperson_id}/{budget_id}")
-async def delete_salesperson_budget(
+@bulkhead(LIGHT)
+def delete_salesperson_budget(
     salesperson_id: int,
     budget_id: int,
     request: Request,
@@ -507,7 +512,7 @@ async def delete_salesperson_budget(
         admin_service = AdminService(db)
 
         # Check if user is admin
-        if not admin_service.is_admin(username):
+        if not admin_service.is_admin(username, request.state.user["payload"]):
             raise HTTPException(
                 status_code=403, detail="Access denied. Admin privileges required."
             )
@@ -543,7 +548,8 @@ async def delete_salesperson_budget(
 
 
 @router.post("/budget/{salesperson_id}/generate-from-sales")
-async def generate_salesperson_budget_from_sales(
+@bulkhead(LIGHT)
+def generate_salesperson_budget_from_sales(
     salesperson_id: int, request: Request, db: Session = Depends(get_session)
 ) -> Dict[str, Any]:
     """Generate budget entries from sales data for a specific salesperson (admin only)"""
@@ -555,7 +561,7 @@ async def generate_salesperson_budget_from_sales(
         admin_service = AdminService(db)
 
         # Check if user is admin
-        if not admin_service.is_admin(username):
+        if not admin_service.is_admin(username, request.state.user["payload"]):
             raise HTTPException(
                 status_code=403, detail="Access denied. Admin privileges required."
             )
@@ -591,16 +597,7 @@ async def generate_salesperson_budget_from_sales(
         )
 
         # Save budgets to database
-        created_budgets = []
-        for budget in budgets:
-            db.add(budget)
-            created_budgets.append(budget)
-
-        db.commit()
-
-        # Refresh to get IDs
-        for budget in created_budgets:
-            db.refresh(budget)
+        created_budgets = budget_service.save_budgets(budgets)
 
         return {
             "success": True,
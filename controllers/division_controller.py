@@ -1,10 +1,15 @@
 from fastapi import APIRouter, Depends, Request, HTTPException
+from fastapi.responses import StreamingResponse
 from sqlmodel import Session
-from db.core import get_readonly_session, get_session
+from sqlmodel.ext.asyncio.session import AsyncSession
+from db.core import get_async_readonly_session, get_readonly_session, get_session
 from services.admin_service import AdminService
+from services.async_service import AsyncServiceProxy
+from services.bulkhead import bulkhead, HEAVY, LIGHT
 from services.division_service import DivisionService
-from typing import Dict, Any, List
+from typing import Dict, Any, Iterable, Iterator, List, Literal
 from pydantic import BaseModel
+import json
 
 router = APIRouter(
     tags=["division"],
@@ -24,13 +29,41 @@ class SaveRatiosRequest(BaseModel):
     overrides: List[RatioOverrideRequest]
 
 
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+NDJSON_CHUNK_ROWS = 500
+
+
+def ndjson_chunks(rows: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    """Encode rows as newline-delimited JSON, flushed every NDJSON_CHUNK_ROWS rows"""
+    chunk = []
+    for row in rows:
+        chunk.append(json.dumps(row))
+        if len(chunk) == NDJSON_CHUNK_ROWS:
+            yield "\n".join(chunk) + "\n"
+            chunk = []
+    if chunk:
+        yield "\n".join(chunk) + "\n"
+
+
 @router.get("/division/allocations")
-async def get_division_allocations(
-    request: Request, db: Session = Depends(get_readonly_session)
+@bulkhead(HEAVY)
+def get_division_allocations(
+    request: Request,
+    engine: Literal["python", "columnar"] = "python",
+    aggregate: bool = False,
+    live: bool = False,
+    sparse: bool = False,
+    db: Session = Depends(get_readonly_session),
 ) -> Dict[str, Any]:
     """
     Get division allocations based on historical sales ratios and budget data
     Only accessible by admin users
+    2025 inputs come from the baseline snapshot; live=true recomputes them from raw sales
+    engine=columnar computes the same rows with the NumPy engine
+    aggregate=true has MySQL sum sales per group/division/quarter first
+    Accept: application/x-ndjson streams one row per line instead of a JSON document
+    sparse=true only returns used (group, division) pairs plus the group and division
+    headers needed to rebuild the full grid (JSON only)
     """
     try:
         # Get username from request state (set by auth middleware)
@@ -40,14 +73,57 @@ async def get_division_allocations(
         admin_service = AdminService(db)
 
         # Check if user is admin
-        if not admin_service.is_admin(username):
+        if not admin_service.is_admin(username, request.state.user["payload"]):
             raise HTTPException(
                 status_code=403, detail="Access denied. Admin privileges required."
             )
 
         # Initialize division service and get data
         division_service = DivisionService(db)
-        division_data = division_service.get_division_allocations()
+
+        if sparse:
+            if engine == "columnar":
+                result = division_service.get_division_allocations_columnar_sparse(
+                    aggregate, use_snapshot=not live
+                )
+            else:
+                result = division_service.get_division_allocations_sparse(
+                    aggregate, use_snapshot=not live
+                )
+            return {
+                "success": True,
+                "sparse": True,
+                "data": result["data"],
+                "groups": result["groups"],
+                "divisions": result["divisions"],
+                "total_records": len(result["data"]),
+                "grid_records": len(result["groups"]) * len(result["divisions"]),
+                "user_info": {"username": username, "is_admin": True},
+            }
+
+        if NDJSON_MEDIA_TYPE in request.headers.get("accept", ""):
+            # Inputs are loaded here; rows are computed batch by batch on the HEAVY
+            # pool as the client reads them, under one slot held for the whole stream
+            if engine == "columnar":
+                rows = division_service.iter_division_allocations_columnar(
+                    aggregate, use_snapshot=not live
+                )
+            else:
+                rows = division_service.iter_division_allocations(
+                    aggregate, use_snapshot=not live
+                )
+            return StreamingResponse(
+                HEAVY.stream(ndjson_chunks(rows)), media_type=NDJSON_MEDIA_TYPE
+            )
+
+        if engine == "columnar":
+            division_data = division_service.get_division_allocations_columnar(
+                aggregate, use_snapshot=not live
+            )
+        else:
+            division_data = division_service.get_division_allocations(
+                aggregate, use_snapshot=not live
+            )
 
         return {
             "success": True,
@@ -64,8 +140,49 @@ async def get_division_allocations(
         )
 
 
+@router.post("/division/baseline/refresh")
+@bulkhead(HEAVY)
+def refresh_division_baseline(
+    request: Request, db: Session = Depends(get_session)
+) -> Dict[str, Any]:
+    """
+    Rebuild the 2025 division baseline snapshot from raw sales
+    Only accessible by admin users
+    """
+    try:
+        # Get username from request state (set by auth middleware)
+        username = request.state.user["username"]
+
+        # Initialize admin service
+        admin_service = AdminService(db)
+
+        # Check if user is admin
+        if not admin_service.is_admin(username, request.state.user["payload"]):
+            raise HTTPException(
+                status_code=403, detail="Access denied. Admin privileges required."
+            )
+
+        division_service = DivisionService(db)
+        result = division_service.refresh_baseline_snapshot()
+
+        return {
+            "success": True,
+            "message": f"Refreshed division baseline with {result['division_rows']} group-division rows",
+            "result": result,
+            "user_info": {"username": username, "is_admin": True},
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Error refreshing division baseline: {str(e)}"
+        )
+
+
 @router.post("/division/save-ratios")
-async def save_division_ratios(
+@bulkhead(LIGHT)
+def save_division_ratios(
     request: Request,
     save_request: SaveRatiosRequest,
     db: Session = Depends(get_session),
@@ -82,7 +199,7 @@ async def save_division_ratios(
         admin_service = AdminService(db)
 
         # Check if user is admin
-        if not admin_service.is_admin(username):
+        if not admin_service.is_admin(username, request.state.user["payload"]):
             raise HTTPException(
                 status_code=403, detail="Access denied. Admin privileges required."
             )
@@ -110,13 +227,59 @@ async def save_division_ratios(
         )
 
 
+@router.post("/division/preview-ratios")
+async def preview_division_ratios(
+    request: Request,
+    preview_request: SaveRatiosRequest,
+    db: AsyncSession = Depends(get_async_readonly_session),
+) -> Dict[str, Any]:
+    """
+    Preview allocations and GP$ for one group with candidate ratio overrides
+    Nothing is saved; only accessible by admin users
+    """
+    try:
+        # Get username from request state (set by auth middleware)
+        username = request.state.user["username"]
+
+        # Initialize admin service
+        admin_service = AsyncServiceProxy(AdminService, db)
+
+        # Check if user is admin
+        if not await admin_service.is_admin(username, request.state.user["payload"]):
+            raise HTTPException(
+                status_code=403, detail="Access denied. Admin privileges required."
+            )
+
+        division_service = AsyncServiceProxy(DivisionService, db)
+        overrides_data = [override.dict() for override in preview_request.overrides]
+
+        try:
+            data = await division_service.preview_group_allocations(overrides_data)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        return {
+            "success": True,
+            "data": data,
+            "count": len(data),
+            "user_info": {"username": username, "is_admin": True},
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Error previewing division ratios: {str(e)}"
+        )
+
+
 @router.get("/division/allocations/{salesperson_id}/{customer_class}/{group_key}")
 async def get_single_division_allocation(
     salesperson_id: int,
     customer_class: str,
     group_key: str,
     request: Request,
-    db: Session = Depends(get_readonly_session),
+    db: AsyncSession = Depends(get_async_readonly_session),
 ) -> Dict[str, Any]:
     """
     Get allocations for a single group only
@@ -127,17 +290,17 @@ async def get_single_division_allocation(
         username = request.state.user["username"]
 
         # Initialize admin service
-        admin_service = AdminService(db)
+        admin_service = AsyncServiceProxy(AdminService, db)
 
         # Check if user is admin
-        if not admin_service.is_admin(username):
+        if not await admin_service.is_admin(username, request.state.user["payload"]):
             raise HTTPException(
                 status_code=403, detail="Access denied. Admin privileges required."
             )
 
         # Initialize division service and get data for single group
-        division_service = DivisionService(db)
-        data = division_service.get_division_allocations_for_group(
+        division_service = AsyncServiceProxy(DivisionService, db)
+        data = await division_service.get_division_allocations_for_group(
             salesperson_id, customer_class, group_key
         )
 
@@ -157,7 +320,8 @@ async def get_single_division_allocation(
 
 
 @router.delete("/division/reset-group/{salesperson_id}/{customer_class}/{group_key}")
-async def reset_group_overrides(
+@bulkhead(LIGHT)
+def reset_group_overrides(
     salesperson_id: int,
     customer_class: str,
     group_key: str,
@@ -176,7 +340,7 @@ async def reset_group_overrides(
         admin_service = AdminService(db)
 
         # Check if user is admin
-        if not admin_service.is_admin(username):
+        if not admin_service.is_admin(username, request.state.user["payload"]):
             raise HTTPException(
                 status_code=403, detail="Access denied. Admin privileges required."
             )
@@ -1,9 +1,12 @@
 from fastapi import APIRouter, Depends, Request, HTTPException
 from sqlmodel import Session
-from typing import List
+from sqlmodel.ext.asyncio.session import AsyncSession
+from typing import List, Literal
 from pydantic import BaseModel
-from db.core import get_readonly_session, get_session
+from db.core import get_async_readonly_session, get_readonly_session, get_session
 from services.admin_service import AdminService
+from services.async_service import AsyncServiceProxy
+from services.bulkhead import bulkhead, HEAVY, LIGHT
 from services.gross_profit_service import GrossProfitService
 
 router = APIRouter(tags=["gross-profit"])
@@ -25,40 +28,64 @@ class SaveGpOverrides(BaseModel):
 
 
 @router.get("/gross-profit")
-async def get_gp(request: Request, db: Session = Depends(get_readonly_session)):
+@bulkhead(HEAVY)
+def get_gp(
+    request: Request,
+    engine: Literal["sql", "columnar"] = "sql",
+    live: bool = False,
+    db: Session = Depends(get_readonly_session),
+):
     username = request.state.user["username"]
     admin = AdminService(db)
-    if not admin.is_admin(username):
+    if not admin.is_admin(username, request.state.user["payload"]):
         raise HTTPException(status_code=403, detail="Access denied")
-    data = GrossProfitService(db).get_gross_profit_allocations()
+    service = GrossProfitService(db)
+    if engine == "columnar":
+        data = service.get_gross_profit_allocations_columnar(use_snapshot=not live)
+    else:
+        data = service.get_gross_profit_allocations(use_snapshot=not live)
     return {"success": True, "data": data, "count": len(data)}
 
 
+@router.post("/gross-profit/baseline/refresh")
+@bulkhead(HEAVY)
+def refresh_gp_baseline(request: Request, db: Session = Depends(get_session)):
+    username = request.state.user["username"]
+    admin = AdminService(db)
+    if not admin.is_admin(username, request.state.user["payload"]):
+        raise HTTPException(status_code=403, detail="Access denied")
+    result = GrossProfitService(db).refresh_gp_baseline()
+    return {"success": True, "result": result}
+
+
 @router.get("/gross-profit/{salesperson_id}/{customer_class}/{group_key}")
 async def get_single_gp_group(
     salesperson_id: int,
     customer_class: str,
     group_key: str,
     request: Request,
-    db: Session = Depends(get_readonly_session),
+    live: bool = False,
+    db: AsyncSession = Depends(get_async_readonly_session),
 ):
     username = request.state.user["username"]
-    admin = AdminService(db)
-    if not admin.is_admin(username):
+    admin = AsyncServiceProxy(AdminService, db)
+    if not await admin.is_admin(username, request.state.user["payload"]):
         raise HTTPException(status_code=403, detail="Access denied")
-    data = GrossProfitService(db).get_single_gross_profit_group(
-        salesperson_id, customer_class, group_key
+    service = AsyncServiceProxy(GrossProfitService, db)
+    data = await service.get_single_gross_profit_group(
+        salesperson_id, customer_class, group_key, use_snapshot=not live
     )
     return {"success": True, "data": data, "count": len(data)}
 
 
 @router.post("/gross-profit/save-overrides")
-async def save_gp_overrides(
+@bulkhead(LIGHT)
+def save_gp_overrides(
     request: Request, payload: SaveGpOverrides, db: Session = Depends(get_session)
 ):
     username = request.state.user["username"]
     admin = AdminService(db)
-    if not admin.is_admin(username):
+    if not admin.is_admin(username, request.state.user["payload"]):
         raise HTTPException(status_code=403, detail="Access denied")
     result = GrossProfitService(db).save_gp_overrides(
         [o.dict() for o in payload.overrides]
@@ -67,7 +94,8 @@ async def save_gp_overrides(
 
 
 @router.delete("/gross-profit/reset/{salesperson_id}/{customer_class}/{group_key}")
-async def reset_gp_override(
+@bulkhead(LIGHT)
+def reset_gp_override(
     salesperson_id: int,
     customer_class: str,
     group_key: str,
@@ -76,7 +104,7 @@ async def reset_gp_override(
 ):
     username = request.state.user["username"]
     admin = AdminService(db)
-    if not admin.is_admin(username):
+    if not admin.is_admin(username, request.state.user["payload"]):
         raise HTTPException(status_code=403, detail="Access denied")
     deleted = GrossProfitService(db).delete_gp_override(
         salesperson_id, customer_class, group_key
@@ -85,13 +113,14 @@ async def reset_gp_override(
 
 
 @router.delete("/gross-profit/reset-all")
-async def reset_all_gp_overrides(
+@bulkhead(LIGHT)
+def reset_all_gp_overrides(
     request: Request,
     db: Session = Depends(get_session),
 ):
     username = request.state.user["username"]
     admin = AdminService(db)
-    if not admin.is_admin(username):
+    if not admin.is_admin(username, request.state.user["payload"]):
         raise HTTPException(status_code=403, detail="Access denied")
     deleted = GrossProfitService(db).delete_all_gp_overrides()
     return {"success": True, "deleted": deleted}
@@ -1,8 +1,9 @@
 from fastapi import APIRouter, Depends, Request, HTTPException
-from sqlmodel import Session
-from db.core import get_readonly_session
+from sqlmodel.ext.asyncio.session import AsyncSession
+from db.core import get_async_readonly_session
 from services.sales_service import SalesService
 from services.admin_service import AdminService
+from services.async_service import AsyncServiceProxy
 from typing import Dict, Any
 
 router = APIRouter(
@@ -12,7 +13,7 @@ router = APIRouter(
 
 @router.get("/sales")
 async def get_sales_data(
-    request: Request, db: Session = Depends(get_readonly_session)
+    request: Request, db: AsyncSession = Depends(get_async_readonly_session)
 ) -> Dict[str, Any]:
     """
     Get sales data based on user's salesperson role
@@ -22,14 +23,14 @@ async def get_sales_data(
         username = request.state.user["username"]
 
         # Initialize sales service
-        sales_service = SalesService(db)
+        sales_service = AsyncServiceProxy(SalesService, db)
 
         # Get sales data based on user role
-        sales_data = sales_service.get_sales_data(username)
-        summary = sales_service.get_sales_summary(username)
+        sales_data = await sales_service.get_sales_data(username)
+        summary = await sales_service.get_sales_summary(username)
 
         # Get user's salesperson info for context
-        user_salesperson = sales_service._get_user_salesperson(username)
+        user_salesperson = await sales_service._get_user_salesperson(username)
         user_role = user_salesperson.role if user_salesperson else "Unknown"
 
         return {
@@ -55,15 +56,15 @@ async def get_sales_data(
 
 @router.get("/sales/summary")
 async def get_sales_summary(
-    request: Request, db: Session = Depends(get_readonly_session)
+    request: Request, db: AsyncSession = Depends(get_async_readonly_session)
 ) -> Dict[str, Any]:
     """
     Get sales summary only
     """
     try:
         username = request.state.user["username"]
-        sales_service = SalesService(db)
-        summary = sales_service.get_sales_summary(username)
+        sales_service = AsyncServiceProxy(SalesService, db)
+        summary = await sales_service.get_sales_summary(username)
 
         return {"success": True, "summary": summary}
 
@@ -75,7 +76,9 @@ async def get_sales_summary(
 
 @router.get("/sales/{salesperson_id}")
 async def get_salesperson_sales_data(
-    salesperson_id: int, request: Request, db: Session = Depends(get_readonly_session)
+    salesperson_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_async_readonly_session),
 ) -> Dict[str, Any]:
     """
     Get sales data for a specific salesperson (admin only)
@@ -85,24 +88,26 @@ async def get_salesperson_sales_data(
         username = request.state.user["username"]
 
         # Initialize admin service to check admin privileges
-        admin_service = AdminService(db)
+        admin_service = AsyncServiceProxy(AdminService, db)
 
         # Check if user is admin
-        if not admin_service.is_admin(username):
+        if not await admin_service.is_admin(username, request.state.user["payload"]):
             raise HTTPException(
                 status_code=403, detail="Access denied. Admin privileges required."
             )
 
         # Initialize sales service
-        sales_service = SalesService(db)
+        sales_service = AsyncServiceProxy(SalesService, db)
 
         # Get sales data for the specific salesperson
         # We need to get the salesperson's role first to determine the logic
         from db.dfm_reflect import Salesperson
         from sqlmodel import select
 
-        salesperson = db.exec(
-            select(Salesperson).where(Salesperson.salesman_no == salesperson_id)
+        salesperson = (
+            await db.exec(
+                select(Salesperson).where(Salesperson.salesman_no == salesperson_id)
+            )
         ).first()
 
         if not salesperson:
@@ -116,11 +121,13 @@ async def get_salesperson_sales_data(
         is_hospitality = role.startswith("Hospitality")
 
         if is_hospitality:
-            sales_data = sales_service._get_hospitality_sales_data(salesperson_id)
+            sales_data = await sales_service._get_hospitality_sales_data(salesperson_id)
         else:
-            sales_data = sales_service._get_non_hospitality_sales_data(salesperson_id)
+            sales_data = await sales_service._get_non_hospitality_sales_data(
+                salesperson_id
+            )
 
-        summary = sales_service.get_sales_summary_for_salesperson(sales_data)
+        summary = await sales_service.get_sales_summary_for_salesperson(sales_data)
 
         return {
             "success": True,
@@ -1,8 +1,8 @@
-from sqlalchemy import text
+from sqlalchemy import Double, UniqueConstraint, text
 from sqlmodel import SQLModel, Field
 from datetime import datetime
 from .core import engine
-from .dfm_reflect import DFMBase
+from .migrations import apply_migrations
 
 
 class Budget(SQLModel, table=True):
@@ -26,6 +26,15 @@ class Budget(SQLModel, table=True):
 
 class DivisionRatioOverride(SQLModel, table=True):
     __tablename__ = "division_ratio_overrides"
+    __table_args__ = (
+        UniqueConstraint(
+            "salesperson_id",
+            "customer_class",
+            "group_key",
+            "item_division",
+            name="uq_division_ratio_overrides_group_division",
+        ),
+    )
 
     id: int | None = Field(default=None, primary_key=True)
     salesperson_id: int = Field(description="Salesperson ID")
@@ -41,23 +50,17 @@ class DivisionRatioOverride(SQLModel, table=True):
         default_factory=datetime.utcnow, description="Updated At"
     )
 
-    class Config:
-        # Composite unique constraint
-        indexes = [
-            {
-                "fields": [
-                    "salesperson_id",
-                    "customer_class",
-                    "group_key",
-                    "item_division",
-                ],
-                "unique": True,
-            }
-        ]
-
 
 class GrossProfitOverride(SQLModel, table=True):
     __tablename__ = "gp_ratio_overrides"
+    __table_args__ = (
+        UniqueConstraint(
+            "salesperson_id",
+            "customer_class",
+            "group_key",
+            name="uq_gp_ratio_overrides_group",
+        ),
+    )
 
     id: int | None = Field(default=None, primary_key=True)
     salesperson_id: int
@@ -79,20 +82,104 @@ class GrossProfitOverride(SQLModel, table=True):
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
-    class Config:
-        indexes = [
-            {
-                "fields": ["salesperson_id", "customer_class", "group_key"],
-                "unique": True,
-            }
-        ]
+
+# ----- 2025 division baseline snapshot (rebuilt by DivisionService.refresh_baseline_snapshot) -----
+# Ratios/sales are DOUBLE so the snapshot reproduces the live computation exactly
+
+
+class DivisionBaseline2025(SQLModel, table=True):
+    __tablename__ = "division_baseline_2025"
+
+    id: int | None = Field(default=None, primary_key=True)
+    group_key: str = Field(max_length=255, description="Group Key")
+    customer_class: str = Field(max_length=255, description="Customer Class")
+    item_division: int | None = Field(default=None, description="Item Division Number")
+    total_sales: float = Field(default=0.0, sa_type=Double, description="2025 Sales")
+    division_ratio_2025: float = Field(
+        default=0.0, sa_type=Double, description="Normalized 2025 Division Ratio"
+    )
+    q1_sales: float = Field(default=0.0, sa_type=Double)
+    q2_sales: float = Field(default=0.0, sa_type=Double)
+    q3_sales: float = Field(default=0.0, sa_type=Double)
+    q4_sales: float = Field(default=0.0, sa_type=Double)
+    q1_gp_percent: float | None = Field(default=None, sa_type=Double)
+    q2_gp_percent: float | None = Field(default=None, sa_type=Double)
+    q3_gp_percent: float | None = Field(default=None, sa_type=Double)
+    q4_gp_percent: float | None = Field(default=None, sa_type=Double)
+    full_year_gp_percent: float | None = Field(default=None, sa_type=Double)
+    refreshed_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class DivisionGroupBaseline2025(SQLModel, table=True):
+    __tablename__ = "division_group_baseline_2025"
+
+    id: int | None = Field(default=None, primary_key=True)
+    group_key: str = Field(max_length=255, description="Group Key")
+    customer_class: str = Field(max_length=255, description="Customer Class")
+    total_sales: float = Field(
+        default=0.0, sa_type=Double, description="2025 Sales across divisions"
+    )
+    refreshed_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class DivisionTotalBaseline2025(SQLModel, table=True):
+    __tablename__ = "division_totals_2025"
+
+    id: int | None = Field(default=None, primary_key=True)
+    item_division: int | None = Field(default=None, description="Item Division Number")
+    total_sales: float = Field(
+        default=0.0, sa_type=Double, description="2025 Sales across groups"
+    )
+    refreshed_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class DivisionSalesGroup2025(SQLModel, table=True):
+    __tablename__ = "division_sales_groups_2025"
+
+    id: int | None = Field(default=None, primary_key=True)
+    salesperson_id: int = Field(description="Salesperson ID")
+    salesperson_name: str = Field(max_length=255, description="Salesperson Name")
+    customer_class: str = Field(max_length=255, description="Customer Class")
+    group_key: str = Field(max_length=255, description="Group Key")
+    brand: str | None = Field(default=None, max_length=255, description="Brand")
+    refreshed_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+# ----- 2025 GP baseline (rebuilt by GrossProfitService.refresh_gp_baseline) -----
+
+
+class GrossProfitBaseline2025(SQLModel, table=True):
+    __tablename__ = "gp_baseline_2025"
+    __table_args__ = (
+        UniqueConstraint(
+            "salesperson_id",
+            "customer_class",
+            "group_key",
+            name="uq_gp_baseline_2025_group",
+        ),
+    )
+
+    id: int | None = Field(default=None, primary_key=True)
+    salesperson_id: int = Field(description="Salesperson ID")
+    customer_class: str = Field(max_length=255, description="Customer Class")
+    group_key: str = Field(max_length=255, description="Group Key")
+    q1_sales_2025: float = Field(default=0.0, sa_type=Double)
+    q2_sales_2025: float = Field(default=0.0, sa_type=Double)
+    q3_sales_2025: float = Field(default=0.0, sa_type=Double)
+    q4_sales_2025: float = Field(default=0.0, sa_type=Double)
+    q1_gp_percent: float | None = Field(default=None, sa_type=Double)
+    q2_gp_percent: float | None = Field(default=None, sa_type=Double)
+    q3_gp_percent: float | None = Field(default=None, sa_type=Double)
+    q4_gp_percent: float | None = Field(default=None, sa_type=Double)
+    full_year_gp_percent: float | None = Field(default=None, sa_type=Double)
+    refreshed_at: datetime = Field(default_factory=datetime.utcnow)
 
 
 # Create only your own tables
 def init_db():
     create_budget_clone_tables()
     SQLModel.metadata.create_all(bind=engine)
-    DFMBase.prepare(autoload_with=engine)
+    apply_migrations(engine)
 
 
 def create_budget_clone_tables():
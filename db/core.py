@@ -1,11 +1,73 @@
 from sqlmodel import SQLModel, create_engine, Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+from db.pool import TimedAsyncAdaptedQueuePool, TimedQueuePool
 from dotenv import load_dotenv
 import os
 
 load_dotenv()
 
 
-engine = create_engine(os.getenv("DATABASE_URL"), pool_pre_ping=True)
+# ----- Pool settings -----
+# Applied to each engine separately, in every uvicorn worker process.
+# Connections are retired after DB_POOL_RECYCLE seconds (keep it below MySQL's
+# wait_timeout) instead of being pinged on every checkout; DB_POOL_PRE_PING=1
+# brings the ping back if connections still go stale (e.g. behind a proxy).
+POOL_SETTINGS = {
+    "pool_size": int(os.getenv("DB_POOL_SIZE", "5")),
+    "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "10")),
+    "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+    "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+    "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "0").lower() in ("1", "true"),
+}
+
+
+engine = create_engine(
+    os.getenv("DATABASE_URL"), poolclass=TimedQueuePool, **POOL_SETTINGS
+)
+
+# Same database through aiomysql, so awaiting a query frees the event loop.
+# ASYNC_DATABASE_URL overrides the driver/host if it must differ.
+async_engine = create_async_engine(
+    os.getenv("ASYNC_DATABASE_URL")
+    or make_url(os.getenv("DATABASE_URL")).set(drivername="mysql+aiomysql"),
+    poolclass=TimedAsyncAdaptedQueuePool,
+    **POOL_SETTINGS,
+)
+
+# Reports read from READONLY_DATABASE_URL (e.g. a replica) when it is set, and
+# from the primary otherwise. A lagging replica serves reads from before recent
+# writes, and results computed from them can sit in services/cache until the
+# next bump or DATA_CACHE_TTL.
+READONLY_DATABASE_URL = os.getenv("READONLY_DATABASE_URL")
+if READONLY_DATABASE_URL:
+    readonly_engine = create_engine(
+        READONLY_DATABASE_URL, poolclass=TimedQueuePool, **POOL_SETTINGS
+    )
+    async_readonly_engine = create_async_engine(
+        make_url(READONLY_DATABASE_URL).set(drivername="mysql+aiomysql"),
+        poolclass=TimedAsyncAdaptedQueuePool,
+        **POOL_SETTINGS,
+    )
+else:
+    readonly_engine = engine
+    async_readonly_engine = async_engine
+
+
+class ReadOnlySession(Session):
+    """
+    Session whose transactions are START TRANSACTION WITH CONSISTENT SNAPSHOT,
+    READ ONLY: every query of a request sees the same snapshot, and the server
+    rejects writes
+    """
+
+
+@event.listens_for(ReadOnlySession, "after_begin")
+def _start_read_only_transaction(session, transaction, connection) -> None:
+    # MySQL drivers have no explicit BEGIN, so this statement opens the transaction
+    connection.exec_driver_sql("START TRANSACTION WITH CONSISTENT SNAPSHOT, READ ONLY")
 
 
 # ----- Sessions -----
@@ -17,6 +79,15 @@ def get_session():
 
 def get_readonly_session():
     """Read-only session for reflected DFM tables."""
-    with Session(engine) as session:
+    with ReadOnlySession(readonly_engine) as session:
         yield session
         session.rollback()  # ensure nothing gets committed accidentally
+
+
+async def get_async_readonly_session():
+    """Read-only AsyncSession; services run on it through AsyncServiceProxy."""
+    async with AsyncSession(
+        async_readonly_engine, sync_session_class=ReadOnlySession
+    ) as session:
+        yield session
+        await session.rollback()  # ensure nothing gets committed accidentally
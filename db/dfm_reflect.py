@@ -1,10 +1,65 @@
-from sqlalchemy.ext.automap import automap_base
-from .core import engine
+"""
+Models for the DFM tables this app reads but does not own
 
-DFMBase = automap_base()
-DFMBase.prepare(autoload_with=engine)
+Declared explicitly rather than reflected, so importing the app never opens a
+database connection. Only the columns the app uses are mapped. DFMBase has its
+own metadata, so SQLModel.metadata.create_all in init_db never creates or alters
+these tables; the sales/orders clones are created by create_budget_clone_tables
+with the source tables' definitions.
+"""
 
-Sales = getattr(DFMBase.classes, "sales_budget_2026", None)
-Users = DFMBase.classes.users
-Salesperson = DFMBase.classes.salesperson_masters
-Orders = getattr(DFMBase.classes, "orders_budget_2026", None)
+from sqlalchemy import Column, Date, Integer, Numeric, String, Table
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
+
+
+class DFMBase(DeclarativeBase):
+    pass
+
+
+class Users(DFMBase):
+    __tablename__ = "users"
+
+    # Mapped on username, the key every lookup uses
+    username: Mapped[str] = mapped_column(String(255), primary_key=True)
+    hashed_password: Mapped[str] = mapped_column(String(255))
+    # 0 = superadmin, NULL = admin, otherwise salesperson_masters.salesman_no
+    salesman_id: Mapped[int | None] = mapped_column(Integer)
+
+
+class Salesperson(DFMBase):
+    __tablename__ = "salesperson_masters"
+
+    salesman_no: Mapped[int] = mapped_column(Integer, primary_key=True)
+    salesman_name: Mapped[str | None] = mapped_column(String(255))
+    role: Mapped[str | None] = mapped_column(String(255))
+
+
+# Sales and open-order clones are only queried with text() SQL, so they are
+# plain tables listing the columns those queries use
+Sales = Table(
+    "sales_budget_2026",
+    DFMBase.metadata,
+    Column("salesperson", Integer),
+    Column("period", Date),
+    Column("flag", String(255)),
+    Column("brand", String(255)),
+    Column("customer_name", String(255)),
+    Column("derived_customer_class", String(255)),
+    Column("item_division", Integer),
+    Column("ext_sales", Numeric),
+    Column("ext_cost", Numeric),
+    Column("zero_perc_sales", String(10)),
+)
+
+Orders = Table(
+    "orders_budget_2026",
+    DFMBase.metadata,
+    Column("salesperson", Integer),
+    Column("requested_ship_date", Date),
+    Column("flag", String(255)),
+    Column("brand", String(255)),
+    Column("customer_name", String(255)),
+    Column("derived_customer_class", String(255)),
+    Column("ext_sales", Numeric),
+    Column("zero_perc_sales", String(10)),
+)
@@ -0,0 +1,402 @@
+"""
+Versioned schema migrations for the budget tables and the sales/orders clones
+
+create_all only creates missing tables and CREATE TABLE ... LIKE copies
+whatever the source tables had, so the indexes the services rely on are
+declared here and applied in order. Applied versions are recorded in
+schema_migrations; every step is idempotent, so re-running is safe.
+
+Migrations run from manage.py, once per deploy, never from the app's startup:
+some steps rebuild large tables. Concurrent runs take turns on a MySQL named
+lock (MIGRATION_LOCK_TIMEOUT seconds at most).
+
+    python manage.py migrate
+    python manage.py missing-indexes
+"""
+
+import os
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+MIGRATION_LOCK = "schema_migrations"
+MIGRATION_LOCK_TIMEOUT = int(os.getenv("MIGRATION_LOCK_TIMEOUT", "600"))
+
+# (table, index name, columns, unique)
+IndexSpec = Tuple[str, str, Tuple[str, ...], bool]
+
+OVERRIDE_UNIQUE_KEYS: Tuple[IndexSpec, ...] = (
+    (
+        "division_ratio_overrides",
+        "uq_division_ratio_overrides_group_division",
+        ("salesperson_id", "customer_class", "group_key", "item_division"),
+        True,
+    ),
+    (
+        "gp_ratio_overrides",
+        "uq_gp_ratio_overrides_group",
+        ("salesperson_id", "customer_class", "group_key"),
+        True,
+    ),
+)
+
+# WHERE salesperson = ? AND period / requested_ship_date range, plus the
+# company-wide 2025 period scans of the division pipeline
+CLONE_INDEXES: Tuple[IndexSpec, ...] = (
+    (
+        "sales_budget_2026",
+        "ix_sales_budget_2026_salesperson_period",
+        ("salesperson", "period"),
+        False,
+    ),
+    ("sales_budget_2026", "ix_sales_budget_2026_period", ("period",), False),
+    (
+        "orders_budget_2026",
+        "ix_orders_budget_2026_salesperson_ship_date",
+        ("salesperson", "requested_ship_date"),
+        False,
+    ),
+)
+
+BUDGET_INDEXES: Tuple[IndexSpec, ...] = (
+    (
+        "budget_2026",
+        "ix_budget_2026_salesperson_class",
+        ("salesperson_id", "customer_class"),
+        False,
+    ),
+    (
+        "division_baseline_2025",
+        "ix_division_baseline_2025_group",
+        ("customer_class", "group_key"),
+        False,
+    ),
+    (
+        "division_group_baseline_2025",
+        "ix_division_group_baseline_2025_group",
+        ("customer_class", "group_key"),
+        False,
+    ),
+)
+
+# (table, customer class column) that get the stored group_key / is_hospitality
+# columns. INVISIBLE keeps them out of SELECT * and column-less INSERTs, so loads
+# into the clones keep working unchanged.
+GROUP_KEY_TABLES: Tuple[Tuple[str, str], ...] = (
+    ("budget_2026", "customer_class"),
+    ("sales_budget_2026", "derived_customer_class"),
+)
+
+# Budget joins/anti-joins on (salesperson, class, group_key) and single group sales lookups
+GROUP_KEY_INDEXES: Tuple[IndexSpec, ...] = (
+    (
+        "budget_2026",
+        "ix_budget_2026_salesperson_class_group",
+        ("salesperson_id", "customer_class", "group_key"),
+        False,
+    ),
+    (
+        "sales_budget_2026",
+        "ix_sales_budget_2026_class_group_period",
+        ("derived_customer_class", "group_key", "period"),
+        False,
+    ),
+)
+
+# GP budget joins/anti-joins on (salesperson, class, gp_group_key) and the
+# per-group 2025 aggregation
+GP_GROUP_KEY_INDEXES: Tuple[IndexSpec, ...] = (
+    (
+        "budget_2026",
+        "ix_budget_2026_salesperson_class_gp_group",
+        ("salesperson_id", "customer_class", "gp_group_key"),
+        False,
+    ),
+    (
+        "sales_budget_2026",
+        "ix_sales_budget_2026_class_gp_group_period",
+        ("derived_customer_class", "gp_group_key", "period"),
+        False,
+    ),
+)
+
+EXPECTED_INDEXES: Tuple[IndexSpec, ...] = (
+    OVERRIDE_UNIQUE_KEYS
+    + CLONE_INDEXES
+    + BUDGET_INDEXES
+    + GROUP_KEY_INDEXES
+    + GP_GROUP_KEY_INDEXES
+)
+
+
+def _existing_indexes(
+    connection: Connection, table: str
+) -> Dict[str, Tuple[bool, List[str]]]:
+    """Index name -> (unique, ordered columns) for a table in the current schema"""
+    result = connection.execute(
+        text(
+            """
+            SELECT index_name AS index_name, non_unique AS non_unique,
+                   column_name AS column_name
+            FROM information_schema.statistics
+            WHERE table_schema = DATABASE() AND table_name = :table
+            ORDER BY index_name, seq_in_index
+            """
+        ),
+        {"table": table},
+    )
+    indexes: Dict[str, Tuple[bool, List[str]]] = {}
+    for row in result:
+        # information_schema labels are upper case on MySQL 8 unless aliased
+        indexes.setdefault(row.index_name, (not row.non_unique, []))[1].append(
+            row.column_name
+        )
+    return indexes
+
+
+def _is_covered(existing: Dict[str, Tuple[bool, List[str]]], spec: IndexSpec) -> bool:
+    """
+    An index is satisfied by any index with that name, or one whose leading
+    columns match (unique specs need an exact unique key)
+    """
+    _, name, columns, unique = spec
+    if name in existing:
+        return True
+    for existing_unique, existing_columns in existing.values():
+        if unique:
+            if existing_unique and tuple(existing_columns) == columns:
+                return True
+        elif tuple(existing_columns[: len(columns)]) == columns:
+            return True
+    return False
+
+
+def _table_exists(connection: Connection, table: str) -> bool:
+    row = connection.execute(
+        text(
+            """
+            SELECT 1 FROM information_schema.tables
+            WHERE table_schema = DATABASE() AND table_name = :table
+            """
+        ),
+        {"table": table},
+    ).first()
+    return row is not None
+
+
+def _ensure_indexes(connection: Connection, specs: Tuple[IndexSpec, ...]) -> None:
+    """Create the indexes that are not already covered"""
+    for spec in specs:
+        table, name, columns, unique = spec
+        if not _table_exists(connection, table):
+            continue
+        if _is_covered(_existing_indexes(connection, table), spec):
+            continue
+
+        if unique:
+            # Keep the newest row per key, which is the one the services read last
+            same_key = " AND ".join(f"newer.{c} = older.{c}" for c in columns)
+            connection.execute(
+                text(
+                    f"DELETE older FROM {table} older JOIN {table} newer "
+                    f"ON {same_key} AND newer.id > older.id"
+                )
+            )
+            connection.execute(
+                text(
+                    f"ALTER TABLE {table} ADD UNIQUE KEY {name} ({', '.join(columns)})"
+                )
+            )
+        else:
+            connection.execute(
+                text(f"CREATE INDEX {name} ON {table} ({', '.join(columns)})")
+            )
+
+
+def _column_exists(connection: Connection, table: str, column: str) -> bool:
+    row = connection.execute(
+        text(
+            """
+            SELECT 1 FROM information_schema.columns
+            WHERE table_schema = DATABASE() AND table_name = :table
+              AND column_name = :column
+            """
+        ),
+        {"table": table, "column": column},
+    ).first()
+    return row is not None
+
+
+def _add_group_key_columns(connection: Connection) -> None:
+    """
+    Stored generated group_key / is_hospitality with the same normalization
+    the division queries used inline, so they can be indexed
+    GP only uses is_hospitality (for brand); its key is gp_group_key
+    """
+    for table, class_column in GROUP_KEY_TABLES:
+        if not _table_exists(connection, table):
+            continue
+        is_hospitality = f"{class_column} LIKE 'Hospitality%'"
+        columns = (
+            (
+                "is_hospitality",
+                f"TINYINT(1) AS ({is_hospitality}) STORED INVISIBLE",
+            ),
+            (
+                "group_key",
+                f"VARCHAR(255) AS (CASE WHEN {is_hospitality} "
+                "THEN NULLIF(TRIM(flag),'') ELSE NULLIF(TRIM(customer_name),'') END) "
+                "STORED INVISIBLE",
+            ),
+        )
+        for column, definition in columns:
+            if not _column_exists(connection, table, column):
+                connection.execute(
+                    text(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+                )
+    _ensure_indexes(connection, GROUP_KEY_INDEXES)
+
+
+def _add_gp_group_key_columns(connection: Connection) -> None:
+    """
+    Stored generated gp_group_key on the GROUP_KEY_TABLES, so GP can index the key
+    gp_ratio_overrides are saved under: flag for the exact 'Hospitality' class,
+    customer name otherwise, untrimmed (the expression the GP queries used inline)
+    """
+    for table, class_column in GROUP_KEY_TABLES:
+        if not _table_exists(connection, table):
+            continue
+        if not _column_exists(connection, table, "gp_group_key"):
+            connection.execute(
+                text(
+                    f"ALTER TABLE {table} ADD COLUMN gp_group_key VARCHAR(255) AS "
+                    f"(IF({class_column}='Hospitality', flag, customer_name)) "
+                    "STORED INVISIBLE"
+                )
+            )
+    _ensure_indexes(connection, GP_GROUP_KEY_INDEXES)
+
+
+# (version, description, step); append only, never renumber
+MIGRATIONS: Tuple[Tuple[int, str, Callable[[Connection], None]], ...] = (
+    (
+        1,
+        "override unique keys",
+        lambda connection: _ensure_indexes(connection, OVERRIDE_UNIQUE_KEYS),
+    ),
+    (
+        2,
+        "sales and orders clone indexes",
+        lambda connection: _ensure_indexes(connection, CLONE_INDEXES),
+    ),
+    (
+        3,
+        "budget and division baseline indexes",
+        lambda connection: _ensure_indexes(connection, BUDGET_INDEXES),
+    ),
+    (4, "generated group_key and is_hospitality columns", _add_group_key_columns),
+    (5, "generated gp_group_key columns", _add_gp_group_key_columns),
+)
+
+
+def _ensure_migrations_table(connection: Connection) -> None:
+    connection.execute(
+        text(
+            """
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+              version INT NOT NULL PRIMARY KEY,
+              description VARCHAR(255) NOT NULL,
+              applied_at DATETIME NOT NULL
+            )
+            """
+        )
+    )
+
+
+def applied_versions(engine: Engine) -> List[int]:
+    """Migration versions already recorded in schema_migrations"""
+    with engine.begin() as connection:
+        _ensure_migrations_table(connection)
+        result = connection.execute(
+            text("SELECT version FROM schema_migrations ORDER BY version")
+        )
+        return [row.version for row in result]
+
+
+@contextmanager
+def migration_lock(engine: Engine) -> Iterator[None]:
+    """Hold the MIGRATION_LOCK named lock; other holders are waited for"""
+    with engine.connect() as connection:
+        acquired = connection.execute(
+            text("SELECT GET_LOCK(:name, :timeout)"),
+            {"name": MIGRATION_LOCK, "timeout": MIGRATION_LOCK_TIMEOUT},
+        ).scalar()
+        if acquired != 1:
+            raise RuntimeError(
+                f"Could not get the {MIGRATION_LOCK} lock within "
+                f"{MIGRATION_LOCK_TIMEOUT}s; is another migration running?"
+            )
+        try:
+            yield
+        finally:
+            connection.execute(
+                text("SELECT RELEASE_LOCK(:name)"), {"name": MIGRATION_LOCK}
+            )
+
+
+def apply_migrations(engine: Engine) -> List[int]:
+    """
+    Apply pending migrations in version order
+    Returns the versions applied by this call
+    """
+    with migration_lock(engine):
+        # Read under the lock: a run that held it before us may have applied some
+        done = set(applied_versions(engine))
+        applied = []
+        for version, description, step in MIGRATIONS:
+            if version in done:
+                continue
+            # MySQL commits DDL implicitly; the version row is written once the step succeeded
+            with engine.begin() as connection:
+                step(connection)
+                connection.execute(
+                    text(
+                        """
+                        INSERT INTO schema_migrations (version, description, applied_at)
+                        VALUES (:version, :description, :applied_at)
+                        """
+                    ),
+                    {
+                        "version": version,
+                        "description": description,
+                        "applied_at": datetime.utcnow(),
+                    },
+                )
+            applied.append(version)
+        return applied
+
+
+def missing_indexes(engine: Engine) -> List[Dict[str, Any]]:
+    """
+    Expected indexes that no existing index covers
+    Returns list of dicts with: table, index, columns, unique, table_exists
+    """
+    missing = []
+    with engine.connect() as connection:
+        for spec in EXPECTED_INDEXES:
+            table, name, columns, unique = spec
+            table_exists = _table_exists(connection, table)
+            if table_exists and _is_covered(_existing_indexes(connection, table), spec):
+                continue
+            missing.append(
+                {
+                    "table": table,
+                    "index": name,
+                    "columns": list(columns),
+                    "unique": unique,
+                    "table_exists": table_exists,
+                }
+            )
+    return missing
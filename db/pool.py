@@ -0,0 +1,88 @@
+"""
+Connection pools that record how long each checkout waited
+
+The engines in db/core.py use these instead of the stock QueuePool /
+AsyncAdaptedQueuePool. Every checkout's wait (time spent in _do_get, i.e.
+waiting for an idle connection or opening a new one) goes into a bounded window
+of recent samples, and pool_stats() reports it next to the pool's counters so
+pool_size / max_overflow can be sized against real load. Numbers are per
+process: each uvicorn worker has its own pools.
+"""
+
+import os
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# Checkout waits kept per pool for the percentiles
+WAIT_SAMPLES = int(os.getenv("DB_POOL_WAIT_SAMPLES", "1000"))
+
+
+class _TimedCheckout:
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_samples: Deque[float] = deque(maxlen=WAIT_SAMPLES)
+        self.checkouts = 0
+        self.timeouts = 0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            self.wait_samples.append(time.perf_counter() - started)
+            self.checkouts += 1
+
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+
+class TimedAsyncAdaptedQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    pass
+
+
+def _percentile(ordered: List[float], pct: float) -> float:
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def pool_stats(pool: QueuePool) -> Dict[str, Any]:
+    """Pool counters and checkout wait percentiles (ms) over the recent window"""
+    stats = {
+        "pool_size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": pool._max_overflow,
+        "timeout_seconds": pool.timeout(),
+        "recycle_seconds": pool._recycle,
+        "pre_ping": pool._pre_ping,
+    }
+    if not isinstance(pool, _TimedCheckout):
+        return stats
+
+    waits = sorted(wait * 1000 for wait in pool.wait_samples)
+    stats.update(
+        {
+            "checkouts": pool.checkouts,
+            "checkout_timeouts": pool.timeouts,
+            "wait_samples": len(waits),
+            "wait_ms": (
+                {
+                    "p50": round(_percentile(waits, 50), 3),
+                    "p95": round(_percentile(waits, 95), 3),
+                    "p99": round(_percentile(waits, 99), 3),
+                    "max": round(waits[-1], 3),
+                }
+                if waits
+                else None
+            ),
+        }
+    )
+    return stats
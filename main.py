@@ -1,10 +1,10 @@
-from fastapi import FastAPI, Depends
+from fastapi import FastAPI, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from db.core import get_readonly_session
 
 # from .db.budget_models import Budget, init_db
 from db.dfm_reflect import Sales
-from contextlib import asynccontextmanager
 from controllers.auth_controller import router as auth_router
 from controllers.sales_controller import router as sales_router
 from controllers.budget_controller import router as budget_router
@@ -12,20 +12,24 @@ from controllers.admin_controller import router as admin_router
 from controllers.division_controller import router as division_router
 from controllers.gross_profit_controller import router as gross_profit_router
 from middlewares.auth_middleware import AuthMiddleware
+from services.bulkhead import BulkheadFullError
 from constants import ALLOWED_ORIGINS
 
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    # startup
-    from db.budget_models import init_db
+# Tables and schema migrations are applied by `python manage.py migrate` on
+# deploy, not here: every worker would run them, and some rebuild large tables
+app = FastAPI()
 
-    init_db()
-    yield
-    # shutdown
 
+@app.exception_handler(BulkheadFullError)
+async def bulkhead_full(request: Request, exc: BulkheadFullError):
+    # Saturated pool: fail fast so clients back off instead of queueing
+    return JSONResponse(
+        status_code=503,
+        content={"detail": f"Server busy ({exc.name}), please retry"},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
 
-app = FastAPI(lifespan=lifespan)
 
 # Add CORS middleware
 app.add_middleware(
@@ -34,6 +38,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Snapshot-Age"],
 )
 
 app.include_router(auth_router)
@@ -0,0 +1,88 @@
+"""
+Maintenance commands
+
+    python manage.py refresh-division-baseline
+    python manage.py refresh-gp-baseline
+    python manage.py migrate
+    python manage.py missing-indexes
+"""
+
+import argparse
+import json
+
+from sqlmodel import Session
+
+from db.core import engine
+
+
+def refresh_division_baseline(args: argparse.Namespace) -> None:
+    """Rebuild the 2025 division baseline snapshot tables"""
+    from db.budget_models import init_db
+    from services.division_service import DivisionService
+
+    init_db()
+    with Session(engine) as session:
+        result = DivisionService(session).refresh_baseline_snapshot()
+    print(json.dumps(result, indent=2))
+
+
+def refresh_gp_baseline(args: argparse.Namespace) -> None:
+    """Rebuild the 2025 GP baseline table"""
+    from db.budget_models import init_db
+    from services.gross_profit_service import GrossProfitService
+
+    init_db()
+    with Session(engine) as session:
+        result = GrossProfitService(session).refresh_gp_baseline()
+    print(json.dumps(result, indent=2))
+
+
+def migrate(args: argparse.Namespace) -> None:
+    """Create missing tables and apply pending schema migrations"""
+    from db.budget_models import init_db
+    from db.migrations import applied_versions
+
+    init_db()
+    print(json.dumps({"applied_versions": applied_versions(engine)}, indent=2))
+
+
+def missing_indexes(args: argparse.Namespace) -> None:
+    """Report expected indexes that do not exist; exits 1 if any are missing"""
+    from db.migrations import missing_indexes as find_missing_indexes
+
+    missing = find_missing_indexes(engine)
+    print(json.dumps(missing, indent=2))
+    if missing:
+        raise SystemExit(1)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="dfm-budget maintenance commands")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser(
+        "refresh-division-baseline",
+        help="rebuild the 2025 division baseline snapshot from raw sales",
+    ).set_defaults(func=refresh_division_baseline)
+
+    subparsers.add_parser(
+        "refresh-gp-baseline",
+        help="rebuild the 2025 GP baseline table from raw sales",
+    ).set_defaults(func=refresh_gp_baseline)
+
+    subparsers.add_parser(
+        "migrate",
+        help="create missing tables and apply pending index migrations",
+    ).set_defaults(func=migrate)
+
+    subparsers.add_parser(
+        "missing-indexes",
+        help="list expected indexes that are not present in the database",
+    ).set_defaults(func=missing_indexes)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,10 @@
-from fastapi import Request, HTTPException, status
-from starlette.middleware.base import BaseHTTPMiddleware
+from collections import OrderedDict
+from datetime import datetime, timezone
+from fastapi import status
 from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+from typing import Any, Dict, Optional, Tuple
+import hashlib
 import jwt
 from dotenv import load_dotenv
 import os
@@ -11,64 +15,137 @@ load_dotenv()
 
 SECRET_KEY = os.getenv("SECRET_KEY")
 
+# Verified tokens kept in memory; repeat requests skip the HMAC check
+TOKEN_CACHE_SIZE = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "1024"))
 
-class AuthMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app, excluded_paths: list = None):
-        super().__init__(app)
+
+class TokenCache:
+    """
+    Bounded LRU of verified token payloads, keyed by SHA-256 of the token
+    Entries are dropped once the token's exp has passed
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        # Only touched from the event loop, so no lock is needed
+        self._entries: "OrderedDict[str, Tuple[Dict[str, Any], Optional[float]]]" = (
+            OrderedDict()
+        )
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        """Cached payload, or None when not cached"""
+        key = self._key(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        payload, expires_at = entry
+        now = datetime.now(timezone.utc).timestamp()
+        if expires_at is not None and expires_at <= now:
+            del self._entries[key]
+            raise jwt.ExpiredSignatureError("Signature has expired")
+        self._entries.move_to_end(key)
+        return payload
+
+    def put(self, token: str, payload: Dict[str, Any]) -> None:
+        if self.max_size <= 0:
+            return
+        key = self._key(token)
+        exp = payload.get("exp")
+        self._entries[key] = (payload, float(exp) if exp is not None else None)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+
+class AuthMiddleware:
+    """
+    Plain ASGI middleware: checks the Bearer token and stores the user in
+    scope["state"] (request.state.user) without wrapping the response
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        excluded_paths: list = None,
+        cache_size: int = TOKEN_CACHE_SIZE,
+    ):
+        self.app = app
         self.excluded_paths = excluded_paths or [
             "/login",
             "/docs",
             "/openapi.json",
             "/redoc",
         ]
+        self.token_cache = TokenCache(cache_size)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-    async def dispatch(self, request: Request, call_next):
         # Skip authentication for excluded paths
-        if request.url.path in self.excluded_paths:
-            return await call_next(request)
+        if scope["path"] in self.excluded_paths:
+            await self.app(scope, receive, send)
+            return
 
         # Skip authentication for OPTIONS requests (CORS preflight)
-        if request.method == "OPTIONS":
-            return await call_next(request)
+        if scope["method"] == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
 
         # Get token from Authorization header
-        authorization = request.headers.get("Authorization")
+        authorization = self._header(scope, b"authorization")
         if not authorization or not authorization.startswith("Bearer "):
-            return JSONResponse(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                content={"detail": "Missing or invalid authorization header"},
-                headers={"WWW-Authenticate": "Bearer"},
+            await self._unauthorized(
+                "Missing or invalid authorization header", scope, receive, send
             )
+            return
 
         token = authorization.split(" ")[1]
 
         try:
-            # Verify token
-            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            # Verify token (once; later requests with it hit the cache)
+            payload = self.token_cache.get(token)
+            if payload is None:
+                payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+                self.token_cache.put(token, payload)
             username = payload.get("sub")
 
             if not username:
-                return JSONResponse(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    content={"detail": "Invalid token payload"},
-                    headers={"WWW-Authenticate": "Bearer"},
-                )
-
-            # Add user info to request state
-            request.state.user = {"username": username, "payload": payload}
+                await self._unauthorized("Invalid token payload", scope, receive, send)
+                return
 
         except jwt.ExpiredSignatureError:
-            return JSONResponse(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                content={"detail": "Token has expired"},
-                headers={"WWW-Authenticate": "Bearer"},
-            )
-        except jwt.JWTError:
-            return JSONResponse(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                content={"detail": "Invalid token"},
-                headers={"WWW-Authenticate": "Bearer"},
-            )
+            await self._unauthorized("Token has expired", scope, receive, send)
+            return
+        except jwt.InvalidTokenError:
+            await self._unauthorized("Invalid token", scope, receive, send)
+            return
+
+        # Add user info to request state
+        scope.setdefault("state", {})["user"] = {
+            "username": username,
+            "payload": payload,
+        }
+
+        await self.app(scope, receive, send)
+
+    @staticmethod
+    def _header(scope: Scope, name: bytes) -> Optional[str]:
+        for key, value in scope["headers"]:
+            if key == name:
+                return value.decode("latin-1")
+        return None
 
-        response = await call_next(request)
-        return response
+    @staticmethod
+    async def _unauthorized(detail: str, scope: Scope, receive: Receive, send: Send):
+        response = JSONResponse(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            content={"detail": detail},
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+        await response(scope, receive, send)
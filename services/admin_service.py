@@ -1,8 +1,15 @@
 from sqlmodel import Session, select, text
+from db.core import ReadOnlySession, readonly_engine
 from db.dfm_reflect import Users
-from db.budget_models import Budget
-from typing import List, Dict, Any
-from constants import SUPERADMIN, ADMIN
+from typing import List, Dict, Any, Optional
+from constants import SUPERADMIN, ADMIN, ADMIN_ROLES
+from services.auth_service import current_role
+from services.cache import BUDGET
+from services.request_memo import memoized
+from services.snapshot import Snapshot
+import os
+
+ADMIN_SUMMARY_MAX_AGE_SECONDS = float(os.getenv("ADMIN_SUMMARY_MAX_AGE", "300"))
 
 
 class AdminService:
@@ -27,6 +34,12 @@ class AdminService:
         salespeople_result = self.db.exec(salespeople_query)
         salespeople_data = [dict(row._mapping) for row in salespeople_result]
 
+        # Three grouped queries for everyone instead of four per salesperson
+        sales_by_salesperson = self._get_sales_data_by_salesperson()
+        budget_by_salesperson = self._get_budget_data_by_salesperson()
+        no_sales = self._sales_totals({}, {})
+        no_budget = {"q1_budget": 0, "q2_budget": 0, "q3_budget": 0, "q4_budget": 0}
+
         summary_data = []
 
         for salesperson in salespeople_data:
@@ -34,11 +47,11 @@ class AdminService:
             salesman_name = salesperson["salesman_name"]
             role = salesperson["role"] or "Unknown"
 
-            # Get sales data (Q1-Q3 from sales_budget_2026 table, Q4 from orders_budget_2026)
-            sales_data = self._get_salesperson_sales_data(salesman_no)
+            # Sales data (Q1-Q4 from sales_budget_2026 table, Q4 orders from orders_budget_2026)
+            sales_data = sales_by_salesperson.get(salesman_no, no_sales)
 
-            # Get budget data
-            budget_data = self._get_salesperson_budget_data(salesman_no)
+            # Budget data
+            budget_data = budget_by_salesperson.get(salesman_no, no_budget)
 
             # Calculate totals - convert to float to ensure consistent types with null safety
             total_sales = (
@@ -86,82 +99,71 @@ class AdminService:
 
         return summary_data
 
-    def _get_salesperson_sales_data(self, salesman_no: int) -> Dict[str, Any]:
-        """Get sales data for a specific salesperson"""
+    def _get_sales_data_by_salesperson(self) -> Dict[int, Dict[str, Any]]:
+        """
+        Get sales data for every salesperson
+        Returns dict keyed by salesperson -> q1-q4 sales, q4_orders, open_2026, zero % sales
+        """
 
         # Q1-Q4 sales from sales_budget_2026 table
         q1_q4_query = text(
-            f"""
+            """
             SELECT 
+                salesperson,
                 SUM(CASE WHEN period >= '2025-01-01' AND period < '2025-04-01' THEN COALESCE(ext_sales, 0) ELSE 0 END) as q1_sales,
                 SUM(CASE WHEN period >= '2025-04-01' AND period < '2025-07-01' THEN COALESCE(ext_sales, 0) ELSE 0 END) as q2_sales,
                 SUM(CASE WHEN period >= '2025-07-01' AND period < '2025-10-01' THEN COALESCE(ext_sales, 0) ELSE 0 END) as q3_sales,
                 SUM(CASE WHEN period >= '2025-10-01' AND period < '2026-01-01' THEN COALESCE(ext_sales, 0) ELSE 0 END) as q4_sales,
                 SUM(CASE WHEN zero_perc_sales = 'yes' THEN COALESCE(ext_sales, 0) ELSE 0 END) as zero_perc_sales_q1_q4
             FROM sales_budget_2026 
-            WHERE salesperson = {salesman_no}
-              AND period >= '2025-01-01' AND period < '2026-01-01'
-        """
-        )
-
-        q1_q4_result = self.db.exec(q1_q4_query).first()
-        q1_q4_data = (
-            dict(q1_q4_result._mapping)
-            if q1_q4_result
-            else {
-                "q1_sales": 0,
-                "q2_sales": 0,
-                "q3_sales": 0,
-                "q4_sales": 0,
-                "zero_perc_sales_q1_q4": 0,
-            }
-        )
-
-        # Q4 orders from orders_budget_2026 table
-        q4_orders_query = text(
-            f"""
-            SELECT 
-                SUM(COALESCE(ext_sales, 0)) as q4_orders,
-                SUM(CASE WHEN zero_perc_sales = 'yes' THEN COALESCE(ext_sales, 0) ELSE 0 END) as q4_orders_zero_perc_sales
-            FROM orders_budget_2026 
-            WHERE salesperson = {salesman_no}
-              AND requested_ship_date >= '2025-10-01' 
-              AND requested_ship_date < '2026-01-01'
+            WHERE period >= '2025-01-01' AND period < '2026-01-01'
+              AND salesperson IS NOT NULL
+            GROUP BY salesperson
         """
         )
+        q1_q4_data = {
+            row.salesperson: dict(row._mapping) for row in self.db.exec(q1_q4_query)
+        }
 
-        q4_orders_result = self.db.exec(q4_orders_query).first()
-        q4_orders_data = (
-            dict(q4_orders_result._mapping)
-            if q4_orders_result
-            else {"q4_orders": 0, "q4_orders_zero_perc_sales": 0}
-        )
-
-        # 2026 open orders
-        open_2026_query = text(
-            f"""
+        # Q4 orders and 2026 open orders from orders_budget_2026 table
+        orders_query = text(
+            """
             SELECT 
-                SUM(COALESCE(ext_sales, 0)) as open_2026
+                salesperson,
+                SUM(CASE WHEN requested_ship_date < '2026-01-01' THEN COALESCE(ext_sales, 0) ELSE 0 END) as q4_orders,
+                SUM(CASE WHEN requested_ship_date < '2026-01-01' AND zero_perc_sales = 'yes' THEN COALESCE(ext_sales, 0) ELSE 0 END) as q4_orders_zero_perc_sales,
+                SUM(CASE WHEN requested_ship_date >= '2026-01-01' THEN COALESCE(ext_sales, 0) ELSE 0 END) as open_2026
             FROM orders_budget_2026 
-            WHERE salesperson = {salesman_no}
-              AND requested_ship_date >= '2026-01-01' 
+            WHERE requested_ship_date >= '2025-10-01' 
               AND requested_ship_date < '2027-01-01'
+              AND salesperson IS NOT NULL
+            GROUP BY salesperson
         """
         )
+        orders_data = {
+            row.salesperson: dict(row._mapping) for row in self.db.exec(orders_query)
+        }
 
-        open_2026_result = self.db.exec(open_2026_query).first()
-        open_2026_data = (
-            dict(open_2026_result._mapping) if open_2026_result else {"open_2026": 0}
-        )
+        return {
+            salesman_no: self._sales_totals(
+                q1_q4_data.get(salesman_no, {}), orders_data.get(salesman_no, {})
+            )
+            for salesman_no in q1_q4_data.keys() | orders_data.keys()
+        }
 
+    @staticmethod
+    def _sales_totals(
+        q1_q4_data: Dict[str, Any], orders_data: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Combine one salesperson's sales and orders sums (missing sums count as 0)"""
         # Calculate totals with null safety
-        q1_sales = q1_q4_data["q1_sales"] or 0
-        q2_sales = q1_q4_data["q2_sales"] or 0
-        q3_sales = q1_q4_data["q3_sales"] or 0
-        q4_sales = q1_q4_data["q4_sales"] or 0
-        q4_orders = q4_orders_data["q4_orders"] or 0
-        zero_perc_q1_q4 = q1_q4_data["zero_perc_sales_q1_q4"] or 0
-        zero_perc_q4_orders = q4_orders_data["q4_orders_zero_perc_sales"] or 0
+        q1_sales = q1_q4_data.get("q1_sales") or 0
+        q2_sales = q1_q4_data.get("q2_sales") or 0
+        q3_sales = q1_q4_data.get("q3_sales") or 0
+        q4_sales = q1_q4_data.get("q4_sales") or 0
+        q4_orders = orders_data.get("q4_orders") or 0
+        zero_perc_q1_q4 = q1_q4_data.get("zero_perc_sales_q1_q4") or 0
+        zero_perc_q4_orders = orders_data.get("q4_orders_zero_perc_sales") or 0
 
         total_sales = q1_sales + q2_sales + q3_sales + q4_sales + q4_orders
         total_zero_perc_sales = zero_perc_q1_q4 + zero_perc_q4_orders
@@ -175,38 +177,76 @@ class AdminService:
             "q3_sales": float(q3_sales),
             "q4_sales": float(q4_sales),
             "q4_orders": float(q4_orders),
-            "open_2026": float(open_2026_data["open_2026"] or 0),
+            "open_2026": float(orders_data.get("open_2026") or 0),
             "zero_perc_sales": float(total_zero_perc_sales),
             "zero_perc_sales_percent": round(float(zero_perc_sales_percent), 2),
         }
 
-    def _get_salesperson_budget_data(self, salesman_no: int) -> Dict[str, Any]:
-        """Get budget data for a specific salesperson"""
+    def _get_budget_data_by_salesperson(self) -> Dict[int, Dict[str, Any]]:
+        """
+        Get budget totals for every salesperson
+        Returns dict keyed by salesperson_id -> q1_budget..q4_budget
+        """
+        query = text(
+            """
+            SELECT
+                salesperson_id,
+                SUM(COALESCE(quarter_1_sales, 0)) as q1_budget,
+                SUM(COALESCE(quarter_2_sales, 0)) as q2_budget,
+                SUM(COALESCE(quarter_3_sales, 0)) as q3_budget,
+                SUM(COALESCE(quarter_4_sales, 0)) as q4_budget
+            FROM budget_2026
+            GROUP BY salesperson_id
+        """
+        )
 
-        # Use ORM approach like the existing budget service
-        query = select(Budget).where(Budget.salesperson_id == salesman_no)
-        budgets = self.db.exec(query).all()
+        return {
+            row.salesperson_id: {
+                "q1_budget": float(row.q1_budget),
+                "q2_budget": float(row.q2_budget),
+                "q3_budget": float(row.q3_budget),
+                "q4_budget": float(row.q4_budget),
+            }
+            for row in self.db.exec(query)
+        }
 
-        if not budgets:
-            return {"q1_budget": 0, "q2_budget": 0, "q3_budget": 0, "q4_budget": 0}
+    def is_admin(self, username: str, claims: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        Check if user is an admin (salesman_id = 0 or null)
+        Decided from the token's role claim when there is one, re-checked against
+        users at most AUTH_ROLE_RECHECK_SECONDS after the last check
+        """
+        role = (claims or {}).get("role")
+        if role is None:
+            # Tokens issued before role claims
+            return self._is_admin_in_db(username)
 
-        # Sum up all budget entries for this salesperson with null safety
-        q1_budget = sum(budget.quarter_1_sales or 0 for budget in budgets)
-        q2_budget = sum(budget.quarter_2_sales or 0 for budget in budgets)
-        q3_budget = sum(budget.quarter_3_sales or 0 for budget in budgets)
-        q4_budget = sum(budget.quarter_4_sales or 0 for budget in budgets)
+        if current_role(username, self.db) != role:
+            # Role changed or user removed since the token was issued
+            return False
 
-        return {
-            "q1_budget": float(q1_budget),
-            "q2_budget": float(q2_budget),
-            "q3_budget": float(q3_budget),
-            "q4_budget": float(q4_budget),
-        }
+        return role in ADMIN_ROLES
 
-    def is_admin(self, username: str) -> bool:
-        """Check if user is an admin (salesman_id = 0 or null)"""
+    @memoized
+    def _is_admin_in_db(self, username: str) -> bool:
         user = self.db.exec(select(Users).where(Users.username == username)).first()
         if not user:
             return False
 
         return user.salesman_id == SUPERADMIN or user.salesman_id is ADMIN
+
+
+def _compute_admin_summary() -> List[Dict[str, Any]]:
+    # Runs on the refresh thread, so it gets its own session
+    with ReadOnlySession(readonly_engine) as session:
+        return AdminService(session).get_admin_summary()
+
+
+# Served to every admin; refreshed in the background every
+# ADMIN_SUMMARY_MAX_AGE seconds and after budget writes in this process
+admin_summary_snapshot = Snapshot(
+    "admin-summary",
+    _compute_admin_summary,
+    ADMIN_SUMMARY_MAX_AGE_SECONDS,
+    pieces=(BUDGET,),
+)
@@ -0,0 +1,43 @@
+"""
+Awaitable access to the synchronous services
+
+The services are written against a sync SQLModel Session. AsyncSession.run_sync
+hands them the session underneath an AsyncSession: their code runs unchanged,
+but every query they send goes through the async driver, and the event loop
+serves other requests while it waits on MySQL.
+
+    sales_service = AsyncServiceProxy(SalesService, db)
+    sales_data = await sales_service.get_sales_data(username)
+
+Every call made through proxies on the same AsyncSession shares one sync
+session, so @memoized lookups are still shared across services in a request.
+Python-side work (row building, NumPy) still runs on the event loop thread.
+That includes cache.cached computes, which is why a miss reached through a
+proxy never waits on another request's compute of the same key.
+"""
+
+from typing import Any, Awaitable, Callable, Generic, Type, TypeVar
+
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+ServiceT = TypeVar("ServiceT")
+
+
+class AsyncServiceProxy(Generic[ServiceT]):
+    def __init__(self, service_class: Type[ServiceT], db: AsyncSession):
+        self.service_class = service_class
+        self.db = db
+
+    def __getattr__(self, name: str) -> Callable[..., Awaitable[Any]]:
+        # Fails here, not when awaited, for methods the service doesn't have
+        getattr(self.service_class, name)
+
+        async def call(*args, **kwargs):
+            def run(session: Session):
+                return getattr(self.service_class(session), name)(*args, **kwargs)
+
+            return await self.db.run_sync(run)
+
+        call.__name__ = name
+        return call
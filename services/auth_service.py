@@ -1,9 +1,23 @@
 from datetime import timedelta, datetime, timezone
 import jwt
 import bcrypt
-from sqlmodel import Session
+import logging
+import threading
+import time
+from sqlalchemy import update
+from sqlmodel import Session, select
+from db.core import engine
 from db.dfm_reflect import Users
-from constants import ALGORITHM
+from services.bulkhead import Bulkhead
+from typing import Any, Dict, Optional, Tuple
+from constants import (
+    ALGORITHM,
+    SUPERADMIN,
+    ADMIN,
+    ROLE_SUPERADMIN,
+    ROLE_ADMIN,
+    ROLE_SALESPERSON,
+)
 from dotenv import load_dotenv
 import os
 
@@ -11,6 +25,47 @@ load_dotenv()
 
 SECRET_KEY = os.getenv("SECRET_KEY")
 
+logger = logging.getLogger(__name__)
+
+# bcrypt work factor for stored hashes; others are rehashed on next login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+# /login runs on its own small pool (bcrypt and its lookups stay off the event
+# loop). At most AUTH_LOGIN_WORKERS run at once and AUTH_LOGIN_QUEUE more wait;
+# beyond that logins are turned away instead of piling up
+LOGIN = Bulkhead(
+    "login",
+    workers=int(os.getenv("AUTH_LOGIN_WORKERS", "4")),
+    queue=int(os.getenv("AUTH_LOGIN_QUEUE", "32")),
+)
+
+# How long a token's role claim is trusted before it is re-checked against
+# users, so a revoked admin loses access within this many seconds instead of
+# when their (30-day) token expires. 0 re-checks on every admin request
+ROLE_RECHECK_SECONDS = float(os.getenv("AUTH_ROLE_RECHECK_SECONDS", "300"))
+
+# username -> (checked_at, role as stored then, None if the user is gone)
+_checked_roles: Dict[str, Tuple[float, Optional[str]]] = {}
+_checked_roles_lock = threading.Lock()
+
+
+def user_role(salesman_id: Optional[int]) -> str:
+    """Role name for a users.salesman_id (0 = superadmin, NULL = admin)"""
+    if salesman_id == SUPERADMIN:
+        return ROLE_SUPERADMIN
+    if salesman_id is ADMIN:
+        return ROLE_ADMIN
+    return ROLE_SALESPERSON
+
+
+def token_claims(user: Users) -> Dict[str, Any]:
+    """Claims signed into the access token so requests can be authorized without a lookup"""
+    return {
+        "sub": user.username,
+        "role": user_role(user.salesman_id),
+        "salesman_id": user.salesman_id,
+    }
+
 
 def create_access_token(data: dict, expires_delta: timedelta | None = None) -> str:
     """Create a JWT access token"""
@@ -24,8 +79,6 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None) -> s
 
 
 def authenticate_user(username: str, password: str, db: Session) -> Users | None:
-    from sqlmodel import select
-
     user = db.exec(select(Users).where(Users.username == username)).first()
     if not user:
         return None
@@ -33,4 +86,52 @@ def authenticate_user(username: str, password: str, db: Session) -> Users | None
         password.encode("utf-8"), user.hashed_password.encode("utf-8")
     ):
         return None
+    # An unreadable cost is left alone rather than rehashed on every login
+    rounds = _bcrypt_rounds(user.hashed_password)
+    if rounds is not None and rounds != BCRYPT_ROUNDS:
+        _rehash_password(user.username, password)
     return user
+
+
+def _bcrypt_rounds(hashed_password: str) -> int | None:
+    # $2b$12$<salt+hash>
+    try:
+        return int(hashed_password.split("$")[2])
+    except (IndexError, ValueError):
+        return None
+
+
+def _rehash_password(username: str, password: str) -> None:
+    """Store the password again at BCRYPT_ROUNDS; a failure only means retrying next login"""
+    hashed_password = bcrypt.hashpw(
+        password.encode("utf-8"), bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
+    ).decode("utf-8")
+    try:
+        # Own session: login itself runs on a read-only one
+        with Session(engine) as session:
+            session.exec(
+                update(Users)
+                .where(Users.username == username)
+                .values(hashed_password=hashed_password)
+            )
+            session.commit()
+    except Exception:
+        logger.exception("Rehashing the password for %s failed", username)
+
+
+def current_role(username: str, db: Session) -> Optional[str]:
+    """
+    The user's role as stored in users, None if the user no longer exists
+    Looked up at most once every ROLE_RECHECK_SECONDS per username
+    """
+    now = time.monotonic()
+    with _checked_roles_lock:
+        checked = _checked_roles.get(username)
+    if checked and now - checked[0] < ROLE_RECHECK_SECONDS:
+        return checked[1]
+
+    user = db.exec(select(Users).where(Users.username == username)).first()
+    role = user_role(user.salesman_id) if user else None
+    with _checked_roles_lock:
+        _checked_roles[username] = (now, role)
+    return role
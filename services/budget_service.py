@@ -1,12 +1,16 @@
 from sqlmodel import Session, select, text
 from typing import List, Dict, Any, Optional
 from db.budget_models import Budget
+from services import cache
+from services.cache import BUDGET
+from services.request_memo import memoized
 
 
 class BudgetService:
     def __init__(self, db: Session):
         self.db = db
 
+    @memoized
     def get_budgets_by_salesperson(self, salesperson_id: int) -> List[Dict[str, Any]]:
         """Get all budgets for a specific salesperson"""
         query = select(Budget).where(Budget.salesperson_id == salesperson_id)
@@ -39,6 +43,7 @@ class BudgetService:
         budget = Budget(**budget_data)
         self.db.add(budget)
         self.db.commit()
+        cache.bump(BUDGET)
         self.db.refresh(budget)
         return budget
 
@@ -55,6 +60,7 @@ class BudgetService:
                 setattr(budget, key, value)
 
         self.db.commit()
+        cache.bump(BUDGET)
         self.db.refresh(budget)
         return budget
 
@@ -66,6 +72,7 @@ class BudgetService:
 
         self.db.delete(budget)
         self.db.commit()
+        cache.bump(BUDGET)
         return True
 
     def generate_budget_from_sales(
@@ -95,6 +102,19 @@ class BudgetService:
 
         return budgets
 
+    def save_budgets(self, budgets: List[Budget]) -> List[Budget]:
+        """Persist generated budget entries and refresh them to get IDs"""
+        for budget in budgets:
+            self.db.add(budget)
+
+        self.db.commit()
+        cache.bump(BUDGET)
+
+        for budget in budgets:
+            self.db.refresh(budget)
+
+        return budgets
+
     def get_budget_summary(self, salesperson_id: int) -> Dict[str, Any]:
         """Get budget summary for a salesperson"""
         budgets = self.get_budgets_by_salesperson(salesperson_id)
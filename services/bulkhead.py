@@ -0,0 +1,130 @@
+"""
+Bulkheads: separate bounded thread pools per kind of work
+
+Each Bulkhead owns a fixed number of worker threads and a fixed number of
+queue slots. Work beyond that is refused with BulkheadFullError (answered as
+503 + Retry-After in main.py) instead of waiting behind everything else, so a
+burst on one pool never delays requests served by another.
+
+Endpoints opt in with @bulkhead(HEAVY) / @bulkhead(LIGHT) under the route
+decorator; the endpoint itself is a plain sync function and runs on the pool.
+A streaming body is wrapped in pool.stream() so each piece is computed there too.
+"""
+
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+from typing import Any, AsyncIterator, Callable, Iterator
+
+
+class BulkheadFullError(Exception):
+    """Every worker and queue slot of a bulkhead is taken"""
+
+    def __init__(self, name: str, retry_after: int):
+        super().__init__(f"{name} pool is saturated")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class Bulkhead:
+    def __init__(self, name: str, workers: int, queue: int, retry_after: int = 1):
+        self.name = name
+        self.workers = workers
+        self.queue = queue
+        self.retry_after = retry_after
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix=f"bulkhead-{name}"
+        )
+        self._slots = threading.BoundedSemaphore(workers + queue)
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """
+        fn(*args, **kwargs) on this pool
+        Raises BulkheadFullError right away when the pool and its queue are full
+        """
+        if not self._slots.acquire(blocking=False):
+            raise BulkheadFullError(self.name, self.retry_after)
+        try:
+            future = self._executor.submit(fn, *args, **kwargs)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return await asyncio.wrap_future(future)
+
+    def stream(self, items: Iterator[Any]) -> AsyncIterator[Any]:
+        """
+        Async iterator that pulls each of items on this pool, one at a time
+        One slot is taken right away (BulkheadFullError if there is none) and held
+        until items is exhausted, fails, or the iterator is abandoned
+        """
+        if not self._slots.acquire(blocking=False):
+            raise BulkheadFullError(self.name, self.retry_after)
+        return _PoolStream(self, items)
+
+
+_DONE = object()
+
+
+class _PoolStream:
+    def __init__(self, pool: Bulkhead, items: Iterator[Any]):
+        self.pool = pool
+        self.items = items
+        self._holding = True
+
+    def __aiter__(self) -> "_PoolStream":
+        return self
+
+    async def __anext__(self) -> Any:
+        if not self._holding:
+            raise StopAsyncIteration
+        try:
+            future = self.pool._executor.submit(next, self.items, _DONE)
+            item = await asyncio.wrap_future(future)
+        except BaseException:
+            # Also a client that went away (the await is cancelled)
+            self.release()
+            raise
+        if item is _DONE:
+            self.release()
+            raise StopAsyncIteration
+        return item
+
+    def release(self) -> None:
+        if self._holding:
+            self._holding = False
+            self.pool._slots.release()
+
+    def __del__(self):
+        self.release()
+
+
+def bulkhead(pool: Bulkhead) -> Callable[[Callable], Callable]:
+    """Run a sync endpoint on pool; FastAPI still sees its original signature"""
+
+    def decorate(endpoint: Callable) -> Callable:
+        @wraps(endpoint)
+        async def run_on_pool(*args, **kwargs):
+            return await pool.run(endpoint, *args, **kwargs)
+
+        return run_on_pool
+
+    return decorate
+
+
+# Seconds-long analytics (division allocations, GP, admin summary)
+HEAVY = Bulkhead(
+    "heavy",
+    workers=int(os.getenv("BULKHEAD_HEAVY_WORKERS", "4")),
+    queue=int(os.getenv("BULKHEAD_HEAVY_QUEUE", "8")),
+    retry_after=5,
+)
+
+# Millisecond CRUD (budget edits)
+LIGHT = Bulkhead(
+    "light",
+    workers=int(os.getenv("BULKHEAD_LIGHT_WORKERS", "8")),
+    queue=int(os.getenv("BULKHEAD_LIGHT_QUEUE", "64")),
+)
@@ -0,0 +1,124 @@
+"""
+In-process cache for derived data, keyed on data versions
+
+Every cached value declares which pieces of source data it was computed from
+("sales", "budget", "overrides", "divisions"). Writers call bump() for the
+pieces they changed; entries built from an older version of any of their
+pieces are recomputed on next access, everything else stays warm.
+
+Versions live in this process only. Writes made by another worker or outside
+the app are picked up once an entry is older than DATA_CACHE_TTL seconds.
+Keys can come from request parameters, so at most DATA_CACHE_MAX_ENTRIES
+values are kept and the least recently used one is dropped beyond that.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Tuple
+
+SALES = "sales"
+BUDGET = "budget"
+OVERRIDES = "overrides"
+DIVISIONS = "divisions"
+
+CACHE_TTL_SECONDS = int(os.getenv("DATA_CACHE_TTL", "3600"))
+CACHE_MAX_ENTRIES = int(os.getenv("DATA_CACHE_MAX_ENTRIES", "1024"))
+
+_versions: Dict[str, int] = {}
+_entries: "OrderedDict[Hashable, Tuple[Tuple[int, ...], float, Any]]" = OrderedDict()
+# Only held while a key is being computed
+_key_locks: Dict[Hashable, threading.Lock] = {}
+_bump_listeners: List[Callable[[Tuple[str, ...]], None]] = []
+_lock = threading.Lock()
+
+
+def data_version(*pieces: str) -> Tuple[int, ...]:
+    """Current version of each piece, in the given order"""
+    with _lock:
+        return tuple(_versions.get(piece, 0) for piece in pieces)
+
+
+def bump(*pieces: str) -> None:
+    """Mark pieces of source data as changed"""
+    with _lock:
+        for piece in pieces:
+            _versions[piece] = _versions.get(piece, 0) + 1
+        listeners = list(_bump_listeners)
+    for listener in listeners:
+        listener(pieces)
+
+
+def on_bump(listener: Callable[[Tuple[str, ...]], None]) -> None:
+    """Call listener(pieces) after every bump; it runs on the writer's thread, so keep it cheap"""
+    with _lock:
+        _bump_listeners.append(listener)
+
+
+def _lookup(key: Hashable, version: Tuple[int, ...]) -> Tuple[bool, Any]:
+    with _lock:
+        entry = _entries.get(key)
+        if entry is None:
+            return False, None
+        entry_version, stored_at, value = entry
+        if entry_version != version or time.monotonic() - stored_at > CACHE_TTL_SECONDS:
+            return False, None
+        _entries.move_to_end(key)
+    return True, value
+
+
+def _on_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+def cached(key: Hashable, pieces: Tuple[str, ...], compute: Callable[[], Any]) -> Any:
+    """
+    Return the value cached under key, computing it when any of its pieces changed
+    Concurrent misses on the same key wait for a single compute, except on an
+    event loop thread, where they compute it themselves instead of blocking
+    """
+    hit, value = _lookup(key, data_version(*pieces))
+    if hit:
+        return value
+
+    with _lock:
+        key_lock = _key_locks.setdefault(key, threading.Lock())
+
+    # AsyncSession.run_sync runs compute in a greenlet on the event loop thread and
+    # suspends it on every query; waiting for the lock there would block the loop,
+    # and with it the compute being waited for, so a busy key is computed again
+    single_flight = key_lock.acquire(blocking=not _on_event_loop())
+    try:
+        # Another request may have filled it while we waited
+        version = data_version(*pieces)
+        hit, value = _lookup(key, version)
+        if hit:
+            return value
+
+        # Version is taken before computing so a write during compute invalidates the result
+        value = compute()
+        with _lock:
+            _entries[key] = (version, time.monotonic(), value)
+            _entries.move_to_end(key)
+            while len(_entries) > CACHE_MAX_ENTRIES:
+                _entries.popitem(last=False)
+        return value
+    finally:
+        if single_flight:
+            key_lock.release()
+            # Waiters still holding this lock re-check the entry; later misses get a new lock
+            with _lock:
+                if _key_locks.get(key) is key_lock:
+                    del _key_locks[key]
+
+
+def clear() -> None:
+    """Drop every cached value"""
+    with _lock:
+        _entries.clear()
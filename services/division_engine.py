@@ -0,0 +1,628 @@
+"""
+Columnar (NumPy) implementation of the division allocation pipeline.
+
+DivisionService builds the same result with Python lists of dicts. Here the
+2025 sales lines, the collapsed budget and the division master are held as
+parallel arrays, string dimensions are integer-coded in first-appearance
+order, and every grouped aggregate is a np.bincount. bincount accumulates in
+input order, so sums come out bit-for-bit identical to the dict pipeline, and
+rounding reproduces Python's round() (see round_half_even_like_python).
+"""
+
+import numpy as np
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
+
+QUARTERS = ("q1", "q2", "q3", "q4")
+
+
+def factorize(values: Iterable[Any]) -> Tuple[np.ndarray, List[Any]]:
+    """
+    Integer-code hashable values in first-appearance order
+    Returns (codes, uniques) where uniques[codes[i]] == values[i]
+    """
+    values = list(values)
+    uniques = list(dict.fromkeys(values))
+    lookup = {value: i for i, value in enumerate(uniques)}
+    codes = np.fromiter(
+        map(lookup.__getitem__, values), dtype=np.int64, count=len(values)
+    )
+    return codes, uniques
+
+
+def factorize_columns(*columns: List[Any]) -> Tuple[np.ndarray, List[tuple]]:
+    """
+    Integer-code composite keys (one value per column) in first-appearance order
+    Each column is coded on its own and the codes are combined arithmetically,
+    so no per-row tuple is built
+    Returns (codes, keys) where keys[codes[i]] == tuple(column[i] for column in columns)
+    """
+    n_rows = len(columns[0])
+    combined = np.zeros(n_rows, dtype=np.int64)
+    uniques = []
+    for column in columns:
+        codes, column_uniques = factorize(column)
+        combined = combined * max(len(column_uniques), 1) + codes
+        uniques.append((codes, column_uniques))
+    _, first_rows, inverse = np.unique(combined, return_index=True, return_inverse=True)
+    order = np.argsort(first_rows, kind="stable")
+    rank = np.empty_like(order)
+    rank[order] = np.arange(order.size)
+    key_rows = first_rows[order]
+    keys = list(
+        zip(
+            *(
+                [column_uniques[c] for c in codes[key_rows].tolist()]
+                for codes, column_uniques in uniques
+            )
+        )
+    )
+    return rank[inverse.reshape(-1)], keys
+
+
+def to_float_array(values: Iterable[Any]) -> np.ndarray:
+    """Convert DB numerics to float64 with the same NULL/zero handling as the dict path"""
+    array = np.array(list(values), dtype=np.float64)
+    array[np.isnan(array) | (array == 0)] = 0.0
+    return array
+
+
+def period_quarters(periods: Iterable[Any]) -> np.ndarray:
+    """
+    Map 2025 period dates (date objects or 'YYYY-MM-DD' strings) to quarter
+    index 0-3, or -1 when the period falls outside 2025
+    """
+    # Only a few hundred distinct periods exist, so convert those and broadcast back
+    codes, uniques = factorize(periods)
+    months = np.array(uniques, dtype="datetime64[M]").astype(np.int64)
+    in_2025 = (months // 12 + 1970) == 2025
+    return np.where(in_2025, (months % 12) // 3, -1)[codes]
+
+
+def round_half_even_like_python(values: np.ndarray, ndigits: int) -> np.ndarray:
+    """
+    Vectorized equivalent of Python's round(x, ndigits)
+    np.round only differs from the correctly-rounded builtin when x * 10**ndigits
+    lands next to a .5 boundary, so those few values go through round() itself
+    """
+    values = np.asarray(values, dtype=np.float64)
+    with np.errstate(invalid="ignore"):
+        scaled = values * 10.0**ndigits
+        rounded = np.round(values, ndigits)
+        near_half = np.abs(scaled - np.floor(scaled) - 0.5) <= np.maximum(
+            1e-6, np.abs(scaled) * 1e-15
+        )
+    for i in np.flatnonzero(near_half).tolist():
+        rounded.flat[i] = round(float(values.flat[i]), ndigits)
+    return rounded
+
+
+def _truthy(values: np.ndarray) -> np.ndarray:
+    """Vectorized `bool(x)` for floats where NaN stands for None"""
+    return ~np.isnan(values) & (values != 0)
+
+
+class DivisionBaseline:
+    """
+    2025 history per (group_key, customer_class, item_division): total sales,
+    normalized division ratio, quarterly sales and GP%, plus per-division
+    totals used for the default ratios
+    """
+
+    def __init__(
+        self,
+        keys: List[Tuple[Any, Any, Any]],
+        total_sales: np.ndarray,
+        ratios: np.ndarray,
+        pair_keys: List[Tuple[Any, Any]],
+        key_pairs: np.ndarray,
+        pair_totals: np.ndarray,
+        has_gp: np.ndarray,
+        quarter_sales: np.ndarray,
+        quarter_gp_percent: np.ndarray,
+        full_year_gp_percent: np.ndarray,
+        division_totals: Dict[Any, float],
+    ):
+        self.keys = keys
+        self.total_sales = total_sales
+        self.ratios = ratios
+        self.pair_keys = pair_keys
+        self.key_pairs = key_pairs
+        self.pair_totals = pair_totals
+        self.has_gp = has_gp
+        self.quarter_sales = quarter_sales
+        self.quarter_gp_percent = quarter_gp_percent
+        self.full_year_gp_percent = full_year_gp_percent
+        self.division_totals = division_totals
+        self.pair_index = {pair: i for i, pair in enumerate(pair_keys)}
+
+    @classmethod
+    def from_sales(
+        cls,
+        group_keys: List[Any],
+        customer_classes: List[Any],
+        item_divisions: List[Any],
+        ext_sales: np.ndarray,
+        ext_cost: np.ndarray,
+        quarters: np.ndarray,
+    ) -> "DivisionBaseline":
+        """
+        Build the baseline from normalized sales columns
+        (equivalent of DivisionService steps 2-6, 10, 12 and 15)
+        """
+        rows = np.flatnonzero(
+            np.fromiter(
+                (gk is not None for gk in group_keys), dtype=bool, count=len(group_keys)
+            )
+        )
+        take = rows.tolist()
+        codes, keys = factorize_columns(
+            [group_keys[i] for i in take],
+            [customer_classes[i] for i in take],
+            [item_divisions[i] for i in take],
+        )
+        n_keys = len(keys)
+        sales = ext_sales[rows]
+        cost = ext_cost[rows]
+        quarters = quarters[rows]
+
+        # Grouped sales and group totals
+        total_sales = np.bincount(codes, weights=sales, minlength=n_keys)
+        key_pairs, pair_keys = factorize((gk, cc) for gk, cc, _ in keys)
+        pair_totals = np.bincount(
+            key_pairs, weights=total_sales, minlength=len(pair_keys)
+        )
+
+        # Raw ratios (keys are already unique, so the MAX dedupe is a no-op) then normalize
+        group_total = pair_totals[key_pairs]
+        raw = np.divide(
+            total_sales, group_total, out=np.zeros(n_keys), where=group_total != 0
+        )
+        ratio_sums = np.bincount(key_pairs, weights=raw, minlength=len(pair_keys))[
+            key_pairs
+        ]
+        ratios = np.divide(raw, ratio_sums, out=np.zeros(n_keys), where=ratio_sums > 0)
+
+        # Overall division totals, in first-appearance order like the dict path
+        division_codes, division_keys = factorize(d for _, _, d in keys)
+        division_sums = np.bincount(
+            division_codes, weights=total_sales, minlength=len(division_keys)
+        )
+        division_totals = dict(zip(division_keys, division_sums.tolist()))
+
+        # Quarterly sales/cost and GP%
+        in_year = quarters >= 0
+        slot = codes[in_year] * 4 + quarters[in_year]
+        quarter_sales = np.bincount(
+            slot, weights=sales[in_year], minlength=n_keys * 4
+        ).reshape(n_keys, 4)
+        quarter_cost = np.bincount(
+            slot, weights=cost[in_year], minlength=n_keys * 4
+        ).reshape(n_keys, 4)
+        has_gp = np.bincount(codes[in_year], minlength=n_keys) > 0
+
+        return cls(
+            keys,
+            total_sales,
+            ratios,
+            pair_keys,
+            key_pairs,
+            pair_totals,
+            has_gp,
+            quarter_sales,
+            *cls._gp_percentages(quarter_sales, quarter_cost),
+            division_totals,
+        )
+
+    @classmethod
+    def from_snapshot(
+        cls,
+        group_rows: List[Any],
+        division_rows: List[Any],
+        division_totals: Dict[Any, float],
+    ) -> "DivisionBaseline":
+        """
+        Build the baseline from the division_*_baseline_2025 snapshot rows
+        (equivalent of DivisionService._baseline_from_snapshot_rows)
+        """
+        group_totals = {
+            (row.group_key, row.customer_class): row.total_sales for row in group_rows
+        }
+        # Later rows win on duplicate keys, like the dict lookups
+        rows_by_key = {
+            (row.group_key, row.customer_class, row.item_division): row
+            for row in division_rows
+        }
+        keys = list(rows_by_key)
+        rows = list(rows_by_key.values())
+        pair_keys = list(
+            dict.fromkeys(list(group_totals) + [(gk, cc) for gk, cc, _ in keys])
+        )
+        pair_index = {pair: i for i, pair in enumerate(pair_keys)}
+        key_pairs = np.array(
+            [pair_index[(gk, cc)] for gk, cc, _ in keys], dtype=np.int64
+        )
+
+        def column(name: str) -> np.ndarray:
+            # NULL GP% becomes NaN, the engine's None
+            return np.array([getattr(row, name) for row in rows], dtype=np.float64)
+
+        return cls(
+            keys,
+            column("total_sales"),
+            column("division_ratio_2025"),
+            pair_keys,
+            key_pairs,
+            np.array(
+                [group_totals.get(pair, 0.0) for pair in pair_keys], dtype=np.float64
+            ),
+            # Every snapshot row carries GP data (possibly all NULL)
+            np.ones(len(keys), dtype=bool),
+            np.stack([column(f"{q}_sales") for q in QUARTERS], axis=1),
+            np.stack([column(f"{q}_gp_percent") for q in QUARTERS], axis=1),
+            column("full_year_gp_percent"),
+            dict(division_totals),
+        )
+
+    @staticmethod
+    def _gp_percentages(
+        quarter_sales: np.ndarray, quarter_cost: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Quarterly GP% with full-year fallback, NaN where the dict path returns None"""
+        year_sales = (
+            quarter_sales[:, 0]
+            + quarter_sales[:, 1]
+            + quarter_sales[:, 2]
+            + quarter_sales[:, 3]
+        )
+        year_cost = (
+            quarter_cost[:, 0]
+            + quarter_cost[:, 1]
+            + quarter_cost[:, 2]
+            + quarter_cost[:, 3]
+        )
+        with np.errstate(divide="ignore", invalid="ignore"):
+            full_year = np.where(year_sales > 0, 1 - (year_cost / year_sales), np.nan)
+            quarterly = np.where(
+                quarter_sales > 0,
+                1 - (quarter_cost / quarter_sales),
+                full_year[:, None],
+            )
+        full_year = round_half_even_like_python(full_year, 6)
+        quarterly = round_half_even_like_python(quarterly, 6)
+        return quarterly, full_year
+
+    def default_ratios(self, div_nos: List[Any]) -> np.ndarray:
+        """Overall division ratios (default for groups with no history), aligned to div_nos"""
+        grand_total = sum(self.division_totals.values())
+        return np.array(
+            [
+                (
+                    self.division_totals.get(div_no, 0.0) / grand_total
+                    if grand_total > 0
+                    else 0.0
+                )
+                for div_no in div_nos
+            ],
+            dtype=np.float64,
+        )
+
+
+def collapse_budget(budget_norm: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Collapse budget per salesperson + group_key with bincount sums
+    Returns the same dicts as DivisionService._get_collapsed_budget
+    """
+    codes, keys = factorize(
+        (
+            b["salesperson_id"],
+            b["salesperson_name"],
+            b["customer_class"],
+            b["group_key"],
+        )
+        for b in budget_norm
+    )
+    totals = [
+        np.bincount(
+            codes,
+            weights=np.fromiter(
+                (b[f"quarter_{q}_sales"] for b in budget_norm), dtype=np.float64
+            ),
+            minlength=len(keys),
+        ).tolist()
+        for q in range(1, 5)
+    ]
+    brands: List[Optional[str]] = [None] * len(keys)
+    for code, budget in zip(codes.tolist(), budget_norm):
+        brand = budget["brand"]
+        # Keep MAX brand
+        if brand and (not brands[code] or brand > brands[code]):
+            brands[code] = brand
+    return [
+        {
+            "salesperson_id": key[0],
+            "salesperson_name": key[1],
+            "customer_class": key[2],
+            "group_key": key[3],
+            "brand": brands[i],
+            "q1_total": totals[0][i],
+            "q2_total": totals[1][i],
+            "q3_total": totals[2][i],
+            "q4_total": totals[3][i],
+        }
+        for i, key in enumerate(keys)
+    ]
+
+
+class DivisionAllocations:
+    """
+    Group x division allocation grid: one row per (budget or sales-only group,
+    division), computed as (groups, divisions) arrays
+    """
+
+    def __init__(
+        self,
+        baseline: DivisionBaseline,
+        collapsed_budget: List[Dict[str, Any]],
+        sales_only_groups: List[Dict[str, Any]],
+        divisions: List[Dict[str, Any]],
+        ratio_overrides: Dict[tuple, float],
+    ):
+        self.baseline = baseline
+        self.groups = collapsed_budget + sales_only_groups
+        self.divisions = divisions
+        n_groups, n_divs = len(self.groups), len(divisions)
+        n_budget = len(collapsed_budget)
+        self.has_budget = np.arange(n_groups) < n_budget
+
+        div_nos = [d["div_no"] for d in divisions]
+        div_col = {div_no: i for i, div_no in enumerate(div_nos)}
+
+        # Dense (pair, division) lookups; an extra all-empty row serves groups without history
+        n_pairs = len(baseline.pair_keys)
+        ratio_grid = np.zeros((n_pairs + 1, n_divs))
+        key_grid = np.full((n_pairs + 1, n_divs), -1, dtype=np.int64)
+        for k, (_, _, div_no) in enumerate(baseline.keys):
+            col = div_col.get(div_no)
+            if col is not None:
+                pair = baseline.key_pairs[k]
+                ratio_grid[pair, col] = baseline.ratios[k]
+                key_grid[pair, col] = k
+        pair_totals = np.append(baseline.pair_totals, 0.0)
+
+        group_pairs = np.fromiter(
+            (
+                baseline.pair_index.get((g["group_key"], g["customer_class"]), n_pairs)
+                for g in self.groups
+            ),
+            dtype=np.int64,
+            count=n_groups,
+        )
+        no_history = pair_totals[group_pairs] == 0
+
+        # Ratios: custom override -> 2025 group ratio -> company-wide default
+        default_ratios = baseline.default_ratios(div_nos)
+        self.division_ratio_2025 = np.where(
+            no_history[:, None], default_ratios[None, :], ratio_grid[group_pairs]
+        )
+        overrides = np.full((n_groups, n_divs), np.nan)
+        budget_rows: Dict[tuple, List[int]] = {}
+        for i, b in enumerate(collapsed_budget):
+            budget_rows.setdefault(
+                (b["salesperson_id"], b["customer_class"], b["group_key"]), []
+            ).append(i)
+        for (sp_id, cc, gk, div_no), custom_ratio in ratio_overrides.items():
+            col = div_col.get(div_no)
+            if col is not None:
+                for i in budget_rows.get((sp_id, cc, gk), ()):
+                    overrides[i, col] = custom_ratio
+        self.is_custom = ~np.isnan(overrides)
+        self.effective_ratio = np.where(
+            self.is_custom, overrides, self.division_ratio_2025
+        )
+        self.uses_default_ratios = no_history[:, None] & ~self.is_custom
+
+        # Budget totals and allocations (sales-only rows carry zeros)
+        self.budget_totals = np.array(
+            [[g.get(f"{q}_total", 0.0) for q in QUARTERS] for g in collapsed_budget]
+            + [[0.0] * 4] * len(sales_only_groups),
+            dtype=np.float64,
+        ).reshape(n_groups, 4)
+        bt = self.budget_totals
+        self.total_budget = bt[:, 0] + bt[:, 1] + bt[:, 2] + bt[:, 3]
+        self.allocated = bt[:, :, None] * self.effective_ratio[:, None, :]
+        self.total_allocated = self.total_budget[:, None] * self.effective_ratio
+
+        # 2025 sales/GP shown once per (group_key, customer_class, item_division)
+        sales_keys = key_grid[group_pairs]
+        flat_keys = sales_keys.ravel()
+        shown = np.zeros(flat_keys.size, dtype=bool)
+        first_keys, first_rows = np.unique(flat_keys, return_index=True)
+        shown[first_rows[first_keys >= 0]] = True
+        shown = shown.reshape(sales_keys.shape)
+        # Cells without 2025 sales read an extra empty baseline row, which also
+        # keeps the lookups valid when the baseline has no keys at all
+        safe_keys = np.where(sales_keys >= 0, sales_keys, len(baseline.keys))
+        key_has_gp = np.append(baseline.has_gp, False)
+        key_total_sales = np.append(baseline.total_sales, 0.0)
+        key_gp_percent = np.append(baseline.full_year_gp_percent, np.nan)
+        key_quarter_sales = np.vstack(
+            [baseline.quarter_sales.reshape(-1, 4), np.zeros((1, 4))]
+        )
+        key_quarter_gp = np.vstack(
+            [baseline.quarter_gp_percent.reshape(-1, 4), np.full((1, 4), np.nan)]
+        )
+        with_gp = shown & key_has_gp[safe_keys]
+
+        # Cells the sparse output keeps: nonzero ratio, custom override or 2025 sales
+        historical_sales = key_total_sales[safe_keys]
+        self.used = (
+            (self.effective_ratio != 0) | self.is_custom | (historical_sales != 0)
+        )
+
+        self.total_2025_sales = np.where(shown, historical_sales, 0.0)
+        self.gp_percent = np.where(with_gp, key_gp_percent[safe_keys], np.nan)
+        self.quarter_sales = np.where(
+            with_gp[:, :, None], key_quarter_sales[safe_keys], 0.0
+        )
+        quarter_gp = np.where(with_gp[:, :, None], key_quarter_gp[safe_keys], np.nan)
+        # `q_gp_percent or gp_percent`
+        self.quarter_gp_percent = np.where(
+            _truthy(quarter_gp), quarter_gp, self.gp_percent[:, :, None]
+        )
+        self.quarter_gp_mask = _truthy(self.quarter_gp_percent) & (
+            self.quarter_sales > 0
+        )
+        self.quarter_gp_value = np.where(
+            self.quarter_gp_mask, self.quarter_sales * self.quarter_gp_percent, 0.0
+        )
+        self.total_gp_mask = _truthy(self.gp_percent) & (self.total_2025_sales > 0)
+        self.total_gp_value = np.where(
+            self.total_gp_mask, self.total_2025_sales * self.gp_percent, 0.0
+        )
+
+        # Rounded output columns; sales-only rows keep literal zeros like the dict path
+        budgeted = self.has_budget[:, None]
+        self.allocated_rounded = np.where(
+            budgeted[:, :, None],
+            round_half_even_like_python(self.allocated, 2).transpose(0, 2, 1),
+            0.0,
+        )
+        self.total_allocated_rounded = np.where(
+            budgeted, round_half_even_like_python(self.total_allocated, 2), 0.0
+        )
+        self.quarter_gp_value_rounded = np.where(
+            self.quarter_gp_mask,
+            round_half_even_like_python(self.quarter_gp_value, 2),
+            0.0,
+        )
+        self.total_gp_value_rounded = np.where(
+            self.total_gp_mask, round_half_even_like_python(self.total_gp_value, 2), 0.0
+        )
+
+    def _sorted_cells(self) -> Iterator[Tuple[int, int]]:
+        """
+        Yield (group, division) cells in the order of the dict path's stable
+        sort on (customer_class, salesperson_name, group_key, item_division)
+        """
+        group_order = sorted(
+            range(len(self.groups)),
+            key=lambda i: (
+                self.groups[i]["customer_class"],
+                self.groups[i]["salesperson_name"],
+                self.groups[i]["group_key"] or "",
+            ),
+        )
+        div_order = sorted(
+            range(len(self.divisions)), key=lambda j: self.divisions[j]["div_no"]
+        )
+        start = 0
+        while start < len(group_order):
+            first = self.groups[group_order[start]]
+            run_key = (
+                first["customer_class"],
+                first["salesperson_name"],
+                first["group_key"] or "",
+            )
+            end = start + 1
+            while end < len(group_order):
+                g = self.groups[group_order[end]]
+                if (
+                    g["customer_class"],
+                    g["salesperson_name"],
+                    g["group_key"] or "",
+                ) != run_key:
+                    break
+                end += 1
+            for j in div_order:
+                for i in group_order[start:end]:
+                    yield i, j
+            start = end
+
+    def _columns(self) -> Dict[str, list]:
+        """Output arrays as nested Python lists (NaN -> None) so rows hold plain floats"""
+
+        def nullable(values: np.ndarray) -> list:
+            return np.where(np.isnan(values), None, values).tolist()
+
+        return {
+            "effective_ratio": self.effective_ratio.tolist(),
+            "is_custom": self.is_custom.tolist(),
+            "uses_default_ratios": self.uses_default_ratios.tolist(),
+            "budget_totals": self.budget_totals.tolist(),
+            "total_budget": self.total_budget.tolist(),
+            "allocated": self.allocated_rounded.tolist(),
+            "total_allocated": self.total_allocated_rounded.tolist(),
+            "division_ratio_2025": self.division_ratio_2025.tolist(),
+            "total_2025_sales": self.total_2025_sales.tolist(),
+            "quarter_sales": self.quarter_sales.tolist(),
+            "gp_percent": nullable(self.gp_percent),
+            "quarter_gp_percent": nullable(self.quarter_gp_percent),
+            "quarter_gp_value": self.quarter_gp_value_rounded.tolist(),
+            "total_gp_value": self.total_gp_value_rounded.tolist(),
+            "has_budget": self.has_budget.tolist(),
+        }
+
+    @staticmethod
+    def _row(
+        columns: Dict[str, list], group, division, i: int, j: int
+    ) -> Dict[str, Any]:
+        bt = columns["budget_totals"][i]
+        allocated = columns["allocated"][i][j]
+        quarter_sales = columns["quarter_sales"][i][j]
+        quarter_gp_percent = columns["quarter_gp_percent"][i][j]
+        quarter_gp_value = columns["quarter_gp_value"][i][j]
+        return {
+            "salesperson_id": group["salesperson_id"],
+            "salesperson_name": group["salesperson_name"],
+            "customer_class": group["customer_class"],
+            "group_key": group["group_key"],
+            "brand": group["brand"],
+            "item_division": division["div_no"],
+            "division_name": division["div_desc"],
+            "effective_ratio": columns["effective_ratio"][i][j],
+            "is_custom": columns["is_custom"][i][j],
+            "uses_default_ratios": columns["uses_default_ratios"][i][j],
+            "q1_budget_total": bt[0],
+            "q2_budget_total": bt[1],
+            "q3_budget_total": bt[2],
+            "q4_budget_total": bt[3],
+            "total_budget_total": columns["total_budget"][i],
+            "q1_allocated": allocated[0],
+            "q2_allocated": allocated[1],
+            "q3_allocated": allocated[2],
+            "q4_allocated": allocated[3],
+            "total_allocated": columns["total_allocated"][i][j],
+            "division_ratio_2025": columns["division_ratio_2025"][i][j],
+            "total_2025_sales": columns["total_2025_sales"][i][j],
+            "q1_sales": quarter_sales[0],
+            "q2_sales": quarter_sales[1],
+            "q3_sales": quarter_sales[2],
+            "q4_sales": quarter_sales[3],
+            "gp_percent": columns["gp_percent"][i][j],
+            "q1_gp_percent": quarter_gp_percent[0],
+            "q2_gp_percent": quarter_gp_percent[1],
+            "q3_gp_percent": quarter_gp_percent[2],
+            "q4_gp_percent": quarter_gp_percent[3],
+            "q1_gp_value": quarter_gp_value[0],
+            "q2_gp_value": quarter_gp_value[1],
+            "q3_gp_value": quarter_gp_value[2],
+            "q4_gp_value": quarter_gp_value[3],
+            "total_gp_value": columns["total_gp_value"][i][j],
+            "has_budget": columns["has_budget"][i],
+        }
+
+    def iter_rows(self, sparse: bool = False) -> Iterator[Dict[str, Any]]:
+        """
+        Rows one at a time, sorted by customer_class, salesperson_name, group_key, item_division
+        sparse=True skips cells outside the `used` mask
+        """
+        columns = self._columns()
+        used = self.used.tolist()
+        for i, j in self._sorted_cells():
+            if sparse and not used[i][j]:
+                continue
+            yield self._row(columns, self.groups[i], self.divisions[j], i, j)
+
+    def rows(self) -> List[Dict[str, Any]]:
+        """All rows, sorted by customer_class, salesperson_name, group_key, item_division"""
+        return list(self.iter_rows())
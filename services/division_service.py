@@ -1,40 +1,105 @@
+from sqlalchemy import delete, insert, tuple_
+from sqlalchemy.dialects.mysql import insert as mysql_insert
 from sqlmodel import Session, text, select
-from typing import List, Dict, Any
-from db.budget_models import DivisionRatioOverride
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+from db.budget_models import (
+    DivisionBaseline2025,
+    DivisionGroupBaseline2025,
+    DivisionRatioOverride,
+    DivisionSalesGroup2025,
+    DivisionTotalBaseline2025,
+)
 from datetime import datetime, date
+from services import cache
+from services.cache import BUDGET, DIVISIONS, OVERRIDES, SALES
+from services.division_engine import (
+    DivisionAllocations,
+    DivisionBaseline,
+    collapse_budget,
+    period_quarters,
+    to_float_array,
+)
+
+# 2025 sales lines; group_key and is_hospitality are stored generated columns
+# (db/migrations.py) holding the normalization shared by both engines
+SALES_NORMALIZED_QUERY = text(
+    """
+      SELECT
+        s.group_key,
+        s.derived_customer_class AS customer_class,
+        s.item_division,
+        s.ext_sales,
+        s.ext_cost,
+        s.period
+      FROM sales_budget_2026 s
+      WHERE s.period >= '2025-01-01' AND s.period < '2026-01-01'
+        AND s.salesperson IS NOT NULL
+        AND (
+          (s.is_hospitality = 1 AND s.flag IS NOT NULL AND s.flag<>'')
+          OR (s.is_hospitality = 0 AND s.customer_name IS NOT NULL AND s.customer_name<>'')
+        )
+"""
+)
+
+# Same sales pre-summed per (group_key, customer_class, item_division, quarter);
+# period is the quarter start so the quarter bucketing downstream is unchanged
+SALES_AGGREGATED_QUERY = text(
+    """
+      SELECT
+        s.group_key,
+        s.derived_customer_class AS customer_class,
+        s.item_division,
+        COALESCE(SUM(s.ext_sales), 0) AS ext_sales,
+        COALESCE(SUM(s.ext_cost), 0) AS ext_cost,
+        DATE_ADD('2025-01-01', INTERVAL QUARTER(s.period) - 1 QUARTER) AS period
+      FROM sales_budget_2026 s
+      WHERE s.period >= '2025-01-01' AND s.period < '2026-01-01'
+        AND s.salesperson IS NOT NULL
+        AND (
+          (s.is_hospitality = 1 AND s.flag IS NOT NULL AND s.flag<>'')
+          OR (s.is_hospitality = 0 AND s.customer_name IS NOT NULL AND s.customer_name<>'')
+        )
+      GROUP BY
+        s.group_key,
+        s.derived_customer_class,
+        s.item_division,
+        DATE_ADD('2025-01-01', INTERVAL QUARTER(s.period) - 1 QUARTER)
+"""
+)
+
+# Single group sales: same normalization, filtered to one (customer_class, group_key)
+SALES_GROUP_QUERY = text(
+    """
+      SELECT
+        s.group_key,
+        s.derived_customer_class AS customer_class,
+        s.item_division,
+        s.ext_sales,
+        s.ext_cost,
+        s.period
+      FROM sales_budget_2026 s
+      WHERE s.period >= '2025-01-01' AND s.period < '2026-01-01'
+        AND s.salesperson IS NOT NULL
+        AND s.derived_customer_class = :customer_class
+        AND s.group_key = :group_key
+"""
+)
 
 
 class DivisionService:
     def __init__(self, db: Session):
         self.db = db
 
-    def _get_sales_normalized(self) -> List[Dict[str, Any]]:
+    def _get_sales_normalized(self, aggregate: bool = False) -> List[Dict[str, Any]]:
         """
         Normalize sales data (group_key logic)
+        With aggregate=True MySQL returns one row per (group_key, customer_class,
+        item_division, quarter) instead of every sales line
         Returns list of dicts with: group_key, customer_class, item_division, ext_sales, ext_cost, period
         """
-        query = text(
-            """
-              SELECT
-                CASE WHEN s.derived_customer_class LIKE 'Hospitality%'
-                     THEN NULLIF(TRIM(s.flag),'')
-                     ELSE NULLIF(TRIM(s.customer_name),'')
-              END AS group_key,
-                s.derived_customer_class AS customer_class,
-                s.item_division,
-                s.ext_sales,
-                s.ext_cost,
-                s.period
-              FROM sales_budget_2026 s
-              WHERE s.period >= '2025-01-01' AND s.period < '2026-01-01'
-                AND s.salesperson IS NOT NULL
-                AND (
-                  (s.derived_customer_class LIKE 'Hospitality%' AND s.flag IS NOT NULL AND s.flag<>'')
-                  OR (s.derived_customer_class NOT LIKE 'Hospitality%' AND s.customer_name IS NOT NULL AND s.customer_name<>'')
-                )
-        """
+        result = self.db.exec(
+            SALES_AGGREGATED_QUERY if aggregate else SALES_NORMALIZED_QUERY
         )
-        result = self.db.exec(query)
         return [
             {
                 "group_key": row.group_key,
@@ -164,25 +229,42 @@ class DivisionService:
             )
         return normalized
 
-    def _get_budget_normalized(self) -> List[Dict[str, Any]]:
+    def _get_budget_normalized(
+        self,
+        salesperson_id: Optional[int] = None,
+        customer_class: Optional[str] = None,
+        group_key: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
         """
-        Normalize budget data
+        Normalize budget data (optionally for a single salesperson + group)
         Returns list of dicts with: salesperson_id, salesperson_name, customer_class, group_key, brand, quarter_1_sales, quarter_2_sales, quarter_3_sales, quarter_4_sales
         """
-        query = text(
-            """
+        sql = """
               SELECT
                 b.salesperson_id,
                 b.salesperson_name,
                 b.customer_class,
-                CASE WHEN b.customer_class LIKE 'Hospitality%' THEN NULLIF(TRIM(b.flag),'')
-                     ELSE NULLIF(TRIM(b.customer_name),'') END AS group_key,
-                CASE WHEN b.customer_class LIKE 'Hospitality%' THEN NULLIF(TRIM(b.brand),'')
+                b.group_key,
+                CASE WHEN b.is_hospitality = 1 THEN NULLIF(TRIM(b.brand),'')
                      ELSE NULL END AS brand,
                 b.quarter_1_sales, b.quarter_2_sales, b.quarter_3_sales, b.quarter_4_sales
               FROM dfm_dashboards.budget_2026 b
         """
-        )
+        if group_key is None:
+            query = text(sql)
+        else:
+            query = text(
+                sql
+                + """
+              WHERE b.salesperson_id = :salesperson_id
+                AND b.customer_class = :customer_class
+                AND b.group_key = :group_key
+        """
+            ).bindparams(
+                salesperson_id=salesperson_id,
+                customer_class=customer_class,
+                group_key=group_key,
+            )
         result = self.db.exec(query)
         return [
             {
@@ -438,17 +520,35 @@ class DivisionService:
 
         return gp_percentages
 
-    def _get_ratio_overrides(self) -> Dict[tuple, float]:
+    def _get_ratio_overrides(
+        self,
+        salesperson_id: Optional[int] = None,
+        customer_class: Optional[str] = None,
+        group_key: Optional[str] = None,
+    ) -> Dict[tuple, float]:
         """
-        Get custom ratio overrides
+        Get custom ratio overrides (optionally for a single salesperson + group)
         Returns dict keyed by (salesperson_id, customer_class, group_key, item_division) -> custom_ratio
         """
-        query = text(
-            """
+        sql = """
             SELECT salesperson_id, customer_class, group_key, item_division, custom_ratio
             FROM division_ratio_overrides
         """
-        )
+        if group_key is None:
+            query = text(sql)
+        else:
+            query = text(
+                sql
+                + """
+            WHERE salesperson_id = :salesperson_id
+              AND customer_class = :customer_class
+              AND group_key = :group_key
+        """
+            ).bindparams(
+                salesperson_id=salesperson_id,
+                customer_class=customer_class,
+                group_key=group_key,
+            )
         result = self.db.exec(query)
         overrides = {}
         for row in result:
@@ -477,30 +577,27 @@ class DivisionService:
               s.salesperson AS salesperson_id,
               COALESCE(sp.salesman_name, CONCAT('Salesperson ', s.salesperson)) AS salesperson_name,
               s.derived_customer_class AS customer_class,
-              CASE WHEN s.derived_customer_class LIKE 'Hospitality%'
-                   THEN NULLIF(TRIM(s.flag),'')
-                   ELSE NULLIF(TRIM(s.customer_name),'')
-              END AS group_key,
-              CASE WHEN s.derived_customer_class LIKE 'Hospitality%' THEN MAX(NULLIF(TRIM(s.brand),''))
+              s.group_key,
+              CASE WHEN s.is_hospitality = 1 THEN MAX(NULLIF(TRIM(s.brand),''))
                    ELSE NULL END AS brand
             FROM sales_budget_2026 s
             LEFT JOIN salesperson_masters sp ON sp.salesman_no = s.salesperson
             WHERE s.period >= '2025-01-01' AND s.period < '2026-01-01'
               AND s.salesperson IS NOT NULL
               AND (
-                (s.derived_customer_class LIKE 'Hospitality%' AND s.flag IS NOT NULL AND s.flag<>'')
-                OR (s.derived_customer_class NOT LIKE 'Hospitality%' AND s.customer_name IS NOT NULL AND s.customer_name<>'')
+                (s.is_hospitality = 1 AND s.flag IS NOT NULL AND s.flag<>'')
+                OR (s.is_hospitality = 0 AND s.customer_name IS NOT NULL AND s.customer_name<>'')
               )
               AND NOT EXISTS (
                 SELECT 1 FROM dfm_dashboards.budget_2026 b
                 WHERE b.salesperson_id = s.salesperson
                   AND b.customer_class = s.derived_customer_class
-                  AND CASE WHEN b.customer_class LIKE 'Hospitality%' THEN NULLIF(TRIM(b.flag),'') ELSE NULLIF(TRIM(b.customer_name),'') END = 
-                      CASE WHEN s.derived_customer_class LIKE 'Hospitality%' THEN NULLIF(TRIM(s.flag),'') ELSE NULLIF(TRIM(s.customer_name),'') END
+                  AND b.group_key = s.group_key
               )
             GROUP BY s.salesperson, sp.salesman_name,
                      s.derived_customer_class,
-                     CASE WHEN s.derived_customer_class LIKE 'Hospitality%' THEN NULLIF(TRIM(s.flag),'') ELSE NULLIF(TRIM(s.customer_name),'') END
+                     s.group_key,
+                     s.is_hospitality
         """
         )
         result = self.db.exec(query)
@@ -515,13 +612,20 @@ class DivisionService:
             for row in result
         ]
 
-    def get_division_allocations(self) -> List[Dict[str, Any]]:
+    def _compute_baseline(self, aggregate: bool = False) -> Dict[str, Any]:
         """
-        Get division allocations with custom ratio overrides applied
+        Compute the 2025 historical inputs from raw sales
+        Returns dict with: ratios_lookup, grouped_sales_lookup, group_historical_totals, overall_division_totals, gp_by_division
         """
         # Step 1: Get normalized sales data
-        sales_norm = self._get_sales_normalized()
+        sales_norm = self._get_sales_normalized(aggregate)
+        return self._baseline_from_sales(sales_norm)
 
+    def _baseline_from_sales(self, sales_norm: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Steps 2-6, 10, 12 and 15 of the pipeline over already normalized sales
+        Returns the same dict as _compute_baseline
+        """
         # Step 2: Group sales by group_key + division
         grouped_sales = self._get_grouped_sales(sales_norm)
 
@@ -537,32 +641,12 @@ class DivisionService:
         # Step 6: Normalize ratios
         ratios_normalized = self._get_ratios_normalized(ratios)
 
-        # Step 7: Get normalized budget data
-        budget_norm = self._get_budget_normalized()
-
-        # Step 8: Collapse budget per salesperson + group_key
-        collapsed_budget = self._get_collapsed_budget(budget_norm)
-
-        # Step 9: Get divisions
-        divisions = self._get_divisions_deduplicated()
-
         # Step 10: Get overall division totals
         overall_division_totals = self._get_overall_division_totals(grouped_sales)
 
-        # Step 11: Get default division ratios
-        default_division_ratios = self._get_default_division_ratios(
-            divisions, overall_division_totals
-        )
-
         # Step 12: Get group historical totals
         group_historical_totals = self._get_group_historical_totals(grouped_sales)
 
-        # Step 13: Get ratio overrides
-        ratio_overrides = self._get_ratio_overrides()
-
-        # Step 14: Get sales-only groups (groups with sales but no budget)
-        sales_only_groups = self._get_sales_only_groups(grouped_sales, collapsed_budget)
-
         # Step 15: Get GP data by division
         gp_by_division = self._get_gp_by_division(sales_norm)
 
@@ -581,26 +665,638 @@ class DivisionService:
             for gs in grouped_sales
         }
 
-        # Step 16: Combine all data (equivalent to the final SELECT with CROSS JOIN and LEFT JOINs)
-        division_data = []
-        # Track which (group_key, customer_class, item_division) combinations have already shown sales
-        # to prevent double-counting when multiple salespeople have budgets for the same group
-        sales_shown = set()
-
-        # Process budget rows
-        for budget in collapsed_budget:
-            for division in divisions:
-                # Get keys for lookups
-                group_key = budget["group_key"]
-                customer_class = budget["customer_class"]
-                item_division = division["div_no"]
-                salesperson_id = budget["salesperson_id"]
-
-                # Get historical total for this group
-                ght_key = (group_key, customer_class)
-                group_total_sales = group_historical_totals.get(ght_key, 0.0)
-
-                # Get ratio override if exists
+        return {
+            "ratios_lookup": ratios_lookup,
+            "grouped_sales_lookup": grouped_sales_lookup,
+            "group_historical_totals": group_historical_totals,
+            "overall_division_totals": overall_division_totals,
+            "gp_by_division": gp_by_division,
+        }
+
+    def _get_baseline_snapshot(self) -> Optional[Dict[str, Any]]:
+        """
+        Load the 2025 historical inputs from the baseline snapshot tables
+        Returns the same dict as _compute_baseline, or None if the snapshot was never refreshed
+        """
+        rows = self._get_baseline_snapshot_rows()
+        if rows is None:
+            return None
+        baseline = self._baseline_from_snapshot_rows(*rows)
+        baseline["overall_division_totals"] = self._get_snapshot_division_totals()
+        return baseline
+
+    def _get_baseline_snapshot_rows(self) -> Optional[Tuple[List[Any], List[Any]]]:
+        """
+        Rows of division_group_baseline_2025 and division_baseline_2025
+        Returns (group_rows, division_rows), or None if the snapshot was never refreshed
+        """
+        group_rows = self.db.exec(
+            text(
+                """
+                SELECT group_key, customer_class, total_sales
+                FROM division_group_baseline_2025
+            """
+            )
+        ).all()
+        if not group_rows:
+            return None
+
+        division_rows = self.db.exec(
+            text(
+                """
+                SELECT group_key, customer_class, item_division, total_sales,
+                       division_ratio_2025,
+                       q1_sales, q2_sales, q3_sales, q4_sales,
+                       q1_gp_percent, q2_gp_percent, q3_gp_percent, q4_gp_percent,
+                       full_year_gp_percent
+                FROM division_baseline_2025
+            """
+            )
+        ).all()
+        return group_rows, division_rows
+
+    def _get_group_baseline_snapshot(
+        self, customer_class: str, group_key: str
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Load one group's 2025 inputs from the baseline snapshot tables
+        Returns the _compute_baseline dict without overall_division_totals, or None if the snapshot was never refreshed
+        """
+        params = {"customer_class": customer_class, "group_key": group_key}
+        group_rows = [
+            row
+            for row in self.db.exec(
+                text(
+                    """
+                    SELECT group_key, customer_class, total_sales
+                    FROM division_group_baseline_2025
+                    WHERE customer_class = :customer_class AND group_key = :group_key
+                """
+                ).bindparams(**params)
+            )
+            if row.customer_class == customer_class and row.group_key == group_key
+        ]
+        if not group_rows and not self._baseline_snapshot_exists():
+            return None
+
+        division_rows = [
+            row
+            for row in self.db.exec(
+                text(
+                    """
+                    SELECT group_key, customer_class, item_division, total_sales,
+                           division_ratio_2025,
+                           q1_sales, q2_sales, q3_sales, q4_sales,
+                           q1_gp_percent, q2_gp_percent, q3_gp_percent, q4_gp_percent,
+                           full_year_gp_percent
+                    FROM division_baseline_2025
+                    WHERE customer_class = :customer_class AND group_key = :group_key
+                """
+                ).bindparams(**params)
+            )
+            if row.customer_class == customer_class and row.group_key == group_key
+        ]
+        return self._baseline_from_snapshot_rows(group_rows, division_rows)
+
+    def _baseline_snapshot_exists(self) -> bool:
+        """Whether the baseline snapshot has been refreshed at least once"""
+        row = self.db.exec(
+            text("SELECT 1 FROM division_group_baseline_2025 LIMIT 1")
+        ).first()
+        return row is not None
+
+    def _get_snapshot_division_totals(self) -> Dict[int, float]:
+        """
+        Per-division 2025 sales from the baseline snapshot
+        Returns dict keyed by item_division -> total_division_sales (empty if never refreshed)
+        """
+        result = self.db.exec(
+            text(
+                """
+                SELECT item_division, total_sales
+                FROM division_totals_2025
+            """
+            )
+        )
+        return {row.item_division: row.total_sales for row in result}
+
+    def _baseline_from_snapshot_rows(
+        self, group_rows: List[Any], division_rows: List[Any]
+    ) -> Dict[str, Any]:
+        """
+        Build the _compute_baseline lookups from snapshot table rows
+        Returns dict with: ratios_lookup, grouped_sales_lookup, group_historical_totals, gp_by_division
+        """
+        group_historical_totals = {
+            (row.group_key, row.customer_class): row.total_sales for row in group_rows
+        }
+
+        ratios_lookup = {}
+        grouped_sales_lookup = {}
+        gp_by_division = {}
+        for row in division_rows:
+            key = (row.group_key, row.customer_class, row.item_division)
+            ratios_lookup[key] = row.division_ratio_2025
+            grouped_sales_lookup[key] = row.total_sales
+            gp_by_division[key] = {
+                "q1_gp_percent": row.q1_gp_percent,
+                "q2_gp_percent": row.q2_gp_percent,
+                "q3_gp_percent": row.q3_gp_percent,
+                "q4_gp_percent": row.q4_gp_percent,
+                "full_year_gp_percent": row.full_year_gp_percent,
+                "q1_sales": row.q1_sales,
+                "q2_sales": row.q2_sales,
+                "q3_sales": row.q3_sales,
+                "q4_sales": row.q4_sales,
+            }
+
+        return {
+            "ratios_lookup": ratios_lookup,
+            "grouped_sales_lookup": grouped_sales_lookup,
+            "group_historical_totals": group_historical_totals,
+            "gp_by_division": gp_by_division,
+        }
+
+    def _compute_group_baseline(
+        self, customer_class: str, group_key: str
+    ) -> Dict[str, Any]:
+        """
+        Compute one group's 2025 inputs from its raw sales lines only
+        Ratios, totals and GP are all per group, so this matches the company-wide pipeline
+        Returns the _compute_baseline dict (overall_division_totals only cover this group)
+        """
+        result = self.db.exec(
+            SALES_GROUP_QUERY.bindparams(
+                customer_class=customer_class, group_key=group_key
+            )
+        )
+        sales_norm = [
+            {
+                "group_key": row.group_key,
+                "customer_class": row.customer_class,
+                "item_division": row.item_division,
+                "ext_sales": float(row.ext_sales) if row.ext_sales else 0.0,
+                "ext_cost": float(row.ext_cost) if row.ext_cost else 0.0,
+                "period": row.period,
+            }
+            for row in result
+            # MySQL collation matching is looser than the Python key lookups
+            if row.customer_class == customer_class and row.group_key == group_key
+        ]
+        return self._baseline_from_sales(sales_norm)
+
+    def _get_cached_overall_division_totals(self) -> Dict[int, float]:
+        """
+        Company-wide per-division 2025 sales (input to the default ratios)
+        Read from the baseline snapshot, or computed from raw sales when it was
+        never refreshed; cached until the sales data version changes
+        """
+
+        def load() -> Dict[int, float]:
+            totals = self._get_snapshot_division_totals()
+            if not totals:
+                totals = self._compute_baseline()["overall_division_totals"]
+            return totals
+
+        return cache.cached(("overall_division_totals",), (SALES,), load)
+
+    def _get_cached_divisions(self) -> List[Dict[str, Any]]:
+        """Deduplicated divisions, cached until the divisions data version changes"""
+        return cache.cached(
+            ("divisions",), (DIVISIONS,), self._get_divisions_deduplicated
+        )
+
+    def _get_cached_collapsed_budget(self) -> List[Dict[str, Any]]:
+        """Collapsed budget for every salesperson, cached until the budget changes"""
+        return cache.cached(
+            ("collapsed_budget",),
+            (BUDGET,),
+            lambda: self._get_collapsed_budget(self._get_budget_normalized()),
+        )
+
+    def _get_cached_ratio_overrides(self) -> Dict[tuple, float]:
+        """All custom ratio overrides, cached until an override is written"""
+        return cache.cached(
+            ("ratio_overrides",), (OVERRIDES,), self._get_ratio_overrides
+        )
+
+    def _get_sales_groups(self) -> List[Dict[str, Any]]:
+        """
+        Get every 2025 sales group with salesperson info (budgeted or not)
+        Returns list of dicts with: salesperson_id, salesperson_name, customer_class, group_key, brand
+        """
+        query = text(
+            """
+            SELECT
+              s.salesperson AS salesperson_id,
+              COALESCE(sp.salesman_name, CONCAT('Salesperson ', s.salesperson)) AS salesperson_name,
+              s.derived_customer_class AS customer_class,
+              s.group_key,
+              CASE WHEN s.is_hospitality = 1 THEN MAX(NULLIF(TRIM(s.brand),''))
+                   ELSE NULL END AS brand
+            FROM sales_budget_2026 s
+            LEFT JOIN salesperson_masters sp ON sp.salesman_no = s.salesperson
+            WHERE s.period >= '2025-01-01' AND s.period < '2026-01-01'
+              AND s.salesperson IS NOT NULL
+              AND (
+                (s.is_hospitality = 1 AND s.flag IS NOT NULL AND s.flag<>'')
+                OR (s.is_hospitality = 0 AND s.customer_name IS NOT NULL AND s.customer_name<>'')
+              )
+            GROUP BY s.salesperson, sp.salesman_name,
+                     s.derived_customer_class,
+                     s.group_key,
+                     s.is_hospitality
+        """
+        )
+        result = self.db.exec(query)
+        return [
+            {
+                "salesperson_id": row.salesperson_id,
+                "salesperson_name": row.salesperson_name,
+                "customer_class": row.customer_class,
+                "group_key": row.group_key,
+                "brand": row.brand,
+            }
+            for row in result
+        ]
+
+    def _get_sales_only_groups_from_snapshot(self) -> List[Dict[str, Any]]:
+        """
+        Snapshot sales groups that don't have budgets (live budget join)
+        Returns list of dicts with: salesperson_id, salesperson_name, customer_class, group_key, brand
+        """
+        query = text(
+            """
+            SELECT g.salesperson_id, g.salesperson_name, g.customer_class, g.group_key, g.brand
+            FROM division_sales_groups_2025 g
+            WHERE NOT EXISTS (
+                SELECT 1 FROM dfm_dashboards.budget_2026 b
+                WHERE b.salesperson_id = g.salesperson_id
+                  AND b.customer_class = g.customer_class
+                  AND b.group_key = g.group_key
+            )
+            ORDER BY g.id
+        """
+        )
+        result = self.db.exec(query)
+        return [
+            {
+                "salesperson_id": row.salesperson_id,
+                "salesperson_name": row.salesperson_name,
+                "customer_class": row.customer_class,
+                "group_key": row.group_key,
+                "brand": row.brand,
+            }
+            for row in result
+        ]
+
+    def refresh_baseline_snapshot(self) -> Dict[str, Any]:
+        """
+        Rebuild the 2025 division baseline snapshot tables from raw sales
+        Returns row counts per table and the refresh timestamp
+        """
+        try:
+            baseline = self._compute_baseline()
+            sales_groups = self._get_sales_groups()
+            refreshed_at = datetime.utcnow()
+
+            baseline_rows = []
+            for key, total_sales in baseline["grouped_sales_lookup"].items():
+                group_key, customer_class, item_division = key
+                gp_data = baseline["gp_by_division"].get(key, {})
+                baseline_rows.append(
+                    {
+                        "group_key": group_key,
+                        "customer_class": customer_class,
+                        "item_division": item_division,
+                        "total_sales": total_sales,
+                        "division_ratio_2025": baseline["ratios_lookup"].get(key, 0.0),
+                        "q1_sales": gp_data.get("q1_sales", 0.0),
+                        "q2_sales": gp_data.get("q2_sales", 0.0),
+                        "q3_sales": gp_data.get("q3_sales", 0.0),
+                        "q4_sales": gp_data.get("q4_sales", 0.0),
+                        "q1_gp_percent": gp_data.get("q1_gp_percent"),
+                        "q2_gp_percent": gp_data.get("q2_gp_percent"),
+                        "q3_gp_percent": gp_data.get("q3_gp_percent"),
+                        "q4_gp_percent": gp_data.get("q4_gp_percent"),
+                        "full_year_gp_percent": gp_data.get("full_year_gp_percent"),
+                        "refreshed_at": refreshed_at,
+                    }
+                )
+            group_rows = [
+                {
+                    "group_key": group_key,
+                    "customer_class": customer_class,
+                    "total_sales": total_sales,
+                    "refreshed_at": refreshed_at,
+                }
+                for (group_key, customer_class), total_sales in baseline[
+                    "group_historical_totals"
+                ].items()
+            ]
+            division_rows = [
+                {
+                    "item_division": item_division,
+                    "total_sales": total_sales,
+                    "refreshed_at": refreshed_at,
+                }
+                for item_division, total_sales in baseline[
+                    "overall_division_totals"
+                ].items()
+            ]
+            sales_group_rows = [
+                dict(group, refreshed_at=refreshed_at) for group in sales_groups
+            ]
+
+            snapshot = (
+                (DivisionBaseline2025, baseline_rows),
+                (DivisionGroupBaseline2025, group_rows),
+                (DivisionTotalBaseline2025, division_rows),
+                (DivisionSalesGroup2025, sales_group_rows),
+            )
+            # Replace everything in one transaction so readers never see a partial snapshot
+            connection = self.db.connection()
+            for model, rows in snapshot:
+                connection.execute(delete(model))
+                if rows:
+                    connection.execute(insert(model), rows)
+            self.db.commit()
+            cache.bump(SALES)
+
+            return {
+                "success": True,
+                "refreshed_at": refreshed_at.isoformat(),
+                "division_rows": len(baseline_rows),
+                "group_rows": len(group_rows),
+                "division_total_rows": len(division_rows),
+                "sales_group_rows": len(sales_group_rows),
+            }
+
+        except Exception as e:
+            self.db.rollback()
+            raise e
+
+    def get_division_allocations(
+        self, aggregate: bool = False, use_snapshot: bool = True
+    ) -> List[Dict[str, Any]]:
+        """
+        Get division allocations with custom ratio overrides applied
+        2025 inputs come from the baseline snapshot when it has been refreshed;
+        use_snapshot=False (or an empty snapshot) recomputes them from raw sales,
+        and aggregate=True then sums sales per quarter in SQL first
+        Results and their inputs are cached per data version (services/cache.py)
+        """
+        return cache.cached(
+            ("division_allocations", aggregate, use_snapshot),
+            (SALES, BUDGET, OVERRIDES, DIVISIONS),
+            lambda: self._build_division_allocations(aggregate, use_snapshot),
+        )
+
+    def _load_baseline(self, aggregate: bool, use_snapshot: bool) -> Dict[str, Any]:
+        """
+        2025 historical inputs from the snapshot (if wanted and refreshed) or raw sales
+        Returns the _compute_baseline dict plus from_snapshot
+        """
+        baseline = self._get_baseline_snapshot() if use_snapshot else None
+        if baseline is not None:
+            return dict(baseline, from_snapshot=True)
+        return dict(self._compute_baseline(aggregate), from_snapshot=False)
+
+    def iter_division_allocations(
+        self, aggregate: bool = False, use_snapshot: bool = True
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Same rows as get_division_allocations, yielded one at a time in sort order
+        All database reads happen before this returns; iterating only computes rows
+        """
+        return self._iter_division_rows(*self._division_inputs(aggregate, use_snapshot))
+
+    def get_division_allocations_sparse(
+        self, aggregate: bool = False, use_snapshot: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Division allocations without the unused part of the group x division grid
+        Only pairs with a nonzero effective ratio, a custom override or 2025 sales are
+        returned; every omitted row equals its group header plus the division with
+        effective_ratio/division_ratio_2025 = 0, is_custom = False, all allocated,
+        sales and GP$ amounts 0 and all GP% None
+        Returns dict with: data (rows), groups (headers in output order), divisions
+        """
+        return cache.cached(
+            ("division_allocations_sparse", aggregate, use_snapshot),
+            (SALES, BUDGET, OVERRIDES, DIVISIONS),
+            lambda: self._build_division_allocations_sparse(aggregate, use_snapshot),
+        )
+
+    def _build_division_allocations_sparse(
+        self, aggregate: bool, use_snapshot: bool
+    ) -> Dict[str, Any]:
+        """Uncached body of get_division_allocations_sparse"""
+        inputs = self._division_inputs(aggregate, use_snapshot)
+        collapsed_budget, sales_only_groups, divisions = inputs[:3]
+        group_historical_totals = inputs[7]
+        return {
+            "data": list(self._iter_division_rows(*inputs, sparse=True)),
+            "groups": self._division_group_headers(
+                collapsed_budget, sales_only_groups, group_historical_totals
+            ),
+            "divisions": self._division_headers(divisions),
+        }
+
+    def _division_group_headers(
+        self,
+        collapsed_budget: List[Dict[str, Any]],
+        sales_only_groups: List[Dict[str, Any]],
+        group_historical_totals: Dict[tuple, float],
+    ) -> List[Dict[str, Any]]:
+        """
+        Group-level fields of the allocation rows, in output order
+        Returns list of dicts with: salesperson_id, salesperson_name, customer_class, group_key, brand, has_budget, uses_default_ratios, q1-q4/total_budget_total
+        """
+        headers = []
+        for group, has_budget in [(b, True) for b in collapsed_budget] + [
+            (g, False) for g in sales_only_groups
+        ]:
+            if has_budget:
+                totals = [group[f"q{q}_total"] for q in range(1, 5)]
+                total_budget_total = totals[0] + totals[1] + totals[2] + totals[3]
+            else:
+                totals = [0.0, 0.0, 0.0, 0.0]
+                total_budget_total = 0.0
+            ght_key = (group["group_key"], group["customer_class"])
+            headers.append(
+                {
+                    "salesperson_id": group["salesperson_id"],
+                    "salesperson_name": group["salesperson_name"],
+                    "customer_class": group["customer_class"],
+                    "group_key": group["group_key"],
+                    "brand": group["brand"],
+                    "has_budget": has_budget,
+                    "uses_default_ratios": group_historical_totals.get(ght_key, 0.0)
+                    == 0,
+                    "q1_budget_total": totals[0],
+                    "q2_budget_total": totals[1],
+                    "q3_budget_total": totals[2],
+                    "q4_budget_total": totals[3],
+                    "total_budget_total": total_budget_total,
+                }
+            )
+        headers.sort(
+            key=lambda h: (
+                h["customer_class"],
+                h["salesperson_name"],
+                h["group_key"] or "",
+            )
+        )
+        return headers
+
+    def _division_headers(
+        self, divisions: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """Divisions as they appear in the rows, in div_no order"""
+        return [
+            {"item_division": d["div_no"], "division_name": d["div_desc"]}
+            for d in sorted(divisions, key=lambda d: d["div_no"])
+        ]
+
+    def _build_division_allocations(
+        self, aggregate: bool, use_snapshot: bool
+    ) -> List[Dict[str, Any]]:
+        """Uncached body of get_division_allocations"""
+        return self._combine_division_data(
+            *self._division_inputs(aggregate, use_snapshot)
+        )
+
+    def _division_inputs(self, aggregate: bool, use_snapshot: bool) -> tuple:
+        """
+        Load (mostly from cache) everything the combine step needs
+        Returns the positional arguments of _combine_division_data / _iter_division_rows
+        """
+        # Steps 1-6, 10, 12, 15: 2025 historical inputs
+        baseline = cache.cached(
+            ("division_baseline", aggregate, use_snapshot),
+            (SALES,),
+            lambda: self._load_baseline(aggregate, use_snapshot),
+        )
+        from_snapshot = baseline["from_snapshot"]
+
+        # Steps 7-8: Get normalized budget data, collapsed per salesperson + group_key
+        collapsed_budget = self._get_cached_collapsed_budget()
+
+        # Step 9: Get divisions
+        divisions = self._get_cached_divisions()
+
+        # Step 11: Get default division ratios
+        default_division_ratios = self._get_default_division_ratios(
+            divisions, baseline["overall_division_totals"]
+        )
+
+        # Step 13: Get ratio overrides
+        ratio_overrides = self._get_cached_ratio_overrides()
+
+        # Step 14: Get sales-only groups (groups with sales but no budget)
+        if from_snapshot:
+            sales_only_groups = cache.cached(
+                ("sales_only_groups", True),
+                (SALES, BUDGET),
+                self._get_sales_only_groups_from_snapshot,
+            )
+        else:
+            sales_only_groups = cache.cached(
+                ("sales_only_groups", False),
+                (SALES, BUDGET),
+                lambda: self._get_sales_only_groups([], collapsed_budget),
+            )
+
+        return (
+            collapsed_budget,
+            sales_only_groups,
+            divisions,
+            default_division_ratios,
+            ratio_overrides,
+            baseline["ratios_lookup"],
+            baseline["grouped_sales_lookup"],
+            baseline["group_historical_totals"],
+            baseline["gp_by_division"],
+        )
+
+    def _combine_division_data(
+        self,
+        collapsed_budget: List[Dict[str, Any]],
+        sales_only_groups: List[Dict[str, Any]],
+        divisions: List[Dict[str, Any]],
+        default_division_ratios: Dict[int, float],
+        ratio_overrides: Dict[tuple, float],
+        ratios_lookup: Dict[tuple, float],
+        grouped_sales_lookup: Dict[tuple, float],
+        group_historical_totals: Dict[tuple, float],
+        gp_by_division: Dict[tuple, Dict[str, Any]],
+    ) -> List[Dict[str, Any]]:
+        """
+        Cross budget and sales-only groups with divisions and attach ratios, sales and GP
+        Returns rows sorted by customer_class, salesperson_name, group_key, item_division
+        """
+        return list(
+            self._iter_division_rows(
+                collapsed_budget,
+                sales_only_groups,
+                divisions,
+                default_division_ratios,
+                ratio_overrides,
+                ratios_lookup,
+                grouped_sales_lookup,
+                group_historical_totals,
+                gp_by_division,
+            )
+        )
+
+    def _iter_division_rows(
+        self,
+        collapsed_budget: List[Dict[str, Any]],
+        sales_only_groups: List[Dict[str, Any]],
+        divisions: List[Dict[str, Any]],
+        default_division_ratios: Dict[int, float],
+        ratio_overrides: Dict[tuple, float],
+        ratios_lookup: Dict[tuple, float],
+        grouped_sales_lookup: Dict[tuple, float],
+        group_historical_totals: Dict[tuple, float],
+        gp_by_division: Dict[tuple, Dict[str, Any]],
+        sparse: bool = False,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Step 16: Combine all data (equivalent to the final SELECT with CROSS JOIN and LEFT JOINs)
+        Yields rows already sorted by customer_class, salesperson_name, group_key, item_division,
+        so callers can stream them without holding the whole result
+        sparse=True skips (group, division) pairs with a zero effective ratio, no custom
+        override and no 2025 sales (see get_division_allocations_sparse)
+        """
+        # Budget rows first, then sales-only rows (groups with sales but no budget)
+        groups = [(budget, True) for budget in collapsed_budget] + [
+            (sales_group, False) for sales_group in sales_only_groups
+        ]
+
+        # Total 2025 sales are only shown once per (group_key, customer_class, item_division)
+        # to prevent double-counting when multiple salespeople have budgets for the same group;
+        # the first group in budget-then-sales-only order shows them for every division
+        sales_owner = {}
+        for index, (group, _) in enumerate(groups):
+            sales_owner.setdefault((group["group_key"], group["customer_class"]), index)
+
+        def build_row(index: int, division: Dict[str, Any]) -> Dict[str, Any]:
+            group, has_budget = groups[index]
+
+            # Get keys for lookups
+            group_key = group["group_key"]
+            customer_class = group["customer_class"]
+            item_division = division["div_no"]
+            salesperson_id = group["salesperson_id"]
+
+            # Get historical total for this group
+            ght_key = (group_key, customer_class)
+            group_total_sales = group_historical_totals.get(ght_key, 0.0)
+
+            # Get ratio override if exists (no custom ratio overrides for sales-only rows)
+            if has_budget:
                 override_key = (
                     salesperson_id,
                     customer_class,
@@ -608,29 +1304,32 @@ class DivisionService:
                     item_division,
                 )
                 custom_ratio = ratio_overrides.get(override_key)
+            else:
+                custom_ratio = None
 
-                # Determine effective ratio
-                if custom_ratio is not None:
-                    effective_ratio = custom_ratio
-                    is_custom = True
-                elif group_total_sales == 0:
-                    effective_ratio = default_division_ratios.get(item_division, 0.0)
-                    is_custom = False
-                else:
-                    ratio_key = (group_key, customer_class, item_division)
-                    effective_ratio = ratios_lookup.get(ratio_key, 0.0)
-                    is_custom = False
-
-                # Calculate uses_default_ratios flag
-                uses_default_ratios = (
-                    1 if (group_total_sales == 0 and custom_ratio is None) else 0
-                )
+            # Determine effective ratio
+            if custom_ratio is not None:
+                effective_ratio = custom_ratio
+                is_custom = True
+            elif group_total_sales == 0:
+                effective_ratio = default_division_ratios.get(item_division, 0.0)
+                is_custom = False
+            else:
+                ratio_key = (group_key, customer_class, item_division)
+                effective_ratio = ratios_lookup.get(ratio_key, 0.0)
+                is_custom = False
 
+            # Calculate uses_default_ratios flag
+            uses_default_ratios = (
+                1 if (group_total_sales == 0 and custom_ratio is None) else 0
+            )
+
+            if has_budget:
                 # Get budget totals
-                q1_total = budget["q1_total"]
-                q2_total = budget["q2_total"]
-                q3_total = budget["q3_total"]
-                q4_total = budget["q4_total"]
+                q1_total = group["q1_total"]
+                q2_total = group["q2_total"]
+                q3_total = group["q3_total"]
+                q4_total = group["q4_total"]
                 total_budget_total = q1_total + q2_total + q3_total + q4_total
 
                 # Calculate allocated amounts
@@ -639,362 +1338,379 @@ class DivisionService:
                 q3_allocated = round(q3_total * effective_ratio, 2)
                 q4_allocated = round(q4_total * effective_ratio, 2)
                 total_allocated = round(total_budget_total * effective_ratio, 2)
-
-                # Get division ratio 2025 (without override)
-                if group_total_sales == 0:
-                    division_ratio_2025 = default_division_ratios.get(
-                        item_division, 0.0
-                    )
-                else:
-                    ratio_key = (group_key, customer_class, item_division)
-                    division_ratio_2025 = ratios_lookup.get(ratio_key, 0.0)
-
-                # Get total 2025 sales - only show once per (group_key, customer_class, item_division)
-                # to prevent double-counting when multiple salespeople have budgets for the same group
-                sales_key = (group_key, customer_class, item_division)
-                if sales_key in sales_shown:
-                    # Don't duplicate sales for this group-division combination
-                    total_2025_sales = 0.0
-                    # Also don't duplicate GP values
-                    q1_gp_value = 0.0
-                    q2_gp_value = 0.0
-                    q3_gp_value = 0.0
-                    q4_gp_value = 0.0
-                    total_gp_value = 0.0
-                    gp_percent = None
-                    # For duplicates, set quarterly data to 0/None
-                    q1_sales_display = 0.0
-                    q2_sales_display = 0.0
-                    q3_sales_display = 0.0
-                    q4_sales_display = 0.0
-                    q1_gp_percent_display = None
-                    q2_gp_percent_display = None
-                    q3_gp_percent_display = None
-                    q4_gp_percent_display = None
-                else:
-                    total_2025_sales = grouped_sales_lookup.get(sales_key, 0.0)
-                    sales_shown.add(sales_key)
-
-                    # Get GP data for this division
-                    gp_data = gp_by_division.get(sales_key, {})
-                    gp_percent = gp_data.get("full_year_gp_percent")
-
-                    # Calculate GP$ from actual 2025 sales, not from allocated budget
-                    # Get quarterly sales from GP data
-                    q1_sales = gp_data.get("q1_sales", 0.0) if gp_data else 0.0
-                    q2_sales = gp_data.get("q2_sales", 0.0) if gp_data else 0.0
-                    q3_sales = gp_data.get("q3_sales", 0.0) if gp_data else 0.0
-                    q4_sales = gp_data.get("q4_sales", 0.0) if gp_data else 0.0
-
-                    # Use quarter-specific GP% if available, otherwise use full year
-                    q1_gp_percent = gp_data.get("q1_gp_percent") or gp_percent
-                    q2_gp_percent = gp_data.get("q2_gp_percent") or gp_percent
-                    q3_gp_percent = gp_data.get("q3_gp_percent") or gp_percent
-                    q4_gp_percent = gp_data.get("q4_gp_percent") or gp_percent
-
-                    # Calculate GP$ from actual quarterly sales
-                    q1_gp_value = (
-                        round(q1_sales * (q1_gp_percent or 0), 2)
-                        if q1_gp_percent and q1_sales > 0
-                        else 0.0
-                    )
-                    q2_gp_value = (
-                        round(q2_sales * (q2_gp_percent or 0), 2)
-                        if q2_gp_percent and q2_sales > 0
-                        else 0.0
-                    )
-                    q3_gp_value = (
-                        round(q3_sales * (q3_gp_percent or 0), 2)
-                        if q3_gp_percent and q3_sales > 0
-                        else 0.0
-                    )
-                    q4_gp_value = (
-                        round(q4_sales * (q4_gp_percent or 0), 2)
-                        if q4_gp_percent and q4_sales > 0
-                        else 0.0
-                    )
-                    # Total GP$ from actual total sales
-                    total_gp_value = (
-                        round(total_2025_sales * (gp_percent or 0), 2)
-                        if gp_percent and total_2025_sales > 0
-                        else 0.0
-                    )
-
-                    # Get quarterly sales and GP% for display
-                    q1_sales_display = q1_sales
-                    q2_sales_display = q2_sales
-                    q3_sales_display = q3_sales
-                    q4_sales_display = q4_sales
-                    q1_gp_percent_display = q1_gp_percent
-                    q2_gp_percent_display = q2_gp_percent
-                    q3_gp_percent_display = q3_gp_percent
-                    q4_gp_percent_display = q4_gp_percent
-
-                division_data.append(
-                    {
-                        "salesperson_id": salesperson_id,
-                        "salesperson_name": budget["salesperson_name"],
-                        "customer_class": customer_class,
-                        "group_key": group_key,
-                        "brand": budget["brand"],
-                        "item_division": item_division,
-                        "division_name": division["div_desc"],
-                        "effective_ratio": effective_ratio,
-                        "is_custom": bool(is_custom),
-                        "uses_default_ratios": bool(uses_default_ratios),
-                        "q1_budget_total": q1_total,
-                        "q2_budget_total": q2_total,
-                        "q3_budget_total": q3_total,
-                        "q4_budget_total": q4_total,
-                        "total_budget_total": total_budget_total,
-                        "q1_allocated": q1_allocated,
-                        "q2_allocated": q2_allocated,
-                        "q3_allocated": q3_allocated,
-                        "q4_allocated": q4_allocated,
-                        "total_allocated": total_allocated,
-                        "division_ratio_2025": division_ratio_2025,
-                        "total_2025_sales": total_2025_sales,
-                        "q1_sales": q1_sales_display,
-                        "q2_sales": q2_sales_display,
-                        "q3_sales": q3_sales_display,
-                        "q4_sales": q4_sales_display,
-                        "gp_percent": gp_percent,
-                        "q1_gp_percent": q1_gp_percent_display,
-                        "q2_gp_percent": q2_gp_percent_display,
-                        "q3_gp_percent": q3_gp_percent_display,
-                        "q4_gp_percent": q4_gp_percent_display,
-                        "q1_gp_value": q1_gp_value,
-                        "q2_gp_value": q2_gp_value,
-                        "q3_gp_value": q3_gp_value,
-                        "q4_gp_value": q4_gp_value,
-                        "total_gp_value": total_gp_value,
-                        "has_budget": True,
-                    }
-                )
-
-        # Process sales-only rows (groups with sales but no budget)
-        for sales_group in sales_only_groups:
-            for division in divisions:
-                # Get keys for lookups
-                group_key = sales_group["group_key"]
-                customer_class = sales_group["customer_class"]
-                item_division = division["div_no"]
-                salesperson_id = sales_group["salesperson_id"]
-
-                # Get historical total for this group
-                ght_key = (group_key, customer_class)
-                group_total_sales = group_historical_totals.get(ght_key, 0.0)
-
-                # No custom ratio overrides for sales-only rows
-                custom_ratio = None
-
-                # Determine effective ratio (no custom overrides for sales-only)
-                if group_total_sales == 0:
-                    effective_ratio = default_division_ratios.get(item_division, 0.0)
-                else:
-                    ratio_key = (group_key, customer_class, item_division)
-                    effective_ratio = ratios_lookup.get(ratio_key, 0.0)
-
-                is_custom = False
-                uses_default_ratios = 1 if (group_total_sales == 0) else 0
-
-                # Budget totals are 0 for sales-only rows
+            else:
+                # Budget totals and allocated amounts are 0 for sales-only rows
                 q1_total = 0.0
                 q2_total = 0.0
                 q3_total = 0.0
                 q4_total = 0.0
                 total_budget_total = 0.0
-
-                # Allocated amounts are 0 for sales-only rows
                 q1_allocated = 0.0
                 q2_allocated = 0.0
                 q3_allocated = 0.0
                 q4_allocated = 0.0
                 total_allocated = 0.0
 
-                # Get division ratio 2025 (without override)
-                if group_total_sales == 0:
-                    division_ratio_2025 = default_division_ratios.get(
-                        item_division, 0.0
-                    )
-                else:
-                    ratio_key = (group_key, customer_class, item_division)
-                    division_ratio_2025 = ratios_lookup.get(ratio_key, 0.0)
-
-                # Get total 2025 sales - only show once per (group_key, customer_class, item_division)
-                sales_key = (group_key, customer_class, item_division)
-                if sales_key in sales_shown:
-                    total_2025_sales = 0.0
-                    # Also don't duplicate GP values
-                    q1_gp_value = 0.0
-                    q2_gp_value = 0.0
-                    q3_gp_value = 0.0
-                    q4_gp_value = 0.0
-                    total_gp_value = 0.0
-                    gp_percent = None
-                    # Set quarterly data to 0/None for duplicates
-                    q1_sales_display = 0.0
-                    q2_sales_display = 0.0
-                    q3_sales_display = 0.0
-                    q4_sales_display = 0.0
-                    q1_gp_percent_display = None
-                    q2_gp_percent_display = None
-                    q3_gp_percent_display = None
-                    q4_gp_percent_display = None
-                else:
-                    total_2025_sales = grouped_sales_lookup.get(sales_key, 0.0)
-                    sales_shown.add(sales_key)
-
-                    # Get GP data for this division
-                    gp_data = gp_by_division.get(sales_key, {})
-                    gp_percent = gp_data.get("full_year_gp_percent")
-
-                    # Calculate GP$ from actual 2025 sales (not from allocated, which is 0 for sales-only)
-                    # Get quarterly sales from GP data
-                    q1_sales = gp_data.get("q1_sales", 0.0) if gp_data else 0.0
-                    q2_sales = gp_data.get("q2_sales", 0.0) if gp_data else 0.0
-                    q3_sales = gp_data.get("q3_sales", 0.0) if gp_data else 0.0
-                    q4_sales = gp_data.get("q4_sales", 0.0) if gp_data else 0.0
-
-                    # Use quarter-specific GP% if available, otherwise use full year
-                    q1_gp_percent = gp_data.get("q1_gp_percent") or gp_percent
-                    q2_gp_percent = gp_data.get("q2_gp_percent") or gp_percent
-                    q3_gp_percent = gp_data.get("q3_gp_percent") or gp_percent
-                    q4_gp_percent = gp_data.get("q4_gp_percent") or gp_percent
-
-                    # Calculate GP$ from actual quarterly sales
-                    q1_gp_value = (
-                        round(q1_sales * (q1_gp_percent or 0), 2)
-                        if q1_gp_percent and q1_sales > 0
-                        else 0.0
-                    )
-                    q2_gp_value = (
-                        round(q2_sales * (q2_gp_percent or 0), 2)
-                        if q2_gp_percent and q2_sales > 0
-                        else 0.0
-                    )
-                    q3_gp_value = (
-                        round(q3_sales * (q3_gp_percent or 0), 2)
-                        if q3_gp_percent and q3_sales > 0
-                        else 0.0
-                    )
-                    q4_gp_value = (
-                        round(q4_sales * (q4_gp_percent or 0), 2)
-                        if q4_gp_percent and q4_sales > 0
-                        else 0.0
-                    )
-                    # Total GP$ from actual total sales
-                    total_gp_value = (
-                        round(total_2025_sales * (gp_percent or 0), 2)
-                        if gp_percent and total_2025_sales > 0
-                        else 0.0
-                    )
-
-                    # Get quarterly sales and GP% for display
-                    q1_sales_display = q1_sales
-                    q2_sales_display = q2_sales
-                    q3_sales_display = q3_sales
-                    q4_sales_display = q4_sales
-                    q1_gp_percent_display = q1_gp_percent
-                    q2_gp_percent_display = q2_gp_percent
-                    q3_gp_percent_display = q3_gp_percent
-                    q4_gp_percent_display = q4_gp_percent
-
-                division_data.append(
-                    {
-                        "salesperson_id": salesperson_id,
-                        "salesperson_name": sales_group["salesperson_name"],
-                        "customer_class": customer_class,
-                        "group_key": group_key,
-                        "brand": sales_group["brand"],
-                        "item_division": item_division,
-                        "division_name": division["div_desc"],
-                        "effective_ratio": effective_ratio,
-                        "is_custom": is_custom,
-                        "uses_default_ratios": bool(uses_default_ratios),
-                        "q1_budget_total": q1_total,
-                        "q2_budget_total": q2_total,
-                        "q3_budget_total": q3_total,
-                        "q4_budget_total": q4_total,
-                        "total_budget_total": total_budget_total,
-                        "q1_allocated": q1_allocated,
-                        "q2_allocated": q2_allocated,
-                        "q3_allocated": q3_allocated,
-                        "q4_allocated": q4_allocated,
-                        "total_allocated": total_allocated,
-                        "division_ratio_2025": division_ratio_2025,
-                        "total_2025_sales": total_2025_sales,
-                        "q1_sales": q1_sales_display,
-                        "q2_sales": q2_sales_display,
-                        "q3_sales": q3_sales_display,
-                        "q4_sales": q4_sales_display,
-                        "gp_percent": gp_percent,
-                        "q1_gp_percent": q1_gp_percent_display,
-                        "q2_gp_percent": q2_gp_percent_display,
-                        "q3_gp_percent": q3_gp_percent_display,
-                        "q4_gp_percent": q4_gp_percent_display,
-                        "q1_gp_value": q1_gp_value,
-                        "q2_gp_value": q2_gp_value,
-                        "q3_gp_value": q3_gp_value,
-                        "q4_gp_value": q4_gp_value,
-                        "total_gp_value": total_gp_value,
-                        "has_budget": False,
-                    }
+            # Get division ratio 2025 (without override)
+            if group_total_sales == 0:
+                division_ratio_2025 = default_division_ratios.get(item_division, 0.0)
+            else:
+                ratio_key = (group_key, customer_class, item_division)
+                division_ratio_2025 = ratios_lookup.get(ratio_key, 0.0)
+
+            sales_key = (group_key, customer_class, item_division)
+            if sales_owner[ght_key] != index:
+                # Don't duplicate sales for this group-division combination
+                total_2025_sales = 0.0
+                # Also don't duplicate GP values
+                q1_gp_value = 0.0
+                q2_gp_value = 0.0
+                q3_gp_value = 0.0
+                q4_gp_value = 0.0
+                total_gp_value = 0.0
+                gp_percent = None
+                # For duplicates, set quarterly data to 0/None
+                q1_sales_display = 0.0
+                q2_sales_display = 0.0
+                q3_sales_display = 0.0
+                q4_sales_display = 0.0
+                q1_gp_percent_display = None
+                q2_gp_percent_display = None
+                q3_gp_percent_display = None
+                q4_gp_percent_display = None
+            else:
+                total_2025_sales = grouped_sales_lookup.get(sales_key, 0.0)
+
+                # Get GP data for this division
+                gp_data = gp_by_division.get(sales_key, {})
+                gp_percent = gp_data.get("full_year_gp_percent")
+
+                # Calculate GP$ from actual 2025 sales, not from allocated budget
+                # Get quarterly sales from GP data
+                q1_sales = gp_data.get("q1_sales", 0.0) if gp_data else 0.0
+                q2_sales = gp_data.get("q2_sales", 0.0) if gp_data else 0.0
+                q3_sales = gp_data.get("q3_sales", 0.0) if gp_data else 0.0
+                q4_sales = gp_data.get("q4_sales", 0.0) if gp_data else 0.0
+
+                # Use quarter-specific GP% if available, otherwise use full year
+                q1_gp_percent = gp_data.get("q1_gp_percent") or gp_percent
+                q2_gp_percent = gp_data.get("q2_gp_percent") or gp_percent
+                q3_gp_percent = gp_data.get("q3_gp_percent") or gp_percent
+                q4_gp_percent = gp_data.get("q4_gp_percent") or gp_percent
+
+                # Calculate GP$ from actual quarterly sales
+                q1_gp_value = (
+                    round(q1_sales * (q1_gp_percent or 0), 2)
+                    if q1_gp_percent and q1_sales > 0
+                    else 0.0
+                )
+                q2_gp_value = (
+                    round(q2_sales * (q2_gp_percent or 0), 2)
+                    if q2_gp_percent and q2_sales > 0
+                    else 0.0
                 )
+                q3_gp_value = (
+                    round(q3_sales * (q3_gp_percent or 0), 2)
+                    if q3_gp_percent and q3_sales > 0
+                    else 0.0
+                )
+                q4_gp_value = (
+                    round(q4_sales * (q4_gp_percent or 0), 2)
+                    if q4_gp_percent and q4_sales > 0
+                    else 0.0
+                )
+                # Total GP$ from actual total sales
+                total_gp_value = (
+                    round(total_2025_sales * (gp_percent or 0), 2)
+                    if gp_percent and total_2025_sales > 0
+                    else 0.0
+                )
+
+                # Get quarterly sales and GP% for display
+                q1_sales_display = q1_sales
+                q2_sales_display = q2_sales
+                q3_sales_display = q3_sales
+                q4_sales_display = q4_sales
+                q1_gp_percent_display = q1_gp_percent
+                q2_gp_percent_display = q2_gp_percent
+                q3_gp_percent_display = q3_gp_percent
+                q4_gp_percent_display = q4_gp_percent
+
+            return {
+                "salesperson_id": salesperson_id,
+                "salesperson_name": group["salesperson_name"],
+                "customer_class": customer_class,
+                "group_key": group_key,
+                "brand": group["brand"],
+                "item_division": item_division,
+                "division_name": division["div_desc"],
+                "effective_ratio": effective_ratio,
+                "is_custom": bool(is_custom),
+                "uses_default_ratios": bool(uses_default_ratios),
+                "q1_budget_total": q1_total,
+                "q2_budget_total": q2_total,
+                "q3_budget_total": q3_total,
+                "q4_budget_total": q4_total,
+                "total_budget_total": total_budget_total,
+                "q1_allocated": q1_allocated,
+                "q2_allocated": q2_allocated,
+                "q3_allocated": q3_allocated,
+                "q4_allocated": q4_allocated,
+                "total_allocated": total_allocated,
+                "division_ratio_2025": division_ratio_2025,
+                "total_2025_sales": total_2025_sales,
+                "q1_sales": q1_sales_display,
+                "q2_sales": q2_sales_display,
+                "q3_sales": q3_sales_display,
+                "q4_sales": q4_sales_display,
+                "gp_percent": gp_percent,
+                "q1_gp_percent": q1_gp_percent_display,
+                "q2_gp_percent": q2_gp_percent_display,
+                "q3_gp_percent": q3_gp_percent_display,
+                "q4_gp_percent": q4_gp_percent_display,
+                "q1_gp_value": q1_gp_value,
+                "q2_gp_value": q2_gp_value,
+                "q3_gp_value": q3_gp_value,
+                "q4_gp_value": q4_gp_value,
+                "total_gp_value": total_gp_value,
+                "has_budget": has_budget,
+            }
 
-        # Sort by customer_class, salesperson_name, group_key, item_division
-        division_data.sort(
-            key=lambda x: (
-                x["customer_class"],
-                x["salesperson_name"],
-                x["group_key"] or "",
-                x["item_division"],
+        def is_used(index: int, division: Dict[str, Any]) -> bool:
+            group, has_budget = groups[index]
+            item_division = division["div_no"]
+            sales_key = (group["group_key"], group["customer_class"], item_division)
+            if grouped_sales_lookup.get(sales_key, 0.0) != 0:
+                return True
+            if (
+                has_budget
+                and (
+                    group["salesperson_id"],
+                    group["customer_class"],
+                    group["group_key"],
+                    item_division,
+                )
+                in ratio_overrides
+            ):
+                return True
+            ght_key = (group["group_key"], group["customer_class"])
+            if group_historical_totals.get(ght_key, 0.0) == 0:
+                return default_division_ratios.get(item_division, 0.0) != 0
+            return ratios_lookup.get(sales_key, 0.0) != 0
+
+        # Sort by customer_class, salesperson_name, group_key, item_division.
+        # Sorting groups (stable) and walking divisions in div_no order inside each run
+        # of equal group keys yields the same order as sorting the full cross join.
+        def group_sort_key(index: int) -> tuple:
+            group = groups[index][0]
+            return (
+                group["customer_class"],
+                group["salesperson_name"],
+                group["group_key"] or "",
             )
+
+        ordered = sorted(range(len(groups)), key=group_sort_key)
+        sorted_divisions = sorted(divisions, key=lambda d: d["div_no"])
+
+        start = 0
+        while start < len(ordered):
+            run_key = group_sort_key(ordered[start])
+            end = start + 1
+            while end < len(ordered) and group_sort_key(ordered[end]) == run_key:
+                end += 1
+            for division in sorted_divisions:
+                for index in ordered[start:end]:
+                    if sparse and not is_used(index, division):
+                        continue
+                    yield build_row(index, division)
+            start = end
+
+    def _get_sales_columns(self, aggregate: bool = False) -> DivisionBaseline:
+        """
+        Load normalized sales straight into column arrays (no per-row dicts)
+        Returns the DivisionBaseline built from them
+        """
+        result = self.db.exec(
+            SALES_AGGREGATED_QUERY if aggregate else SALES_NORMALIZED_QUERY
+        )
+        columns = list(zip(*result)) or [()] * 6
+        group_keys, customer_classes, item_divisions, ext_sales, ext_cost, periods = (
+            columns
+        )
+        return DivisionBaseline.from_sales(
+            list(group_keys),
+            list(customer_classes),
+            list(item_divisions),
+            to_float_array(ext_sales),
+            to_float_array(ext_cost),
+            period_quarters(periods),
         )
 
-        return division_data
+    def get_division_allocations_columnar(
+        self, aggregate: bool = False, use_snapshot: bool = True
+    ) -> List[Dict[str, Any]]:
+        """
+        Same rows as get_division_allocations, computed with the NumPy engine
+        in services/division_engine.py
+        """
+        return cache.cached(
+            ("division_allocations_columnar", aggregate, use_snapshot),
+            (SALES, BUDGET, OVERRIDES, DIVISIONS),
+            lambda: self._build_division_allocations_columnar(aggregate, use_snapshot),
+        )
+
+    def iter_division_allocations_columnar(
+        self, aggregate: bool = False, use_snapshot: bool = True
+    ) -> Iterator[Dict[str, Any]]:
+        """Rows of get_division_allocations_columnar, yielded one at a time in sort order"""
+        return self._division_allocations_columnar(aggregate, use_snapshot).iter_rows()
+
+    def _build_division_allocations_columnar(
+        self, aggregate: bool, use_snapshot: bool
+    ) -> List[Dict[str, Any]]:
+        """Uncached body of get_division_allocations_columnar"""
+        return self._division_allocations_columnar(aggregate, use_snapshot).rows()
+
+    def get_division_allocations_columnar_sparse(
+        self, aggregate: bool = False, use_snapshot: bool = True
+    ) -> Dict[str, Any]:
+        """Same result as get_division_allocations_sparse, computed with the NumPy engine"""
+        return cache.cached(
+            ("division_allocations_columnar_sparse", aggregate, use_snapshot),
+            (SALES, BUDGET, OVERRIDES, DIVISIONS),
+            lambda: self._build_division_allocations_columnar_sparse(
+                aggregate, use_snapshot
+            ),
+        )
+
+    def _build_division_allocations_columnar_sparse(
+        self, aggregate: bool, use_snapshot: bool
+    ) -> Dict[str, Any]:
+        """Uncached body of get_division_allocations_columnar_sparse"""
+        allocations = self._division_allocations_columnar(aggregate, use_snapshot)
+        n_budget = int(allocations.has_budget.sum())
+        baseline = allocations.baseline
+        group_totals = dict(zip(baseline.pair_keys, baseline.pair_totals.tolist()))
+        return {
+            "data": list(allocations.iter_rows(sparse=True)),
+            "groups": self._division_group_headers(
+                allocations.groups[:n_budget],
+                allocations.groups[n_budget:],
+                group_totals,
+            ),
+            "divisions": self._division_headers(allocations.divisions),
+        }
+
+    def _load_baseline_columns(
+        self, aggregate: bool, use_snapshot: bool
+    ) -> Tuple[DivisionBaseline, bool]:
+        """
+        Columnar counterpart of _load_baseline
+        Returns (baseline, from_snapshot)
+        """
+        rows = self._get_baseline_snapshot_rows() if use_snapshot else None
+        if rows is not None:
+            baseline = DivisionBaseline.from_snapshot(
+                *rows, self._get_snapshot_division_totals()
+            )
+            return baseline, True
+        return self._get_sales_columns(aggregate), False
+
+    def _division_allocations_columnar(
+        self, aggregate: bool, use_snapshot: bool
+    ) -> DivisionAllocations:
+        """Columnar allocation arrays built from (mostly cached) inputs"""
+        baseline, from_snapshot = cache.cached(
+            ("division_columns", aggregate, use_snapshot),
+            (SALES,),
+            lambda: self._load_baseline_columns(aggregate, use_snapshot),
+        )
+        collapsed_budget = cache.cached(
+            ("collapsed_budget",),
+            (BUDGET,),
+            lambda: collapse_budget(self._get_budget_normalized()),
+        )
+        divisions = self._get_cached_divisions()
+        ratio_overrides = self._get_cached_ratio_overrides()
+        if from_snapshot:
+            sales_only_groups = cache.cached(
+                ("sales_only_groups", True),
+                (SALES, BUDGET),
+                self._get_sales_only_groups_from_snapshot,
+            )
+        else:
+            sales_only_groups = cache.cached(
+                ("sales_only_groups", False),
+                (SALES, BUDGET),
+                lambda: self._get_sales_only_groups([], collapsed_budget),
+            )
+
+        return DivisionAllocations(
+            baseline, collapsed_budget, sales_only_groups, divisions, ratio_overrides
+        )
 
     def save_ratio_overrides(self, overrides: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
         Save custom ratio overrides for divisions
+        One INSERT ... ON DUPLICATE KEY UPDATE on the group/division unique key
         """
+        if not overrides:
+            return {
+                "success": True,
+                "saved_count": 0,
+                "updated_count": 0,
+                "total_processed": 0,
+            }
+
         try:
-            saved_count = 0
-            updated_count = 0
-
-            for override in overrides:
-                # Check if override already exists
-                existing = self.db.exec(
-                    select(DivisionRatioOverride).where(
-                        DivisionRatioOverride.salesperson_id
-                        == override["salesperson_id"],
-                        DivisionRatioOverride.customer_class
-                        == override["customer_class"],
-                        DivisionRatioOverride.group_key == override["group_key"],
-                        DivisionRatioOverride.item_division
-                        == override["item_division"],
-                    )
-                ).first()
-
-                if existing:
-                    # Update existing override
-                    existing.custom_ratio = override["custom_ratio"]
-                    existing.updated_at = datetime.utcnow()
-                    updated_count += 1
-                else:
-                    # Create new override
-                    new_override = DivisionRatioOverride(
-                        salesperson_id=override["salesperson_id"],
-                        salesperson_name=override["salesperson_name"],
-                        customer_class=override["customer_class"],
-                        group_key=override["group_key"],
-                        item_division=override["item_division"],
-                        custom_ratio=override["custom_ratio"],
-                    )
-                    self.db.add(new_override)
-                    saved_count += 1
+            now = datetime.utcnow()
+            rows = [
+                {
+                    "salesperson_id": override["salesperson_id"],
+                    "salesperson_name": override["salesperson_name"],
+                    "customer_class": override["customer_class"],
+                    "group_key": override["group_key"],
+                    "item_division": override["item_division"],
+                    "custom_ratio": override["custom_ratio"],
+                    "created_at": now,
+                    "updated_at": now,
+                }
+                for override in overrides
+            ]
+            # Affected-row counts can't tell an insert from an unchanged update,
+            # so new keys are counted from the rows that exist beforehand
+            key_columns = (
+                DivisionRatioOverride.salesperson_id,
+                DivisionRatioOverride.customer_class,
+                DivisionRatioOverride.group_key,
+                DivisionRatioOverride.item_division,
+            )
+            keys = {
+                (
+                    row["salesperson_id"],
+                    row["customer_class"],
+                    row["group_key"],
+                    row["item_division"],
+                )
+                for row in rows
+            }
+            existing = {
+                tuple(row)
+                for row in self.db.exec(
+                    select(*key_columns).where(tuple_(*key_columns).in_(keys))
+                )
+            }
+            saved_count = len(keys - existing)
+            updated_count = len(rows) - saved_count
 
+            statement = mysql_insert(DivisionRatioOverride).values(rows)
+            statement = statement.on_duplicate_key_update(
+                custom_ratio=statement.inserted.custom_ratio,
+                updated_at=statement.inserted.updated_at,
+            )
+            self.db.connection().execute(statement)
             self.db.commit()
+            cache.bump(OVERRIDES)
 
             return {
                 "success": True,
@@ -1030,6 +1746,7 @@ class DivisionService:
             if override:
                 self.db.delete(override)
                 self.db.commit()
+                cache.bump(OVERRIDES)
                 return True
             return False
 
@@ -1059,78 +1776,66 @@ class DivisionService:
                 )
             )
             self.db.commit()
+            cache.bump(OVERRIDES)
             return result.rowcount
 
         except Exception as e:
             self.db.rollback()
             raise e
 
+    def _load_group_baseline(
+        self, customer_class: str, group_key: str
+    ) -> Dict[str, Any]:
+        """One group's 2025 inputs from the snapshot, else from its raw sales"""
+        baseline = self._get_group_baseline_snapshot(customer_class, group_key)
+        if baseline is None:
+            baseline = self._compute_group_baseline(customer_class, group_key)
+        return baseline
+
     def get_division_allocations_for_group(
-        self, salesperson_id: int, customer_class: str, group_key: str
+        self,
+        salesperson_id: int,
+        customer_class: str,
+        group_key: str,
+        candidate_overrides: Optional[Dict[tuple, float]] = None,
     ) -> List[Dict[str, Any]]:
         """
         Get allocations for a single group (filtered)
+        Only this group's sales, budget and overrides are read; the 2025 baseline
+        and the company-wide default division ratios come from the cache
+        candidate_overrides are applied on top of the stored ones without saving
         """
-        # Step 1: Get normalized sales data
-        sales_norm = self._get_sales_normalized()
-
-        # Step 2: Group sales by group_key + division
-        grouped_sales = self._get_grouped_sales(sales_norm)
-
-        # Step 3: Calculate group totals
-        group_totals = self._get_group_totals(grouped_sales)
-
-        # Step 4: Calculate raw ratios
-        ratios_raw = self._get_ratios_raw(grouped_sales, group_totals)
-
-        # Step 5: Deduplicate ratios
-        ratios = self._get_ratios_deduplicated(ratios_raw)
-
-        # Step 6: Normalize ratios
-        ratios_normalized = self._get_ratios_normalized(ratios)
+        # Steps 1-6, 12, 15: this group's 2025 inputs
+        baseline = cache.cached(
+            ("group_baseline", customer_class, group_key),
+            (SALES,),
+            lambda: self._load_group_baseline(customer_class, group_key),
+        )
 
-        # Step 7: Get normalized budget data
-        budget_norm = self._get_budget_normalized()
+        # Step 7: Get normalized budget data for the group
+        budget_norm = self._get_budget_normalized(
+            salesperson_id, customer_class, group_key
+        )
 
         # Step 8: Collapse budget per salesperson + group_key
         collapsed_budget = self._get_collapsed_budget(budget_norm)
 
         # Step 9: Get divisions
-        divisions = self._get_divisions_deduplicated()
+        divisions = self._get_cached_divisions()
 
-        # Step 10: Get overall division totals
-        overall_division_totals = self._get_overall_division_totals(grouped_sales)
-
-        # Step 11: Get default division ratios
+        # Steps 10-11: Get default division ratios from cached company-wide totals
         default_division_ratios = self._get_default_division_ratios(
-            divisions, overall_division_totals
+            divisions, self._get_cached_overall_division_totals()
         )
 
-        # Step 12: Get group historical totals
-        group_historical_totals = self._get_group_historical_totals(grouped_sales)
-
-        # Step 13: Get ratio overrides
-        ratio_overrides = self._get_ratio_overrides()
-
-        # Step 14: Get GP data by division
-        gp_by_division = self._get_gp_by_division(sales_norm)
-
-        # Create lookup dictionaries for efficient access
-        ratios_lookup = {
-            (r["group_key"], r["customer_class"], r["item_division"]): r[
-                "division_ratio_2025"
-            ]
-            for r in ratios_normalized
-        }
-
-        grouped_sales_lookup = {
-            (gs["group_key"], gs["customer_class"], gs["item_division"]): gs[
-                "total_sales"
-            ]
-            for gs in grouped_sales
-        }
+        # Step 13: Get ratio overrides for the group
+        ratio_overrides = self._get_ratio_overrides(
+            salesperson_id, customer_class, group_key
+        )
+        if candidate_overrides:
+            ratio_overrides.update(candidate_overrides)
 
-        # Step 15: Filter collapsed_budget to only the requested group
+        # Step 14: Filter collapsed_budget to only the requested group
         filtered_budgets = [
             b
             for b in collapsed_budget
@@ -1139,201 +1844,49 @@ class DivisionService:
             and b["group_key"] == group_key
         ]
 
-        # Step 16: Combine all data (equivalent to the final SELECT with CROSS JOIN and LEFT JOINs)
-        division_data = []
-        # Track which (group_key, customer_class, item_division) combinations have already shown sales
-        # to prevent double-counting when multiple salespeople have budgets for the same group
-        sales_shown = set()
-
-        for budget in filtered_budgets:
-            for division in divisions:
-                # Get keys for lookups
-                group_key_val = budget["group_key"]
-                customer_class_val = budget["customer_class"]
-                item_division = division["div_no"]
-                salesperson_id_val = budget["salesperson_id"]
-
-                # Get historical total for this group
-                ght_key = (group_key_val, customer_class_val)
-                group_total_sales = group_historical_totals.get(ght_key, 0.0)
-
-                # Get ratio override if exists
-                override_key = (
-                    salesperson_id_val,
-                    customer_class_val,
-                    group_key_val,
-                    item_division,
-                )
-                custom_ratio = ratio_overrides.get(override_key)
-
-                # Determine effective ratio
-                if custom_ratio is not None:
-                    effective_ratio = custom_ratio
-                    is_custom = True
-                elif group_total_sales == 0:
-                    effective_ratio = default_division_ratios.get(item_division, 0.0)
-                    is_custom = False
-                else:
-                    ratio_key = (group_key_val, customer_class_val, item_division)
-                    effective_ratio = ratios_lookup.get(ratio_key, 0.0)
-                    is_custom = False
-
-                # Calculate uses_default_ratios flag
-                uses_default_ratios = (
-                    1 if (group_total_sales == 0 and custom_ratio is None) else 0
-                )
-
-                # Get budget totals
-                q1_total = budget["q1_total"]
-                q2_total = budget["q2_total"]
-                q3_total = budget["q3_total"]
-                q4_total = budget["q4_total"]
-                total_budget_total = q1_total + q2_total + q3_total + q4_total
-
-                # Calculate allocated amounts
-                q1_allocated = round(q1_total * effective_ratio, 2)
-                q2_allocated = round(q2_total * effective_ratio, 2)
-                q3_allocated = round(q3_total * effective_ratio, 2)
-                q4_allocated = round(q4_total * effective_ratio, 2)
-                total_allocated = round(total_budget_total * effective_ratio, 2)
-
-                # Get division ratio 2025 (without override)
-                if group_total_sales == 0:
-                    division_ratio_2025 = default_division_ratios.get(
-                        item_division, 0.0
-                    )
-                else:
-                    ratio_key = (group_key_val, customer_class_val, item_division)
-                    division_ratio_2025 = ratios_lookup.get(ratio_key, 0.0)
-
-                # Get total 2025 sales - only show once per (group_key, customer_class, item_division)
-                # to prevent double-counting when multiple salespeople have budgets for the same group
-                sales_key = (group_key_val, customer_class_val, item_division)
-                if sales_key in sales_shown:
-                    # Don't duplicate sales for this group-division combination
-                    total_2025_sales = 0.0
-                    # Also don't duplicate GP values
-                    q1_gp_value = 0.0
-                    q2_gp_value = 0.0
-                    q3_gp_value = 0.0
-                    q4_gp_value = 0.0
-                    total_gp_value = 0.0
-                    gp_percent = None
-                    # Set quarterly data to 0/None for duplicates
-                    q1_sales_display = 0.0
-                    q2_sales_display = 0.0
-                    q3_sales_display = 0.0
-                    q4_sales_display = 0.0
-                    q1_gp_percent_display = None
-                    q2_gp_percent_display = None
-                    q3_gp_percent_display = None
-                    q4_gp_percent_display = None
-                else:
-                    total_2025_sales = grouped_sales_lookup.get(sales_key, 0.0)
-                    sales_shown.add(sales_key)
-
-                    # Get GP data for this division
-                    gp_data = gp_by_division.get(sales_key, {})
-                    gp_percent = gp_data.get("full_year_gp_percent")
-
-                    # Calculate GP$ from actual 2025 sales, not from allocated budget
-                    # Get quarterly sales from GP data
-                    q1_sales = gp_data.get("q1_sales", 0.0) if gp_data else 0.0
-                    q2_sales = gp_data.get("q2_sales", 0.0) if gp_data else 0.0
-                    q3_sales = gp_data.get("q3_sales", 0.0) if gp_data else 0.0
-                    q4_sales = gp_data.get("q4_sales", 0.0) if gp_data else 0.0
-
-                    # Use quarter-specific GP% if available, otherwise use full year
-                    q1_gp_percent = gp_data.get("q1_gp_percent") or gp_percent
-                    q2_gp_percent = gp_data.get("q2_gp_percent") or gp_percent
-                    q3_gp_percent = gp_data.get("q3_gp_percent") or gp_percent
-                    q4_gp_percent = gp_data.get("q4_gp_percent") or gp_percent
-
-                    # Calculate GP$ from actual quarterly sales
-                    q1_gp_value = (
-                        round(q1_sales * (q1_gp_percent or 0), 2)
-                        if q1_gp_percent and q1_sales > 0
-                        else 0.0
-                    )
-                    q2_gp_value = (
-                        round(q2_sales * (q2_gp_percent or 0), 2)
-                        if q2_gp_percent and q2_sales > 0
-                        else 0.0
-                    )
-                    q3_gp_value = (
-                        round(q3_sales * (q3_gp_percent or 0), 2)
-                        if q3_gp_percent and q3_sales > 0
-                        else 0.0
-                    )
-                    q4_gp_value = (
-                        round(q4_sales * (q4_gp_percent or 0), 2)
-                        if q4_gp_percent and q4_sales > 0
-                        else 0.0
-                    )
-                    # Total GP$ from actual total sales
-                    total_gp_value = (
-                        round(total_2025_sales * (gp_percent or 0), 2)
-                        if gp_percent and total_2025_sales > 0
-                        else 0.0
-                    )
-
-                    # Get quarterly sales and GP% for display
-                    q1_sales_display = q1_sales
-                    q2_sales_display = q2_sales
-                    q3_sales_display = q3_sales
-                    q4_sales_display = q4_sales
-                    q1_gp_percent_display = q1_gp_percent
-                    q2_gp_percent_display = q2_gp_percent
-                    q3_gp_percent_display = q3_gp_percent
-                    q4_gp_percent_display = q4_gp_percent
-
-            division_data.append(
-                {
-                    "salesperson_id": salesperson_id_val,
-                    "salesperson_name": budget["salesperson_name"],
-                    "customer_class": customer_class_val,
-                    "group_key": group_key_val,
-                    "brand": budget["brand"],
-                    "item_division": item_division,
-                    "division_name": division["div_desc"],
-                    "effective_ratio": effective_ratio,
-                    "is_custom": bool(is_custom),
-                    "uses_default_ratios": bool(uses_default_ratios),
-                    "q1_budget_total": q1_total,
-                    "q2_budget_total": q2_total,
-                    "q3_budget_total": q3_total,
-                    "q4_budget_total": q4_total,
-                    "total_budget_total": total_budget_total,
-                    "q1_allocated": q1_allocated,
-                    "q2_allocated": q2_allocated,
-                    "q3_allocated": q3_allocated,
-                    "q4_allocated": q4_allocated,
-                    "total_allocated": total_allocated,
-                    "division_ratio_2025": division_ratio_2025,
-                    "total_2025_sales": total_2025_sales,
-                    "q1_sales": q1_sales_display,
-                    "q2_sales": q2_sales_display,
-                    "q3_sales": q3_sales_display,
-                    "q4_sales": q4_sales_display,
-                    "gp_percent": gp_percent,
-                    "q1_gp_percent": q1_gp_percent_display,
-                    "q2_gp_percent": q2_gp_percent_display,
-                    "q3_gp_percent": q3_gp_percent_display,
-                    "q4_gp_percent": q4_gp_percent_display,
-                    "q1_gp_value": q1_gp_value,
-                    "q2_gp_value": q2_gp_value,
-                    "q3_gp_value": q3_gp_value,
-                    "q4_gp_value": q4_gp_value,
-                    "total_gp_value": total_gp_value,
-                    "has_budget": True,
-                }
-            )
+        # Step 16: Combine all data
+        division_data = self._combine_division_data(
+            filtered_budgets,
+            [],
+            divisions,
+            default_division_ratios,
+            ratio_overrides,
+            baseline["ratios_lookup"],
+            baseline["grouped_sales_lookup"],
+            baseline["group_historical_totals"],
+            baseline["gp_by_division"],
+        )
 
         # Sort by item_division
         division_data.sort(key=lambda x: x["item_division"])
 
         return division_data
 
+    def preview_group_allocations(
+        self, overrides: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """
+        What-if allocations for one group with candidate ratio overrides applied
+        Nothing is written; takes the same override dicts as save_ratio_overrides
+        """
+        groups = {
+            (o["salesperson_id"], o["customer_class"], o["group_key"])
+            for o in overrides
+        }
+        if len(groups) != 1:
+            raise ValueError("Preview overrides must all belong to one group")
+        salesperson_id, customer_class, group_key = groups.pop()
+
+        candidate_overrides = {
+            (salesperson_id, customer_class, group_key, o["item_division"]): float(
+                o["custom_ratio"]
+            )
+            for o in overrides
+        }
+        return self.get_division_allocations_for_group(
+            salesperson_id, customer_class, group_key, candidate_overrides
+        )
+
     def reset_all_overrides(self) -> int:
         """
         Reset all custom ratio overrides
@@ -1341,6 +1894,7 @@ class DivisionService:
         try:
             result = self.db.exec(text("DELETE FROM division_ratio_overrides"))
             self.db.commit()
+            cache.bump(OVERRIDES)
             return result.rowcount
 
         except Exception as e:
@@ -0,0 +1,199 @@
+"""
+Columnar (NumPy) implementation of the GP projection.
+
+GrossProfitService.get_gross_profit_allocations evaluates the
+custom -> quarterly -> full-year GP% fallback in SQL, once per output column
+that needs it. Here the 2025 GP aggregate, the budget lines and the overrides
+arrive as three plain result sets, are joined on integer-coded
+(salesperson_id, customer_class, group_key) keys (compared the way MySQL's
+collation does: ignoring case and trailing spaces), and every quarter is a single
+np.where chain over whole columns. NULL is carried as NaN throughout and turned
+back into None on output, so rows have the same schema and values as the SQL.
+"""
+
+import numpy as np
+from typing import List, Dict, Any, Optional, Sequence
+
+from services.division_engine import factorize_columns, round_half_even_like_python
+
+QUARTERS = ("q1", "q2", "q3", "q4")
+
+KEY_COLUMNS = ("salesperson_id", "customer_class", "group_key")
+
+
+def _nullable_array(values: Sequence[Any]) -> np.ndarray:
+    """DB numerics to float64, NULL -> NaN"""
+    return np.array(
+        [np.nan if value is None else float(value) for value in values],
+        dtype=np.float64,
+    )
+
+
+def _column(rows: List[Dict[str, Any]], name: str) -> np.ndarray:
+    return _nullable_array([row[name] for row in rows])
+
+
+def _take(values: np.ndarray, positions: np.ndarray) -> np.ndarray:
+    """values[positions] along the last axis, NaN where position is -1 (no match)"""
+    result = np.full(values.shape[:-1] + positions.shape, np.nan)
+    found = positions >= 0
+    result[..., found] = values[..., positions[found]]
+    return result
+
+
+def _coalesce(*columns: np.ndarray) -> np.ndarray:
+    """Element-wise SQL COALESCE over NaN-for-NULL arrays"""
+    result = columns[-1]
+    for column in reversed(columns[:-1]):
+        result = np.where(np.isnan(column), result, column)
+    return result
+
+
+def _nullable(values: np.ndarray) -> List[Optional[float]]:
+    return [None if np.isnan(value) else value for value in values.tolist()]
+
+
+def _collation_key(value: Any) -> Any:
+    # The SQL joins compare under MySQL's case-insensitive, PAD SPACE collation
+    return value.rstrip(" ").casefold() if isinstance(value, str) else value
+
+
+def _sort_text(value: Any) -> tuple:
+    # MySQL puts NULL first and compares with a case-insensitive collation
+    return (value is not None, str(value).casefold() if value is not None else "")
+
+
+def project_gross_profit(
+    gp_rows: List[Dict[str, Any]],
+    budget_rows: List[Dict[str, Any]],
+    override_rows: List[Dict[str, Any]],
+) -> List[Dict[str, Any]]:
+    """
+    Apply 2025 GP% (with overrides) to the 2026 budget
+    gp_rows: salesperson_id, salesperson_name, customer_class, group_key,
+      qN_sales_2025, qN_gp_percent, full_year_gp_percent (one per key)
+    budget_rows: salesperson_id, salesperson_name, customer_class, group_key,
+      brand, quarter_N_sales
+    override_rows: salesperson_id, customer_class, group_key, custom_qN_gp_percent
+    Returns budget rows plus sales-only GP groups, ordered like the SQL
+    (customer_class, salesperson_name, group_key)
+    """
+    n_gp, n_budget = len(gp_rows), len(budget_rows)
+    all_rows = gp_rows + budget_rows + override_rows
+    codes, keys = factorize_columns(
+        *([_collation_key(row[name]) for row in all_rows] for name in KEY_COLUMNS)
+    )
+    gp_codes = codes[:n_gp]
+    budget_codes = codes[n_gp : n_gp + n_budget]
+    override_codes = codes[n_gp + n_budget :]
+
+    # Key code -> row position in gp / overrides (keys are unique in both)
+    gp_position = np.full(len(keys), -1, dtype=np.int64)
+    gp_position[gp_codes] = np.arange(n_gp)
+    override_position = np.full(len(keys), -1, dtype=np.int64)
+    override_position[override_codes] = np.arange(len(override_rows))
+    has_budget = np.zeros(len(keys), dtype=bool)
+    has_budget[budget_codes] = True
+
+    gp_sales = np.array([_column(gp_rows, f"{q}_sales_2025") for q in QUARTERS])
+    gp_percent = np.array([_column(gp_rows, f"{q}_gp_percent") for q in QUARTERS])
+    gp_full_year = _column(gp_rows, "full_year_gp_percent")
+    custom_percent = np.array(
+        [_column(override_rows, f"custom_{q}_gp_percent") for q in QUARTERS]
+    )
+
+    rows = []
+
+    # Budget rows: custom -> historical -> full-year
+    budget_gp = gp_position[budget_codes]
+    budget_override = override_position[budget_codes]
+    budget_sales = np.array(
+        [_column(budget_rows, f"quarter_{n}_sales") for n in range(1, 5)]
+    )
+    b_sales_2025 = _take(gp_sales, budget_gp)
+    b_percent = _take(gp_percent, budget_gp)
+    b_full_year = _take(gp_full_year, budget_gp)
+    b_custom = _take(custom_percent, budget_override)
+    b_effective = _coalesce(b_custom, b_percent, b_full_year)
+    b_products = budget_sales * b_effective
+    b_gp_value = round_half_even_like_python(b_products, 2)
+    b_total = round_half_even_like_python(b_products.sum(axis=0), 2)
+    b_is_custom = (~np.isnan(b_custom)).any(axis=0)
+
+    columns = {
+        "sales_2025": [_nullable(b_sales_2025[k]) for k in range(4)],
+        "gp_percent": [_nullable(b_percent[k]) for k in range(4)],
+        "effective": [_nullable(b_effective[k]) for k in range(4)],
+        "gp_value": [_nullable(b_gp_value[k]) for k in range(4)],
+        "full_year": _nullable(b_full_year),
+        "total": _nullable(b_total),
+        "is_custom": b_is_custom.astype(int).tolist(),
+    }
+    for i, budget in enumerate(budget_rows):
+        row = {
+            "salesperson_id": budget["salesperson_id"],
+            "salesperson_name": budget["salesperson_name"],
+            "customer_class": budget["customer_class"],
+            "group_key": budget["group_key"],
+            "brand": budget["brand"],
+        }
+        for n in range(1, 5):
+            row[f"quarter_{n}_sales"] = budget[f"quarter_{n}_sales"]
+        for k, q in enumerate(QUARTERS):
+            row[f"{q}_sales_2025"] = columns["sales_2025"][k][i]
+        for k, q in enumerate(QUARTERS):
+            row[f"{q}_gp_percent"] = columns["gp_percent"][k][i]
+        row["full_year_gp_percent"] = columns["full_year"][i]
+        for k, q in enumerate(QUARTERS):
+            row[f"{q}_effective_gp_percent"] = columns["effective"][k][i]
+        row["effective_gp_percent"] = columns["full_year"][i]
+        row["is_custom"] = columns["is_custom"][i]
+        for k, q in enumerate(QUARTERS):
+            row[f"{q}_gp_value"] = columns["gp_value"][k][i]
+        row["total_gp_value"] = columns["total"][i]
+        row["has_budget"] = 1
+        rows.append(row)
+
+    # Sales-only rows: GP groups without a budget line, no overrides, GP$ 0
+    sales_only = np.flatnonzero(~has_budget[gp_codes])
+    s_effective = _coalesce(gp_percent[:, sales_only], gp_full_year[sales_only])
+    columns = {
+        "sales_2025": [_nullable(gp_sales[k, sales_only]) for k in range(4)],
+        "gp_percent": [_nullable(gp_percent[k, sales_only]) for k in range(4)],
+        "effective": [_nullable(s_effective[k]) for k in range(4)],
+        "full_year": _nullable(gp_full_year[sales_only]),
+    }
+    for i, position in enumerate(sales_only.tolist()):
+        gp = gp_rows[position]
+        row = {
+            "salesperson_id": gp["salesperson_id"],
+            "salesperson_name": gp["salesperson_name"],
+            "customer_class": gp["customer_class"],
+            "group_key": gp["group_key"],
+            "brand": None,
+        }
+        for n in range(1, 5):
+            row[f"quarter_{n}_sales"] = 0
+        for k, q in enumerate(QUARTERS):
+            row[f"{q}_sales_2025"] = columns["sales_2025"][k][i]
+        for k, q in enumerate(QUARTERS):
+            row[f"{q}_gp_percent"] = columns["gp_percent"][k][i]
+        row["full_year_gp_percent"] = columns["full_year"][i]
+        for k, q in enumerate(QUARTERS):
+            row[f"{q}_effective_gp_percent"] = columns["effective"][k][i]
+        row["effective_gp_percent"] = columns["full_year"][i]
+        row["is_custom"] = 0
+        for q in QUARTERS:
+            row[f"{q}_gp_value"] = 0
+        row["total_gp_value"] = 0
+        row["has_budget"] = 0
+        rows.append(row)
+
+    rows.sort(
+        key=lambda row: (
+            _sort_text(row["customer_class"]),
+            _sort_text(row["salesperson_name"]),
+            _sort_text(row["group_key"]),
+        )
+    )
+    return rows
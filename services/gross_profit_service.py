@@ -1,26 +1,18 @@
-from sqlmodel import Session, text, select
+from sqlalchemy import tuple_
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlmodel import Session, select, text
 from typing import List, Dict, Any
 from datetime import datetime
 from db.budget_models import GrossProfitOverride
+from services.gross_profit_engine import project_gross_profit
 
 
-class GrossProfitService:
-    def __init__(self, db: Session):
-        self.db = db
-
-    # ------------------------------------------------------------------
-    # MAIN QUERY
-    # ------------------------------------------------------------------
-    def get_gross_profit_allocations(self) -> List[Dict[str, Any]]:
-        """
-        Compute gross-profit % (from 2025 actuals) and apply to 2026 budget,
-        merging any manual gp_ratio_overrides.
-        Returns one record per group (class + salesperson + group_key)
-        with quarterly and total GP$ projections.
-        """
-        query = text(
-            """
-            WITH gp AS (
+# 2025 actuals and GP% per (salesperson, customer_class, group_key) straight from
+# sales; a quarter without sales falls back to the full-year GP%. GP keeps its own
+# key (flag only for the exact 'Hospitality' class, untrimmed), since
+# gp_ratio_overrides are saved under it: the stored, indexed gp_group_key column
+# (migration 5), not the division group_key
+GP_2025_SQL = """
               SELECT
                 grp.salesperson_id,
                 grp.group_key,
@@ -68,7 +60,7 @@ class GrossProfitService:
               FROM (
                 SELECT
                   s.salesperson AS salesperson_id,
-                  IF(s.derived_customer_class='Hospitality', s.flag, s.customer_name) AS group_key,
+                  s.gp_group_key AS group_key,
                   s.derived_customer_class AS customer_class,
                   SUM(CASE WHEN s.period >= '2025-01-01' AND s.period < '2025-04-01' THEN COALESCE(s.ext_sales, 0) ELSE 0 END) AS q1_sales,
                   SUM(CASE WHEN s.period >= '2025-01-01' AND s.period < '2025-04-01' THEN COALESCE(s.ext_cost, 0) ELSE 0 END) AS q1_cost,
@@ -81,22 +73,57 @@ class GrossProfitService:
                 FROM sales_budget_2026 s
                 WHERE s.period >= '2025-01-01' AND s.period < '2026-01-01'
                   AND s.salesperson IS NOT NULL
-                  AND (
-                    (s.derived_customer_class='Hospitality' AND s.flag IS NOT NULL AND s.flag<>'')
-                    OR (s.derived_customer_class<>'Hospitality' AND s.customer_name IS NOT NULL AND s.customer_name<>'')
-                  )
+                  /* gp_baseline_2025.customer_class is NOT NULL */
+                  AND s.derived_customer_class IS NOT NULL
+                  AND s.gp_group_key IS NOT NULL AND s.gp_group_key<>''{sales_filter}
                 GROUP BY s.salesperson,
-                         IF(s.derived_customer_class='Hospitality', s.flag, s.customer_name),
+                         s.gp_group_key,
                          s.derived_customer_class
               ) grp
+"""
+
+# Same columns from the table rebuilt by GrossProfitService.refresh_gp_baseline
+GP_BASELINE_SQL = """
+              SELECT
+                salesperson_id, group_key, customer_class,
+                q1_sales_2025, q2_sales_2025, q3_sales_2025, q4_sales_2025,
+                q1_gp_percent, q2_gp_percent, q3_gp_percent, q4_gp_percent,
+                full_year_gp_percent
+              FROM gp_baseline_2025{baseline_filter}
+"""
+
+
+class GrossProfitService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    # ------------------------------------------------------------------
+    # MAIN QUERY
+    # ------------------------------------------------------------------
+    def get_gross_profit_allocations(
+        self, use_snapshot: bool = True
+    ) -> List[Dict[str, Any]]:
+        """
+        Compute gross-profit % (from 2025 actuals) and apply to 2026 budget,
+        merging any manual gp_ratio_overrides.
+        2025 actuals come from gp_baseline_2025 once it has been refreshed;
+        use_snapshot=False aggregates them from raw sales instead.
+        Returns one record per group (class + salesperson + group_key)
+        with quarterly and total GP$ projections.
+        """
+        query = text(
+            """
+            WITH gp AS ("""
+            + self._gp_sql(use_snapshot)
+            + """
             ),
             budget_rows AS (
               SELECT
                 b.salesperson_id,
                 b.salesperson_name,
                 b.customer_class,
-                IF(b.customer_class='Hospitality', b.flag, b.customer_name) AS group_key,
-                CASE WHEN b.customer_class LIKE 'Hospitality%' THEN b.brand ELSE NULL END AS brand,
+                b.gp_group_key AS group_key,
+                CASE WHEN b.is_hospitality = 1 THEN b.brand ELSE NULL END AS brand,
 
                 /* 2026 budgeted sales */
                 b.quarter_1_sales,
@@ -145,12 +172,12 @@ class GrossProfitService:
               FROM dfm_dashboards.budget_2026 b
               LEFT JOIN gp g
                 ON g.salesperson_id = b.salesperson_id
-               AND g.group_key = IF(b.customer_class='Hospitality', b.flag, b.customer_name)
+               AND g.group_key = b.gp_group_key
                AND g.customer_class = b.customer_class
               LEFT JOIN gp_ratio_overrides o
                 ON o.salesperson_id = b.salesperson_id
                AND o.customer_class = b.customer_class
-               AND o.group_key = IF(b.customer_class='Hospitality', b.flag, b.customer_name)
+               AND o.group_key = b.gp_group_key
             ),
             sales_only_rows AS (
               SELECT
@@ -203,7 +230,7 @@ class GrossProfitService:
                 SELECT 1 FROM dfm_dashboards.budget_2026 b
                 WHERE b.salesperson_id = g.salesperson_id
                   AND b.customer_class = g.customer_class
-                  AND IF(b.customer_class='Hospitality', b.flag, b.customer_name) = g.group_key
+                  AND b.gp_group_key = g.group_key
               )
             )
             SELECT * FROM budget_rows
@@ -216,88 +243,82 @@ class GrossProfitService:
         result = self.db.exec(query)
         return [dict(row._mapping) for row in result]
 
+    def get_gross_profit_allocations_columnar(
+        self, use_snapshot: bool = True
+    ) -> List[Dict[str, Any]]:
+        """
+        Same rows as get_gross_profit_allocations, with the GP% fallback and GP$
+        products computed by the NumPy engine (services/gross_profit_engine.py)
+        MySQL only returns the grouped 2025 GP, the budget lines and the overrides
+        """
+        gp_rows = self.db.exec(
+            text(
+                """
+                SELECT gp.*,
+                  COALESCE(sp.salesman_name, CONCAT('Salesperson ', gp.salesperson_id)) AS salesperson_name
+                FROM ("""
+                + self._gp_sql(use_snapshot)
+                + """) gp
+                LEFT JOIN salesperson_masters sp ON sp.salesman_no = gp.salesperson_id
+                """
+            )
+        )
+        budget_rows = self.db.exec(
+            text(
+                """
+                SELECT
+                  b.salesperson_id,
+                  b.salesperson_name,
+                  b.customer_class,
+                  b.gp_group_key AS group_key,
+                  CASE WHEN b.is_hospitality = 1 THEN b.brand ELSE NULL END AS brand,
+                  b.quarter_1_sales,
+                  b.quarter_2_sales,
+                  b.quarter_3_sales,
+                  b.quarter_4_sales
+                FROM dfm_dashboards.budget_2026 b
+                """
+            )
+        )
+        override_rows = self.db.exec(
+            text(
+                """
+                SELECT salesperson_id, customer_class, group_key,
+                  custom_q1_gp_percent, custom_q2_gp_percent,
+                  custom_q3_gp_percent, custom_q4_gp_percent
+                FROM gp_ratio_overrides
+                """
+            )
+        )
+        return project_gross_profit(
+            [dict(row._mapping) for row in gp_rows],
+            [dict(row._mapping) for row in budget_rows],
+            [dict(row._mapping) for row in override_rows],
+        )
+
     def get_single_gross_profit_group(
-        self, salesperson_id: int, customer_class: str, group_key: str
+        self,
+        salesperson_id: int,
+        customer_class: str,
+        group_key: str,
+        use_snapshot: bool = True,
     ) -> List[Dict[str, Any]]:
         """
         Get gross profit data for a single group (same query as main but with WHERE clause).
         """
         query = text(
             """
-            WITH gp AS (
-              SELECT
-                grp.salesperson_id,
-                grp.group_key,
-                grp.customer_class,
-                /* 2025 actual quarterly sales */
-                grp.q1_sales AS q1_sales_2025,
-                grp.q2_sales AS q2_sales_2025,
-                grp.q3_sales AS q3_sales_2025,
-                grp.q4_sales AS q4_sales_2025,
-                /* GP% calculations */
-                ROUND(IF(grp.q1_sales = 0,
-                  IFNULL(
-                    1 - ((grp.q1_cost + grp.q2_cost + grp.q3_cost + grp.q4_cost)
-                        / NULLIF((grp.q1_sales + grp.q2_sales + grp.q3_sales + grp.q4_sales),0)),
-                    NULL),
-                  1 - (grp.q1_cost / grp.q1_sales)
-                ),6) AS q1_gp_percent,
-                ROUND(IF(grp.q2_sales = 0,
-                  IFNULL(
-                    1 - ((grp.q1_cost + grp.q2_cost + grp.q3_cost + grp.q4_cost)
-                        / NULLIF((grp.q1_sales + grp.q2_sales + grp.q3_sales + grp.q4_sales),0)),
-                    NULL),
-                  1 - (grp.q2_cost / grp.q2_sales)
-                ),6) AS q2_gp_percent,
-                ROUND(IF(grp.q3_sales = 0,
-                  IFNULL(
-                    1 - ((grp.q1_cost + grp.q2_cost + grp.q3_cost + grp.q4_cost)
-                        / NULLIF((grp.q1_sales + grp.q2_sales + grp.q3_sales + grp.q4_sales),0)),
-                    NULL),
-                  1 - (grp.q3_cost / grp.q3_sales)
-                ),6) AS q3_gp_percent,
-                ROUND(IF(grp.q4_sales = 0,
-                  IFNULL(
-                    1 - ((grp.q1_cost + grp.q2_cost + grp.q3_cost + grp.q4_cost)
-                        / NULLIF((grp.q1_sales + grp.q2_sales + grp.q3_sales + grp.q4_sales),0)),
-                    NULL),
-                  1 - (grp.q4_cost / grp.q4_sales)
-                ),6) AS q4_gp_percent,
-                ROUND(
-                  IF((grp.q1_sales + grp.q2_sales + grp.q3_sales + grp.q4_sales)=0,NULL,
-                    1 - ((grp.q1_cost + grp.q2_cost + grp.q3_cost + grp.q4_cost)
-                        /(grp.q1_sales + grp.q2_sales + grp.q3_sales + grp.q4_sales))
-                  ),6
-                ) AS full_year_gp_percent
-              FROM (
-                SELECT
-                  s.salesperson AS salesperson_id,
-                  IF(s.derived_customer_class='Hospitality', s.flag, s.customer_name) AS group_key,
-                  s.derived_customer_class AS customer_class,
-                  SUM(CASE WHEN s.period >= '2025-01-01' AND s.period < '2025-04-01' THEN COALESCE(s.ext_sales, 0) ELSE 0 END) AS q1_sales,
-                  SUM(CASE WHEN s.period >= '2025-01-01' AND s.period < '2025-04-01' THEN COALESCE(s.ext_cost, 0) ELSE 0 END) AS q1_cost,
-                  SUM(CASE WHEN s.period >= '2025-04-01' AND s.period < '2025-07-01' THEN COALESCE(s.ext_sales, 0) ELSE 0 END) AS q2_sales,
-                  SUM(CASE WHEN s.period >= '2025-04-01' AND s.period < '2025-07-01' THEN COALESCE(s.ext_cost, 0) ELSE 0 END) AS q2_cost,
-                  SUM(CASE WHEN s.period >= '2025-07-01' AND s.period < '2025-10-01' THEN COALESCE(s.ext_sales, 0) ELSE 0 END) AS q3_sales,
-                  SUM(CASE WHEN s.period >= '2025-07-01' AND s.period < '2025-10-01' THEN COALESCE(s.ext_cost, 0) ELSE 0 END) AS q3_cost,
-                  SUM(CASE WHEN s.period >= '2025-10-01' AND s.period < '2026-01-01' THEN COALESCE(s.ext_sales, 0) ELSE 0 END) AS q4_sales,
-                  SUM(CASE WHEN s.period >= '2025-10-01' AND s.period < '2026-01-01' THEN COALESCE(s.ext_cost, 0) ELSE 0 END) AS q4_cost
-                FROM sales_budget_2026 s
-                WHERE s.period >= '2025-01-01' AND s.period < '2026-01-01'
-                  AND s.salesperson IS NOT NULL
-                  AND (s.derived_customer_class=:cc AND IF(s.derived_customer_class='Hospitality', s.flag, s.customer_name)=:gk)
-                GROUP BY s.salesperson,
-                         IF(s.derived_customer_class='Hospitality', s.flag, s.customer_name),
-                         s.derived_customer_class
-              ) grp
+            WITH gp AS ("""
+            + self._gp_sql(use_snapshot, single_group=True)
+            + """
             ),
             budget_rows AS (
               SELECT
                 b.salesperson_id,
                 b.salesperson_name,
                 b.customer_class,
-                IF(b.customer_class='Hospitality', b.flag, b.customer_name) AS group_key,
-                CASE WHEN b.customer_class LIKE 'Hospitality%' THEN b.brand ELSE NULL END AS brand,
+                b.gp_group_key AS group_key,
+                CASE WHEN b.is_hospitality = 1 THEN b.brand ELSE NULL END AS brand,
 
                 /* 2026 budgeted sales */
                 b.quarter_1_sales,
@@ -346,15 +367,15 @@ class GrossProfitService:
               FROM dfm_dashboards.budget_2026 b
               LEFT JOIN gp g
                 ON g.salesperson_id = b.salesperson_id
-               AND g.group_key = IF(b.customer_class='Hospitality', b.flag, b.customer_name)
+               AND g.group_key = b.gp_group_key
                AND g.customer_class = b.customer_class
               LEFT JOIN gp_ratio_overrides o
                 ON o.salesperson_id = b.salesperson_id
                AND o.customer_class = b.customer_class
-               AND o.group_key = IF(b.customer_class='Hospitality', b.flag, b.customer_name)
+               AND o.group_key = b.gp_group_key
               WHERE b.salesperson_id = :sid
                 AND b.customer_class = :cc
-                AND IF(b.customer_class='Hospitality', b.flag, b.customer_name) = :gk
+                AND b.gp_group_key = :gk
             ),
             sales_only_rows AS (
               SELECT
@@ -410,7 +431,7 @@ class GrossProfitService:
                   SELECT 1 FROM dfm_dashboards.budget_2026 b
                   WHERE b.salesperson_id = g.salesperson_id
                     AND b.customer_class = g.customer_class
-                    AND IF(b.customer_class='Hospitality', b.flag, b.customer_name) = g.group_key
+                    AND b.gp_group_key = g.group_key
                 )
             )
             SELECT * FROM budget_rows
@@ -425,41 +446,136 @@ class GrossProfitService:
         )
         return [dict(row._mapping) for row in result]
 
+    # ------------------------------------------------------------------
+    # 2025 GP BASELINE
+    # ------------------------------------------------------------------
+    def _gp_baseline_exists(self) -> bool:
+        """Whether gp_baseline_2025 has been refreshed at least once"""
+        row = self.db.exec(text("SELECT 1 FROM gp_baseline_2025 LIMIT 1")).first()
+        return row is not None
+
+    def _gp_sql(self, use_snapshot: bool, single_group: bool = False) -> str:
+        """
+        SELECT for the gp CTE: the baseline table when available, else raw sales.
+        single_group narrows it to :cc / :gk.
+        """
+        if use_snapshot and self._gp_baseline_exists():
+            return GP_BASELINE_SQL.format(
+                baseline_filter=(
+                    "\n              WHERE customer_class=:cc AND group_key=:gk"
+                    if single_group
+                    else ""
+                )
+            )
+        return GP_2025_SQL.format(
+            sales_filter=(
+                "\n                  AND s.derived_customer_class=:cc"
+                "\n                  AND s.gp_group_key=:gk"
+                if single_group
+                else ""
+            )
+        )
+
+    def refresh_gp_baseline(self) -> Dict[str, Any]:
+        """
+        Rebuild gp_baseline_2025 from raw sales in one INSERT ... SELECT
+        Returns the row count and the refresh timestamp
+        """
+        try:
+            refreshed_at = datetime.utcnow()
+            # Same transaction as the insert so readers never see an empty table
+            self.db.exec(text("DELETE FROM gp_baseline_2025"))
+            result = self.db.exec(
+                text(
+                    """
+                    INSERT INTO gp_baseline_2025 (
+                      salesperson_id, group_key, customer_class,
+                      q1_sales_2025, q2_sales_2025, q3_sales_2025, q4_sales_2025,
+                      q1_gp_percent, q2_gp_percent, q3_gp_percent, q4_gp_percent,
+                      full_year_gp_percent, refreshed_at
+                    )
+                    SELECT gp.*, :refreshed_at FROM ("""
+                    + GP_2025_SQL.format(sales_filter="")
+                    + """) gp
+                    """
+                ).bindparams(refreshed_at=refreshed_at)
+            )
+            self.db.commit()
+
+            return {
+                "success": True,
+                "refreshed_at": refreshed_at.isoformat(),
+                "gp_rows": result.rowcount,
+            }
+
+        except Exception as e:
+            self.db.rollback()
+            raise e
+
     # ------------------------------------------------------------------
     # SAVE / RESET OVERRIDES
     # ------------------------------------------------------------------
     def save_gp_overrides(self, overrides: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
         Save or update GP% overrides (one per group, with quarter-specific values).
+        One INSERT ... ON DUPLICATE KEY UPDATE on the group unique key; quarter
+        fields present in the payload are written (including null to clear).
         """
-        saved, updated = 0, 0
-        for o in overrides:
-            existing = self.db.exec(
-                select(GrossProfitOverride).where(
-                    GrossProfitOverride.salesperson_id == o["salesperson_id"],
-                    GrossProfitOverride.customer_class == o["customer_class"],
-                    GrossProfitOverride.group_key == o["group_key"],
-                )
-            ).first()
-
-            if existing:
-                # Update quarter-specific override fields (including null to clear)
-                if "custom_q1_gp_percent" in o:
-                    existing.custom_q1_gp_percent = o["custom_q1_gp_percent"]
-                if "custom_q2_gp_percent" in o:
-                    existing.custom_q2_gp_percent = o["custom_q2_gp_percent"]
-                if "custom_q3_gp_percent" in o:
-                    existing.custom_q3_gp_percent = o["custom_q3_gp_percent"]
-                if "custom_q4_gp_percent" in o:
-                    existing.custom_q4_gp_percent = o["custom_q4_gp_percent"]
-                existing.updated_at = datetime.utcnow()
-                updated += 1
-            else:
-                self.db.add(GrossProfitOverride(**o))
-                saved += 1
+        if not overrides:
+            return {"saved": 0, "updated": 0}
+
+        quarter_fields = [
+            field
+            for field in (
+                "custom_q1_gp_percent",
+                "custom_q2_gp_percent",
+                "custom_q3_gp_percent",
+                "custom_q4_gp_percent",
+            )
+            if any(field in o for o in overrides)
+        ]
+        now = datetime.utcnow()
+        rows = [
+            {
+                "salesperson_id": o["salesperson_id"],
+                "salesperson_name": o["salesperson_name"],
+                "customer_class": o["customer_class"],
+                "group_key": o["group_key"],
+                **{field: o.get(field) for field in quarter_fields},
+                "created_at": now,
+                "updated_at": now,
+            }
+            for o in overrides
+        ]
+
+        # Affected-row counts can't tell an insert from an unchanged update,
+        # so new keys are counted from the rows that exist beforehand
+        key_columns = (
+            GrossProfitOverride.salesperson_id,
+            GrossProfitOverride.customer_class,
+            GrossProfitOverride.group_key,
+        )
+        keys = {
+            (row["salesperson_id"], row["customer_class"], row["group_key"])
+            for row in rows
+        }
+        existing = {
+            tuple(row)
+            for row in self.db.exec(
+                select(*key_columns).where(tuple_(*key_columns).in_(keys))
+            )
+        }
+        saved = len(keys - existing)
 
+        statement = mysql_insert(GrossProfitOverride).values(rows)
+        statement = statement.on_duplicate_key_update(
+            **{field: statement.inserted[field] for field in quarter_fields},
+            updated_at=statement.inserted.updated_at,
+        )
+        self.db.connection().execute(statement)
         self.db.commit()
-        return {"saved": saved, "updated": updated}
+
+        return {"saved": saved, "updated": len(rows) - saved}
 
     def delete_gp_override(
         self, salesperson_id: int, customer_class: str, group_key: str
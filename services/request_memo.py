@@ -0,0 +1,60 @@
+"""
+Request-scoped memoization shared through the database session
+
+Every request gets its own Session (db.core.get_session / get_readonly_session),
+so Session.info is per-request scratch space that every service built on that
+session can see. Methods decorated with @memoized run once per distinct set of
+arguments for the lifetime of the session; later calls, from the same service
+or another one sharing the session, get the first result back.
+
+The memo is dropped whenever the session commits or rolls back, so a handler
+that writes never reads lookups taken before its own write. Memoized results
+are shared objects: callers must treat them as read-only.
+"""
+
+from functools import wraps
+from typing import Any, Callable, Dict, Hashable
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+MEMO_INFO_KEY = "request_memo"
+
+
+def _memo(session: Session) -> Dict[Hashable, Any]:
+    return session.info.setdefault(MEMO_INFO_KEY, {})
+
+
+def memoized(method: Callable) -> Callable:
+    """Cache a service method's result in self.db for the rest of the request"""
+
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        key = (method.__qualname__, args, tuple(sorted(kwargs.items())))
+        try:
+            hash(key)
+        except TypeError:
+            # Unhashable arguments (dicts, lists) are not worth memoizing
+            return method(self, *args, **kwargs)
+
+        memo = _memo(self.db)
+        if key not in memo:
+            memo[key] = method(self, *args, **kwargs)
+        return memo[key]
+
+    return wrapper
+
+
+def clear(session: Session) -> None:
+    """Forget everything memoized on this session"""
+    session.info.pop(MEMO_INFO_KEY, None)
+
+
+@event.listens_for(Session, "after_commit")
+def _clear_after_commit(session: Session) -> None:
+    clear(session)
+
+
+@event.listens_for(Session, "after_rollback")
+def _clear_after_rollback(session: Session) -> None:
+    clear(session)
@@ -1,12 +1,51 @@
 from sqlmodel import Session, select, text
 from db.dfm_reflect import Salesperson
 from typing import List, Dict, Any
+from services.request_memo import memoized
+
+
+# One salesperson's 2025 sales lines plus their Q4 2025 and 2026 open orders,
+# so each /sales path is a single conditional aggregation over one scan of each table
+SALES_AND_ORDERS_LINES = """
+                SELECT 'sales' AS source, flag, brand, customer_name, derived_customer_class,
+                       period AS line_date, COALESCE(ext_sales, 0) AS ext_sales, zero_perc_sales
+                FROM sales_budget_2026
+                WHERE salesperson = :salesman_no
+                  AND period >= '2025-01-01' AND period < '2026-01-01'
+                UNION ALL
+                SELECT 'orders' AS source, flag, brand, customer_name, derived_customer_class,
+                       requested_ship_date, COALESCE(ext_sales, 0), zero_perc_sales
+                FROM orders_budget_2026
+                WHERE salesperson = :salesman_no
+                  AND requested_ship_date >= '2025-10-01'
+                  AND requested_ship_date < '2027-01-01'
+"""
+
+# total_sales / zero_perc_sales_total cover 2025 sales plus Q4 2025 orders
+SALES_AGGREGATES = """
+                    SUM(CASE WHEN source = 'sales' AND line_date < '2025-04-01' THEN ext_sales ELSE 0 END) as q1_sales,
+                    SUM(CASE WHEN source = 'sales' AND line_date >= '2025-04-01' AND line_date < '2025-07-01' THEN ext_sales ELSE 0 END) as q2_sales,
+                    SUM(CASE WHEN source = 'sales' AND line_date >= '2025-07-01' AND line_date < '2025-10-01' THEN ext_sales ELSE 0 END) as q3_sales,
+                    SUM(CASE WHEN source = 'sales' AND line_date >= '2025-10-01' THEN ext_sales ELSE 0 END) as q4_sales,
+                    SUM(CASE WHEN source = 'orders' AND line_date < '2026-01-01' THEN ext_sales ELSE 0 END) as q4_orders,
+                    SUM(CASE WHEN source = 'orders' AND line_date >= '2026-01-01' THEN ext_sales ELSE 0 END) as open_2026,
+                    SUM(CASE WHEN source = 'sales' OR line_date < '2026-01-01' THEN ext_sales ELSE 0 END) as total_sales,
+                    SUM(CASE WHEN zero_perc_sales = 'yes' AND (source = 'sales' OR line_date < '2026-01-01')
+                             THEN ext_sales ELSE 0 END) as zero_perc_sales_total
+"""
+
+# Drop groups with no 2025 sales and no Q4 orders (open 2026 orders alone don't count)
+SALES_HAVING = """
+                HAVING q1_sales <> 0 OR q2_sales <> 0 OR q3_sales <> 0
+                    OR q4_sales <> 0 OR q4_orders <> 0
+"""
 
 
 class SalesService:
     def __init__(self, db: Session):
         self.db = db
 
+    @memoized
     def get_sales_data(self, username: str) -> List[Dict[str, Any]]:
         """
         Get sales data based on user's salesperson role
@@ -26,6 +65,7 @@ class SalesService:
         else:
             return self._get_non_hospitality_sales_data(user_salesperson.salesman_no)
 
+    @memoized
     def _get_user_salesperson(self, username: str):
         """Get salesperson info for the user"""
         from db.dfm_reflect import Users
@@ -42,6 +82,7 @@ class SalesService:
 
         return salesperson
 
+    @memoized
     def _get_hospitality_sales_data(self, salesman_no: int) -> List[Dict[str, Any]]:
         """
         Hospitality Salesperson Logic:
@@ -49,182 +90,50 @@ class SalesService:
         - Each flag has a fixed brand
         - derived_customer_class = 'Hospitality'
         """
-        # Step 1: Get basic sales data grouped by flag, brand (Q1-Q4 2025 from sales_budget_2026 table)
-        basic_query = text(
-            f"""
-            SELECT 
-                flag,
-                brand,
-                SUM(COALESCE(ext_sales, 0)) as total_sales,
-                SUM(CASE WHEN zero_perc_sales = 'yes' THEN COALESCE(ext_sales, 0) ELSE 0 END) as zero_perc_sales_total
-            FROM sales_budget_2026 
-            WHERE salesperson = {salesman_no}
-              AND period >= '2025-01-01' AND period < '2026-01-01'
-            GROUP BY flag, brand
+        result = self.db.exec(
+            text(
+                """
+            SELECT t.*
+            FROM (
+                SELECT
+                    flag,
+                    brand,
+                    """
+                + SALES_AGGREGATES
+                + """
+                FROM ("""
+                + SALES_AND_ORDERS_LINES
+                + """) lines
+                GROUP BY flag, brand
+                """
+                + SALES_HAVING
+                + """
+            ) t
+            /* Brand total sales DESC, flag total sales DESC */
+            ORDER BY
+                SUM(t.total_sales) OVER (
+                    PARTITION BY COALESCE(NULLIF(t.brand, ''), 'Unknown Brand')
+                ) DESC,
+                SUM(t.total_sales) OVER (
+                    PARTITION BY COALESCE(NULLIF(t.brand, ''), 'Unknown Brand'),
+                                 COALESCE(NULLIF(t.flag, ''), 'Unknown Flag')
+                ) DESC
         """
+            ).bindparams(salesman_no=salesman_no)
         )
 
-        basic_result = self.db.exec(basic_query)
-        basic_data = [dict(row._mapping) for row in basic_result]
-        basic_map = {f"{row['flag']}_{row['brand']}": row for row in basic_data}
-
-        # Step 2: Get quarterly breakdowns for Q1-Q4 2025
-        quarterly_query = text(
-            f"""
-            SELECT 
-                flag,
-                brand,
-                SUM(CASE WHEN period >= '2025-01-01' AND period < '2025-04-01' THEN COALESCE(ext_sales, 0) ELSE 0 END) as q1_sales,
-                SUM(CASE WHEN period >= '2025-04-01' AND period < '2025-07-01' THEN COALESCE(ext_sales, 0) ELSE 0 END) as q2_sales,
-                SUM(CASE WHEN period >= '2025-07-01' AND period < '2025-10-01' THEN COALESCE(ext_sales, 0) ELSE 0 END) as q3_sales,
-                SUM(CASE WHEN period >= '2025-10-01' AND period < '2026-01-01' THEN COALESCE(ext_sales, 0) ELSE 0 END) as q4_sales
-            FROM sales_budget_2026 
-            WHERE salesperson = {salesman_no}
-              AND period >= '2025-01-01' AND period < '2026-01-01'
-            GROUP BY flag, brand
-        """
-        )
-
-        quarterly_result = self.db.exec(quarterly_query)
-        quarterly_data = {
-            f"{row.flag}_{row.brand}": dict(row._mapping) for row in quarterly_result
-        }
-
-        # Step 3: Get Q4 data from orders_budget_2026 (including zero % sales)
-        q4_query = text(
-            f"""
-            SELECT 
-                flag,
-                brand,
-                SUM(COALESCE(ext_sales, 0)) as q4_sales,
-                SUM(CASE WHEN zero_perc_sales = 'yes' THEN COALESCE(ext_sales, 0) ELSE 0 END) as q4_zero_perc_sales
-            FROM orders_budget_2026 
-            WHERE salesperson = {salesman_no}
-              AND requested_ship_date >= '2025-10-01' 
-              AND requested_ship_date < '2026-01-01'
-            GROUP BY flag, brand
-        """
-        )
-
-        q4_result = self.db.exec(q4_query)
-        q4_data = {f"{row.flag}_{row.brand}": dict(row._mapping) for row in q4_result}
-
-        # Step 4: Get 2026 orders data from orders_budget_2026
-        open_2026_query = text(
-            f"""
-            SELECT 
-                flag,
-                brand,
-                SUM(COALESCE(ext_sales, 0)) as open_2026
-            FROM orders_budget_2026 
-            WHERE salesperson = {salesman_no}
-              AND requested_ship_date >= '2026-01-01' 
-              AND requested_ship_date < '2027-01-01'
-            GROUP BY flag, brand
-        """
-        )
-
-        open_2026_result = self.db.exec(open_2026_query)
-        open_2026_data = {
-            f"{row.flag}_{row.brand}": dict(row._mapping) for row in open_2026_result
-        }
-
-        # Step 5: Combine the data using union of keys across sources
-        final_data = []
-        union_keys = (
-            set(basic_map.keys()) | set(q4_data.keys()) | set(open_2026_data.keys())
-        )
-
-        for key in union_keys:
-            quarterly = quarterly_data.get(key, {})
-            q4 = q4_data.get(key, {})
-            open_2026 = open_2026_data.get(key, {})
-            base = basic_map.get(key)
-
-            flag = (
-                (base or {}).get("flag")
-                or q4.get("flag")
-                or open_2026.get("flag")
-                or quarterly.get("flag")
-            )
-            brand = (
-                (base or {}).get("brand")
-                or q4.get("brand")
-                or open_2026.get("brand")
-                or quarterly.get("brand")
-            )
-
-            total_sales = (base or {}).get("total_sales", 0)
-            zero_perc_total_q1_q4 = (base or {}).get("zero_perc_sales_total", 0)
-            q4_orders = q4.get("q4_sales", 0)
-            q4_orders_zero_perc = q4.get("q4_zero_perc_sales", 0)
-            total_sales_with_orders = (total_sales or 0) + (q4_orders or 0)
-            total_zero_perc_sales = (zero_perc_total_q1_q4 or 0) + (
-                q4_orders_zero_perc or 0
-            )
-            zero_perc_percent = (
-                (total_zero_perc_sales / total_sales_with_orders * 100)
-                if total_sales_with_orders > 0
-                else 0
-            )
-
-            final_data.append(
-                {
-                    "flag": flag,
-                    "brand": brand,
-                    "customer_name": None,
-                    "derived_customer_class": "Hospitality",
-                    "q1_sales": quarterly.get("q1_sales", 0),
-                    "q2_sales": quarterly.get("q2_sales", 0),
-                    "q3_sales": quarterly.get("q3_sales", 0),
-                    "q4_sales": quarterly.get("q4_sales", 0),
-                    "q4_orders": q4_orders,
-                    "open_2026": open_2026.get("open_2026", 0),
-                    "zero_perc_sales_total": total_zero_perc_sales,
-                    "total_sales": total_sales_with_orders,
-                    "zero_perc_sales_percent": round(zero_perc_percent, 2),
-                }
-            )
-
-        # Filter out rows only when all quarterly sales and Q4 open are zero
-        final_data = [
-            item
-            for item in final_data
-            if not (
-                ((item.get("q1_sales") or 0) == 0)
-                and ((item.get("q2_sales") or 0) == 0)
-                and ((item.get("q3_sales") or 0) == 0)
-                and ((item.get("q4_sales") or 0) == 0)
-                and ((item.get("q4_orders") or 0) == 0)
-            )
+        return [
+            {
+                "flag": row.flag,
+                "brand": row.brand,
+                "customer_name": None,
+                "derived_customer_class": "Hospitality",
+                **self._sales_row_values(row),
+            }
+            for row in result
         ]
 
-        # Sort by brand total sales DESC, flag total sales DESC
-        # First, calculate brand totals for sorting
-        brand_totals = {}
-        flag_totals = {}
-        for item in final_data:
-            brand = item["brand"] or "Unknown Brand"
-            flag = item["flag"] or "Unknown Flag"
-            sales = item["total_sales"] or 0
-
-            brand_totals[brand] = brand_totals.get(brand, 0) + sales
-            flag_totals[f"{brand}_{flag}"] = (
-                flag_totals.get(f"{brand}_{flag}", 0) + sales
-            )
-
-        # Sort by brand total sales DESC, flag total sales DESC
-        final_data.sort(
-            key=lambda x: (
-                brand_totals.get(x["brand"] or "Unknown Brand", 0),
-                flag_totals.get(
-                    f"{x['brand'] or 'Unknown Brand'}_{x['flag'] or 'Unknown Flag'}", 0
-                ),
-            ),
-            reverse=True,
-        )
-        return final_data
-
+    @memoized
     def _get_non_hospitality_sales_data(self, salesman_no: int) -> List[Dict[str, Any]]:
         """
         Non-Hospitality Salesperson Logic:
@@ -232,194 +141,68 @@ class SalesService:
         - derived_customer_class from data
         - brand = NULL, flag = NULL
         """
-        # Step 1: Get basic sales data grouped by customer_name, derived_customer_class (Q1-Q4 2025 from sales_budget_2026 table)
-        basic_query = text(
-            f"""
-            SELECT 
-                customer_name,
-                COALESCE(derived_customer_class, 'Unknown') as derived_customer_class,
-                SUM(COALESCE(ext_sales, 0)) as total_sales,
-                SUM(CASE WHEN zero_perc_sales = 'yes' THEN COALESCE(ext_sales, 0) ELSE 0 END) as zero_perc_sales_total
-            FROM sales_budget_2026 
-            WHERE salesperson = {salesman_no}
-              AND period >= '2025-01-01' AND period < '2026-01-01'
-            GROUP BY customer_name, derived_customer_class
+        result = self.db.exec(
+            text(
+                """
+            SELECT t.*
+            FROM (
+                SELECT
+                    customer_name,
+                    COALESCE(derived_customer_class, 'Unknown') as derived_customer_class,
+                    """
+                + SALES_AGGREGATES
+                + """
+                FROM ("""
+                + SALES_AND_ORDERS_LINES
+                + """) lines
+                GROUP BY customer_name, COALESCE(derived_customer_class, 'Unknown')
+                """
+                + SALES_HAVING
+                + """
+            ) t
+            /* Customer class total sales DESC, customer name total sales DESC */
+            ORDER BY
+                SUM(t.total_sales) OVER (
+                    PARTITION BY COALESCE(NULLIF(t.derived_customer_class, ''), 'Unknown Class')
+                ) DESC,
+                SUM(t.total_sales) OVER (
+                    PARTITION BY COALESCE(NULLIF(t.derived_customer_class, ''), 'Unknown Class'),
+                                 COALESCE(NULLIF(t.customer_name, ''), 'Unknown Customer')
+                ) DESC
         """
+            ).bindparams(salesman_no=salesman_no)
         )
 
-        basic_result = self.db.exec(basic_query)
-        basic_data = [dict(row._mapping) for row in basic_result]
-
-        # Step 2: Get quarterly breakdowns for Q1-Q4 2025
-        quarterly_query = text(
-            f"""
-            SELECT 
-                customer_name,
-                COALESCE(derived_customer_class, 'Unknown') as derived_customer_class,
-                SUM(CASE WHEN period >= '2025-01-01' AND period < '2025-04-01' THEN COALESCE(ext_sales, 0) ELSE 0 END) as q1_sales,
-                SUM(CASE WHEN period >= '2025-04-01' AND period < '2025-07-01' THEN COALESCE(ext_sales, 0) ELSE 0 END) as q2_sales,
-                SUM(CASE WHEN period >= '2025-07-01' AND period < '2025-10-01' THEN COALESCE(ext_sales, 0) ELSE 0 END) as q3_sales,
-                SUM(CASE WHEN period >= '2025-10-01' AND period < '2026-01-01' THEN COALESCE(ext_sales, 0) ELSE 0 END) as q4_sales
-            FROM sales_budget_2026 
-            WHERE salesperson = {salesman_no}
-              AND period >= '2025-01-01' AND period < '2026-01-01'
-            GROUP BY customer_name, derived_customer_class
-        """
-        )
-
-        quarterly_result = self.db.exec(quarterly_query)
-        quarterly_data = {
-            f"{row.customer_name}_{row.derived_customer_class}": dict(row._mapping)
-            for row in quarterly_result
-        }
-
-        # Step 3: Get Q4 data from orders_budget_2026 (including zero % sales)
-        q4_query = text(
-            f"""
-            SELECT 
-                customer_name,
-                COALESCE(derived_customer_class, 'Unknown') as derived_customer_class,
-                SUM(COALESCE(ext_sales, 0)) as q4_sales,
-                SUM(CASE WHEN zero_perc_sales = 'yes' THEN COALESCE(ext_sales, 0) ELSE 0 END) as q4_zero_perc_sales
-            FROM orders_budget_2026 
-            WHERE salesperson = {salesman_no}
-              AND requested_ship_date >= '2025-10-01' 
-              AND requested_ship_date < '2026-01-01'
-            GROUP BY customer_name, derived_customer_class
-        """
-        )
-
-        q4_result = self.db.exec(q4_query)
-        q4_data = {
-            f"{row.customer_name}_{row.derived_customer_class}": dict(row._mapping)
-            for row in q4_result
-        }
-
-        # Step 4: Get 2026 orders data from orders_budget_2026
-        open_2026_query = text(
-            f"""
-            SELECT 
-                customer_name,
-                COALESCE(derived_customer_class, 'Unknown') as derived_customer_class,
-                SUM(COALESCE(ext_sales, 0)) as open_2026
-            FROM orders_budget_2026 
-            WHERE salesperson = {salesman_no}
-              AND requested_ship_date >= '2026-01-01' 
-              AND requested_ship_date < '2027-01-01'
-            GROUP BY customer_name, derived_customer_class
-        """
-        )
-
-        open_2026_result = self.db.exec(open_2026_query)
-        open_2026_data = {
-            f"{row.customer_name}_{row.derived_customer_class}": dict(row._mapping)
-            for row in open_2026_result
-        }
-
-        # Step 5: Combine the data using union of keys across sources
-        final_data = []
-        basic_map = {
-            f"{row['customer_name']}_{row['derived_customer_class']}": row
-            for row in basic_data
-        }
-        union_keys = (
-            set(basic_map.keys()) | set(q4_data.keys()) | set(open_2026_data.keys())
-        )
-
-        for key in union_keys:
-            quarterly = quarterly_data.get(key, {})
-            q4 = q4_data.get(key, {})
-            open_2026 = open_2026_data.get(key, {})
-            base = basic_map.get(key)
-
-            customer_name = (
-                (base or {}).get("customer_name")
-                or q4.get("customer_name")
-                or open_2026.get("customer_name")
-                or quarterly.get("customer_name")
-            )
-            derived_customer_class = (
-                (base or {}).get("derived_customer_class")
-                or q4.get("derived_customer_class")
-                or open_2026.get("derived_customer_class")
-                or quarterly.get("derived_customer_class")
-            )
-
-            total_sales = (base or {}).get("total_sales", 0)
-            zero_perc_total_q1_q4 = (base or {}).get("zero_perc_sales_total", 0)
-            q4_orders = q4.get("q4_sales", 0)
-            q4_orders_zero_perc = q4.get("q4_zero_perc_sales", 0)
-            total_sales_with_orders = (total_sales or 0) + (q4_orders or 0)
-            total_zero_perc_sales = (zero_perc_total_q1_q4 or 0) + (
-                q4_orders_zero_perc or 0
-            )
-            zero_perc_percent = (
-                (total_zero_perc_sales / total_sales_with_orders * 100)
-                if total_sales_with_orders > 0
-                else 0
-            )
-
-            final_data.append(
-                {
-                    "customer_name": customer_name,
-                    "derived_customer_class": derived_customer_class,
-                    "q1_sales": quarterly.get("q1_sales", 0),
-                    "q2_sales": quarterly.get("q2_sales", 0),
-                    "q3_sales": quarterly.get("q3_sales", 0),
-                    "q4_sales": quarterly.get("q4_sales", 0),
-                    "q4_orders": q4_orders,
-                    "open_2026": open_2026.get("open_2026", 0),
-                    "zero_perc_sales_total": total_zero_perc_sales,
-                    "total_sales": total_sales_with_orders,
-                    "zero_perc_sales_percent": round(zero_perc_percent, 2),
-                    "brand": None,
-                    "flag": None,
-                }
-            )
-
-        # Filter out rows only when all quarterly sales and Q4 open are zero
-        final_data = [
-            item
-            for item in final_data
-            if not (
-                ((item.get("q1_sales") or 0) == 0)
-                and ((item.get("q2_sales") or 0) == 0)
-                and ((item.get("q3_sales") or 0) == 0)
-                and ((item.get("q4_sales") or 0) == 0)
-                and ((item.get("q4_orders") or 0) == 0)
-            )
+        return [
+            {
+                "customer_name": row.customer_name,
+                "derived_customer_class": row.derived_customer_class,
+                **self._sales_row_values(row),
+                "brand": None,
+                "flag": None,
+            }
+            for row in result
         ]
 
-        # Sort by customer class total sales DESC, customer name total sales DESC
-        # First, calculate customer class totals for sorting
-        customer_class_totals = {}
-        customer_name_totals = {}
-        for item in final_data:
-            customer_class = item["derived_customer_class"] or "Unknown Class"
-            customer_name = item["customer_name"] or "Unknown Customer"
-            sales = item["total_sales"] or 0
-
-            customer_class_totals[customer_class] = (
-                customer_class_totals.get(customer_class, 0) + sales
-            )
-            customer_name_totals[f"{customer_class}_{customer_name}"] = (
-                customer_name_totals.get(f"{customer_class}_{customer_name}", 0) + sales
-            )
-
-        # Sort by customer class total sales DESC, customer name total sales DESC
-        final_data.sort(
-            key=lambda x: (
-                customer_class_totals.get(
-                    x["derived_customer_class"] or "Unknown Class", 0
-                ),
-                customer_name_totals.get(
-                    f"{x['derived_customer_class'] or 'Unknown Class'}_{x['customer_name'] or 'Unknown Customer'}",
-                    0,
-                ),
-            ),
-            reverse=True,
+    @staticmethod
+    def _sales_row_values(row) -> Dict[str, Any]:
+        """Quarterly, order and zero % columns shared by both sales row shapes"""
+        total_sales = row.total_sales or 0
+        zero_perc_sales_total = row.zero_perc_sales_total or 0
+        zero_perc_percent = (
+            (zero_perc_sales_total / total_sales * 100) if total_sales > 0 else 0
         )
-        return final_data
+        return {
+            "q1_sales": row.q1_sales,
+            "q2_sales": row.q2_sales,
+            "q3_sales": row.q3_sales,
+            "q4_sales": row.q4_sales,
+            "q4_orders": row.q4_orders,
+            "open_2026": row.open_2026,
+            "zero_perc_sales_total": zero_perc_sales_total,
+            "total_sales": total_sales,
+            "zero_perc_sales_percent": round(zero_perc_percent, 2),
+        }
 
     def get_sales_summary(self, username: str) -> Dict[str, Any]:
         """
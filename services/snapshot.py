@@ -0,0 +1,101 @@
+"""
+Stale-while-revalidate snapshots for expensive, read-mostly results
+
+A Snapshot holds the last computed value in this process. Reads always return
+it immediately; once it is older than max_age seconds, or one of the data
+pieces it depends on was bumped (services/cache.py), a single background
+thread recomputes it and swaps it in. Only the very first read waits for a
+compute. However many requests arrive, at most one refresh runs at a time.
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Optional, Tuple
+
+from services import cache
+
+logger = logging.getLogger(__name__)
+
+
+class Snapshot:
+    def __init__(
+        self,
+        name: str,
+        compute: Callable[[], Any],
+        max_age: float,
+        pieces: Tuple[str, ...] = (),
+    ):
+        self.name = name
+        self.compute = compute
+        self.max_age = max_age
+        self.pieces = pieces
+        self._changed = threading.Condition()
+        self._value: Any = None
+        self._version: Optional[Tuple[int, ...]] = None
+        self._computed_at: Optional[float] = None
+        self._refreshing = False
+        if pieces:
+            cache.on_bump(self._on_bump)
+
+    def get(self) -> Tuple[Any, float]:
+        """
+        Current value and its age in seconds
+        Starts a background refresh when the value is stale
+        """
+        with self._changed:
+            # Only the first read waits, for whichever refresh is running
+            while self._computed_at is None and self._refreshing:
+                self._changed.wait()
+            compute_now = self._computed_at is None
+            if compute_now:
+                self._refreshing = True
+        if compute_now:
+            self._refresh()
+
+        with self._changed:
+            value, computed_at = self._value, self._computed_at
+            stale = (
+                time.monotonic() - computed_at > self.max_age
+                or self._version != cache.data_version(*self.pieces)
+            )
+        if stale:
+            self.refresh_in_background()
+        return value, time.monotonic() - computed_at
+
+    def refresh_in_background(self) -> None:
+        """Recompute on a daemon thread unless a refresh is already running"""
+        with self._changed:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(
+            target=self._refresh_logged, name=f"snapshot-{self.name}", daemon=True
+        ).start()
+
+    def _refresh(self) -> None:
+        """Recompute and swap in the value; the caller has set _refreshing"""
+        try:
+            # Version is taken first so a write during compute triggers another refresh
+            version = cache.data_version(*self.pieces)
+            value = self.compute()
+            with self._changed:
+                self._value = value
+                self._version = version
+                self._computed_at = time.monotonic()
+        finally:
+            with self._changed:
+                self._refreshing = False
+                self._changed.notify_all()
+
+    def _refresh_logged(self) -> None:
+        try:
+            self._refresh()
+        except Exception:
+            # Keep serving the previous value; the next stale read retries
+            logger.exception("Refreshing the %s snapshot failed", self.name)
+
+    def _on_bump(self, pieces: Tuple[str, ...]) -> None:
+        # Refresh right after a relevant write instead of on the next read
+        if self._computed_at is not None and set(pieces) & set(self.pieces):
+            self.refresh_in_background()
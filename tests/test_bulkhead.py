@@ -0,0 +1,50 @@
+import asyncio
+import threading
+
+import pytest
+
+from services.bulkhead import Bulkhead, BulkheadFullError
+
+
+def collect(stream):
+    async def main():
+        return [item async for item in stream]
+
+    return asyncio.run(main())
+
+
+def test_stream_pulls_items_lazily_on_the_pool():
+    pool = Bulkhead("stream", workers=1, queue=0)
+    seen = []
+
+    def items():
+        for i in range(3):
+            seen.append(threading.current_thread().name)
+            yield i
+
+    stream = pool.stream(items())
+    assert seen == []
+    assert collect(stream) == [0, 1, 2]
+    assert seen == ["bulkhead-stream_0"] * 3
+
+
+def test_stream_holds_one_slot_until_exhausted():
+    pool = Bulkhead("stream", workers=1, queue=0)
+    stream = pool.stream(iter([1, 2]))
+    with pytest.raises(BulkheadFullError):
+        pool.stream(iter([]))
+    collect(stream)
+    assert collect(pool.stream(iter([3]))) == [3]
+
+
+def test_stream_releases_its_slot_on_error_and_when_abandoned():
+    pool = Bulkhead("stream", workers=1, queue=0)
+
+    def failing():
+        yield 1
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        collect(pool.stream(failing()))
+    pool.stream(iter([1]))  # never read; dropped right away
+    assert collect(pool.stream(iter([2]))) == [2]
@@ -0,0 +1,110 @@
+import asyncio
+import threading
+
+import pytest
+
+from services import cache
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def counter():
+    calls = []
+
+    def compute():
+        calls.append(None)
+        return len(calls)
+
+    return compute, calls
+
+
+def test_hit_until_piece_bumped():
+    compute, calls = counter()
+    assert cache.cached(("k",), (cache.SALES,), compute) == 1
+    assert cache.cached(("k",), (cache.SALES,), compute) == 1
+    cache.bump(cache.BUDGET)
+    assert cache.cached(("k",), (cache.SALES,), compute) == 1
+    cache.bump(cache.SALES)
+    assert cache.cached(("k",), (cache.SALES,), compute) == 2
+    assert len(calls) == 2
+
+
+def test_entry_expires_after_ttl(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache.time, "monotonic", clock)
+    monkeypatch.setattr(cache, "CACHE_TTL_SECONDS", 60)
+    compute, _ = counter()
+    assert cache.cached(("k",), (cache.SALES,), compute) == 1
+    clock.now += 60
+    assert cache.cached(("k",), (cache.SALES,), compute) == 1
+    clock.now += 1
+    assert cache.cached(("k",), (cache.SALES,), compute) == 2
+
+
+def test_least_recently_used_entry_is_dropped(monkeypatch):
+    monkeypatch.setattr(cache, "CACHE_MAX_ENTRIES", 2)
+    compute, calls = counter()
+    cache.cached(("a",), (cache.SALES,), compute)
+    cache.cached(("b",), (cache.SALES,), compute)
+    cache.cached(("a",), (cache.SALES,), compute)
+    cache.cached(("c",), (cache.SALES,), compute)
+    assert list(cache._entries) == [("a",), ("c",)]
+    cache.cached(("a",), (cache.SALES,), compute)
+    assert len(calls) == 3
+
+
+def test_key_locks_are_released():
+    for i in range(50):
+        cache.cached(("group", i), (cache.SALES,), lambda: i)
+    assert cache._key_locks == {}
+
+    def fail():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        cache.cached(("failing",), (cache.SALES,), fail)
+    assert cache._key_locks == {}
+
+
+def test_concurrent_misses_on_the_event_loop_do_not_block():
+    # The way AsyncSession.run_sync calls into the services: a greenlet on the
+    # loop thread that is suspended while its query is awaited
+    from sqlalchemy.util import await_only, greenlet_spawn
+
+    calls = []
+
+    def compute():
+        calls.append(None)
+        call = len(calls)
+        await_only(asyncio.sleep(0.01))
+        return call
+
+    async def main():
+        results.extend(
+            await asyncio.gather(
+                greenlet_spawn(cache.cached, ("k",), (cache.SALES,), compute),
+                greenlet_spawn(cache.cached, ("k",), (cache.SALES,), compute),
+            )
+        )
+
+    # A blocked loop can't time itself out, so it runs on a thread we can abandon
+    results = []
+    loop_thread = threading.Thread(target=asyncio.run, args=(main(),), daemon=True)
+    loop_thread.start()
+    loop_thread.join(timeout=5)
+    assert not loop_thread.is_alive(), "event loop blocked on the key lock"
+    assert sorted(results) == [1, 2]
+    assert cache._key_locks == {}
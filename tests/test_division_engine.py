@@ -0,0 +1,316 @@
+"""
+The NumPy engine (services/division_engine.py) against the dict pipeline in
+DivisionService on small in-memory fixtures; both must return identical rows
+"""
+
+import random
+from collections import namedtuple
+from datetime import date
+
+import numpy as np
+
+from services.division_engine import (
+    DivisionAllocations,
+    DivisionBaseline,
+    collapse_budget,
+    period_quarters,
+    to_float_array,
+)
+from services.division_service import DivisionService
+
+DIVISIONS = [
+    {"div_no": 3, "div_desc": "Chemicals"},
+    {"div_no": 1, "div_desc": "Food"},
+    {"div_no": 2, "div_desc": "Paper"},
+]
+
+
+def sale(group_key, customer_class, item_division, ext_sales, ext_cost, period):
+    return (group_key, customer_class, item_division, ext_sales, ext_cost, period)
+
+
+def budget(salesperson_id, name, customer_class, group_key, *quarters, brand=None):
+    return {
+        "salesperson_id": salesperson_id,
+        "salesperson_name": name,
+        "customer_class": customer_class,
+        "group_key": group_key,
+        "brand": brand,
+        **{f"quarter_{q}_sales": float(v) for q, v in enumerate(quarters, 1)},
+    }
+
+
+def sales_only(salesperson_id, name, customer_class, group_key):
+    return {
+        "salesperson_id": salesperson_id,
+        "salesperson_name": name,
+        "customer_class": customer_class,
+        "group_key": group_key,
+        "brand": None,
+    }
+
+
+def dict_rows(sales, budget_norm, sales_only_groups, divisions, overrides, sparse):
+    service = DivisionService(db=None)
+    baseline = service._baseline_from_sales(
+        [
+            {
+                "group_key": gk,
+                "customer_class": cc,
+                "item_division": div,
+                "ext_sales": float(s) if s else 0.0,
+                "ext_cost": float(c) if c else 0.0,
+                "period": period,
+            }
+            for gk, cc, div, s, c, period in sales
+        ]
+    )
+    return list(
+        service._iter_division_rows(
+            service._get_collapsed_budget(budget_norm),
+            sales_only_groups,
+            divisions,
+            service._get_default_division_ratios(
+                divisions, baseline["overall_division_totals"]
+            ),
+            overrides,
+            baseline["ratios_lookup"],
+            baseline["grouped_sales_lookup"],
+            baseline["group_historical_totals"],
+            baseline["gp_by_division"],
+            sparse=sparse,
+        )
+    )
+
+
+def columnar_rows(sales, budget_norm, sales_only_groups, divisions, overrides, sparse):
+    columns = list(zip(*sales)) or [()] * 6
+    group_keys, customer_classes, item_divisions, ext_sales, ext_cost, periods = columns
+    baseline = DivisionBaseline.from_sales(
+        list(group_keys),
+        list(customer_classes),
+        list(item_divisions),
+        to_float_array(ext_sales),
+        to_float_array(ext_cost),
+        period_quarters(periods),
+    )
+    allocations = DivisionAllocations(
+        baseline,
+        collapse_budget(budget_norm),
+        sales_only_groups,
+        divisions,
+        overrides,
+    )
+    return list(allocations.iter_rows(sparse=sparse))
+
+
+GroupRow = namedtuple("GroupRow", "group_key customer_class total_sales")
+DivisionRow = namedtuple(
+    "DivisionRow",
+    "group_key customer_class item_division total_sales division_ratio_2025 "
+    "q1_sales q2_sales q3_sales q4_sales "
+    "q1_gp_percent q2_gp_percent q3_gp_percent q4_gp_percent full_year_gp_percent",
+)
+
+
+def snapshot_rows(sales):
+    """Snapshot table rows as DivisionService.refresh_baseline_snapshot writes them"""
+    baseline = DivisionService(db=None)._baseline_from_sales(
+        [
+            {
+                "group_key": gk,
+                "customer_class": cc,
+                "item_division": div,
+                "ext_sales": float(s) if s else 0.0,
+                "ext_cost": float(c) if c else 0.0,
+                "period": period,
+            }
+            for gk, cc, div, s, c, period in sales
+        ]
+    )
+    group_rows = [
+        GroupRow(gk, cc, total)
+        for (gk, cc), total in baseline["group_historical_totals"].items()
+    ]
+    division_rows = []
+    for key, total in baseline["grouped_sales_lookup"].items():
+        gp = baseline["gp_by_division"].get(key, {})
+        division_rows.append(
+            DivisionRow(
+                *key,
+                total,
+                baseline["ratios_lookup"].get(key, 0.0),
+                *(gp.get(f"{q}_sales", 0.0) for q in ("q1", "q2", "q3", "q4")),
+                *(gp.get(f"{q}_gp_percent") for q in ("q1", "q2", "q3", "q4")),
+                gp.get("full_year_gp_percent"),
+            )
+        )
+    return group_rows, division_rows, baseline["overall_division_totals"]
+
+
+def assert_same_snapshot_rows(
+    sales, budget_norm, sales_only_groups, divisions, overrides
+):
+    group_rows, division_rows, division_totals = snapshot_rows(sales)
+    service = DivisionService(db=None)
+    baseline = service._baseline_from_snapshot_rows(group_rows, division_rows)
+    for sparse in (False, True):
+        expected = list(
+            service._iter_division_rows(
+                service._get_collapsed_budget(budget_norm),
+                sales_only_groups,
+                divisions,
+                service._get_default_division_ratios(divisions, division_totals),
+                overrides,
+                baseline["ratios_lookup"],
+                baseline["grouped_sales_lookup"],
+                baseline["group_historical_totals"],
+                baseline["gp_by_division"],
+                sparse=sparse,
+            )
+        )
+        allocations = DivisionAllocations(
+            DivisionBaseline.from_snapshot(group_rows, division_rows, division_totals),
+            collapse_budget(budget_norm),
+            sales_only_groups,
+            divisions,
+            overrides,
+        )
+        actual = list(allocations.iter_rows(sparse=sparse))
+        assert [repr(row) for row in actual] == [repr(row) for row in expected]
+
+
+def assert_same_rows(*fixture):
+    for sparse in (False, True):
+        expected = dict_rows(*fixture, sparse=sparse)
+        actual = columnar_rows(*fixture, sparse=sparse)
+        # repr tells 0 from 0.0 and None from nan
+        assert [repr(row) for row in actual] == [repr(row) for row in expected]
+
+
+def test_matches_dict_path():
+    sales = [
+        sale("G1", "Retail", 1, 100.0, 60.0, date(2025, 2, 1)),
+        sale("G1", "Retail", 2, 50.0, 45.0, date(2025, 5, 1)),
+        sale("G1", "Retail", 1, 25.5, None, date(2025, 11, 3)),
+        sale("G2", "Hospitality", 3, 80.0, 20.0, date(2025, 8, 9)),
+        sale("G2", "Hospitality", 3, None, 5.0, "2025-09-30"),
+        sale("G3", "Retail", 9, 10.0, 9.0, date(2025, 1, 15)),
+        sale(None, "Retail", 1, 999.0, 1.0, date(2025, 3, 1)),
+    ]
+    budget_norm = [
+        budget(1, "Alice", "Retail", "G1", 10, 20, 30, 40),
+        budget(1, "Alice", "Retail", "G1", 1, 1, 1, 1, brand="B"),
+        budget(2, "Bob", "Retail", "G1", 5, 0, 5, 0),
+        budget(2, "Bob", "Hospitality", "G2", 100, 0, 0, 0, brand="Z"),
+        budget(3, "Carl", "Retail", "NEW", 7, 7, 7, 7),
+    ]
+    overrides = {(1, "Retail", "G1", 2): 0.75, (3, "Retail", "NEW", 3): 0.0}
+    assert_same_rows(
+        sales,
+        budget_norm,
+        [sales_only(4, "Dana", "Retail", "G3")],
+        DIVISIONS,
+        overrides,
+    )
+
+
+def test_empty_baseline_with_budget_groups():
+    budget_norm = [
+        budget(1, "Alice", "Retail", "G1", 10, 20, 30, 40),
+        budget(2, "Bob", "Hospitality", "G2", 1, 2, 3, 4),
+    ]
+    assert_same_rows([], budget_norm, [], DIVISIONS, {(1, "Retail", "G1", 1): 0.5})
+
+    rows = columnar_rows([], budget_norm, [], DIVISIONS, {}, sparse=False)
+    assert len(rows) == len(budget_norm) * len(DIVISIONS)
+    assert all(row["total_2025_sales"] == 0 for row in rows)
+    assert all(row["gp_percent"] is None for row in rows)
+
+
+def test_empty_inputs():
+    assert_same_rows([], [], [], DIVISIONS, {})
+    assert_same_rows([], [], [], [], {})
+
+
+def test_sparse_skips_unused_cells():
+    sales = [sale("G1", "Retail", 1, 100.0, 60.0, date(2025, 2, 1))]
+    budget_norm = [budget(1, "Alice", "Retail", "G1", 10, 20, 30, 40)]
+    rows = columnar_rows(sales, budget_norm, [], DIVISIONS, {}, sparse=True)
+    assert [row["item_division"] for row in rows] == [1]
+    assert_same_rows(sales, budget_norm, [], DIVISIONS, {})
+
+
+def random_fixture(seed):
+    rnd = random.Random(seed)
+    classes = ["Hospitality", "Retail", "Contract"]
+    group_keys = [f"G{i}" for i in range(rnd.randint(1, 8))] + [None]
+    div_nos = list(range(1, 7))
+    sales = [
+        sale(
+            rnd.choice(group_keys),
+            rnd.choice(classes),
+            rnd.choice(div_nos),
+            rnd.choice([0, None, round(rnd.uniform(-50, 1000), 2)]),
+            rnd.choice([0, None, round(rnd.uniform(-50, 900), 2)]),
+            date(rnd.choice([2025, 2025, 2025, 2024]), rnd.randint(1, 12), 1),
+        )
+        for _ in range(rnd.randint(0, 200))
+    ]
+    names = {1: "Alice", 2: "Bob", 3: "Carl"}
+    budget_norm = []
+    for _ in range(rnd.randint(0, 12)):
+        sp = rnd.choice(list(names))
+        budget_norm.append(
+            budget(
+                sp,
+                names[sp],
+                rnd.choice(classes),
+                rnd.choice(group_keys[:-1] + ["NEW"]),
+                *(round(rnd.uniform(0, 1e4), 2) for _ in range(4)),
+                brand=rnd.choice([None, "B1", "B2"]),
+            )
+        )
+    overrides = {
+        (b["salesperson_id"], b["customer_class"], b["group_key"], div): rnd.choice(
+            [0.0, 0.5, rnd.random()]
+        )
+        for b in rnd.sample(budget_norm, min(len(budget_norm), 3))
+        for div in rnd.sample(div_nos, 2)
+    }
+    budget_keys = {
+        (b["salesperson_id"], b["customer_class"], b["group_key"]) for b in budget_norm
+    }
+    sales_only_groups = list(
+        {
+            (4, cc, gk): sales_only(4, "Dana", cc, gk)
+            for gk, cc, *_ in sales
+            if gk is not None and (4, cc, gk) not in budget_keys
+        }.values()
+    )
+    divisions = [
+        {"div_no": d, "div_desc": f"Div {d}"}
+        for d in rnd.sample(div_nos, rnd.randint(0, len(div_nos)))
+    ]
+    return sales, budget_norm, sales_only_groups, divisions, overrides
+
+
+def test_matches_dict_path_on_random_fixtures():
+    for seed in range(200):
+        assert_same_rows(*random_fixture(seed))
+
+
+def test_snapshot_baseline_matches_dict_path():
+    for seed in range(100):
+        assert_same_snapshot_rows(*random_fixture(seed))
+    assert_same_snapshot_rows(
+        [], [budget(1, "Alice", "Retail", "G1", 1, 2, 3, 4)], [], DIVISIONS, {}
+    )
+
+
+def test_empty_baseline_arrays():
+    baseline = DivisionBaseline.from_sales(
+        [], [], [], np.zeros(0), np.zeros(0), period_quarters([])
+    )
+    assert baseline.keys == []
+    assert baseline.quarter_sales.shape == (0, 4)
@@ -0,0 +1,266 @@
+"""
+project_gross_profit (services/gross_profit_engine.py) against a row-by-row
+transcription of the SQL in GrossProfitService.get_gross_profit_allocations
+"""
+
+import random
+
+from services.gross_profit_engine import QUARTERS, project_gross_profit
+
+
+def coalesce(*values):
+    for value in values:
+        if value is not None:
+            return value
+    return None
+
+
+def collate(value):
+    """Equality under a case-insensitive, PAD SPACE collation"""
+    return value.rstrip(" ").lower() if isinstance(value, str) else value
+
+
+def sql_rows(gp_rows, budget_rows, override_rows):
+    """budget_rows LEFT JOIN gp/overrides, UNION ALL sales-only gp rows, ORDER BY"""
+
+    def key(row):
+        return tuple(
+            collate(row[c]) for c in ("salesperson_id", "customer_class", "group_key")
+        )
+
+    gp_by_key = {key(g): g for g in gp_rows}
+    override_by_key = {key(o): o for o in override_rows}
+    rows = []
+    for b in budget_rows:
+        g = gp_by_key.get(key(b), {})
+        o = override_by_key.get(key(b), {})
+        effective = [
+            coalesce(
+                o.get(f"custom_{q}_gp_percent"),
+                g.get(f"{q}_gp_percent"),
+                g.get("full_year_gp_percent"),
+            )
+            for q in QUARTERS
+        ]
+        products = [
+            None if e is None else b[f"quarter_{n}_sales"] * e
+            for n, e in enumerate(effective, 1)
+        ]
+        rows.append(
+            {
+                **{c: b[c] for c in ("salesperson_id", "salesperson_name")},
+                **{c: b[c] for c in ("customer_class", "group_key", "brand")},
+                **{f"quarter_{n}_sales": b[f"quarter_{n}_sales"] for n in range(1, 5)},
+                **{f"{q}_sales_2025": g.get(f"{q}_sales_2025") for q in QUARTERS},
+                **{f"{q}_gp_percent": g.get(f"{q}_gp_percent") for q in QUARTERS},
+                "full_year_gp_percent": g.get("full_year_gp_percent"),
+                **{f"{q}_effective_gp_percent": e for q, e in zip(QUARTERS, effective)},
+                "effective_gp_percent": g.get("full_year_gp_percent"),
+                "is_custom": int(
+                    any(o.get(f"custom_{q}_gp_percent") is not None for q in QUARTERS)
+                ),
+                **{
+                    f"{q}_gp_value": None if p is None else round(p, 2)
+                    for q, p in zip(QUARTERS, products)
+                },
+                "total_gp_value": (
+                    None if None in products else round(sum(products), 2)
+                ),
+                "has_budget": 1,
+            }
+        )
+    budget_keys = {key(b) for b in budget_rows}
+    for g in gp_rows:
+        if key(g) in budget_keys:
+            continue
+        rows.append(
+            {
+                **{c: g[c] for c in ("salesperson_id", "salesperson_name")},
+                **{c: g[c] for c in ("customer_class", "group_key")},
+                "brand": None,
+                **{f"quarter_{n}_sales": 0 for n in range(1, 5)},
+                **{f"{q}_sales_2025": g[f"{q}_sales_2025"] for q in QUARTERS},
+                **{f"{q}_gp_percent": g[f"{q}_gp_percent"] for q in QUARTERS},
+                "full_year_gp_percent": g["full_year_gp_percent"],
+                **{
+                    f"{q}_effective_gp_percent": coalesce(
+                        g[f"{q}_gp_percent"], g["full_year_gp_percent"]
+                    )
+                    for q in QUARTERS
+                },
+                "effective_gp_percent": g["full_year_gp_percent"],
+                "is_custom": 0,
+                **{f"{q}_gp_value": 0 for q in QUARTERS},
+                "total_gp_value": 0,
+                "has_budget": 0,
+            }
+        )
+
+    def sort_text(value):
+        return (value is not None, str(value).casefold() if value is not None else "")
+
+    rows.sort(
+        key=lambda r: (
+            sort_text(r["customer_class"]),
+            sort_text(r["salesperson_name"]),
+            sort_text(r["group_key"]),
+        )
+    )
+    return rows
+
+
+def random_fixture(seed):
+    rnd = random.Random(seed)
+
+    def spelling(text):
+        # Budget lines and overrides may spell a GP key differently
+        return rnd.choice([text, text, text.lower(), text.upper(), text + " "])
+
+    def maybe_percent():
+        return None if rnd.random() < 0.2 else round(rnd.uniform(-0.5, 0.9), 6)
+
+    keys = list(
+        dict.fromkeys(
+            (
+                rnd.randint(1, 5),
+                rnd.choice(["Hospitality", "Retail", "Chain"]),
+                rnd.choice("ABCDEFGHIJ"),
+            )
+            for _ in range(40)
+        )
+    )
+    gp_rows = [
+        {
+            "salesperson_id": sp,
+            "customer_class": cc,
+            "group_key": gk,
+            "salesperson_name": f"SP{sp}",
+            **{f"{q}_sales_2025": rnd.uniform(0, 1e5) for q in QUARTERS},
+            **{f"{q}_gp_percent": maybe_percent() for q in QUARTERS},
+            "full_year_gp_percent": maybe_percent(),
+        }
+        for sp, cc, gk in keys
+        if rnd.random() < 0.7
+    ]
+    budget_rows = [
+        {
+            "salesperson_id": sp,
+            "customer_class": spelling(cc),
+            "group_key": spelling(gk),
+            "salesperson_name": f"SP{sp}",
+            "brand": rnd.choice([None, "x"]),
+            **{
+                f"quarter_{n}_sales": round(rnd.uniform(0, 5e4), 2) for n in range(1, 5)
+            },
+        }
+        for sp, cc, gk in keys
+        for _ in range(rnd.choice([0, 1, 1, 2]))
+    ]
+    override_rows = [
+        {
+            "salesperson_id": sp,
+            "customer_class": spelling(cc),
+            "group_key": spelling(gk),
+            **{f"custom_{q}_gp_percent": maybe_percent() for q in QUARTERS},
+        }
+        for sp, cc, gk in keys
+        if rnd.random() < 0.3
+    ]
+    return gp_rows, budget_rows, override_rows
+
+
+def assert_same_rows(gp_rows, budget_rows, override_rows):
+    actual = project_gross_profit(gp_rows, budget_rows, override_rows)
+    expected = sql_rows(gp_rows, budget_rows, override_rows)
+    # Same columns in the same order, and repr tells 0 from 0.0 and None from nan
+    assert [list(row) for row in actual] == [list(row) for row in expected]
+    assert [repr(row) for row in actual] == [repr(row) for row in expected]
+
+
+def test_matches_sql_semantics():
+    gp_rows = [
+        {
+            "salesperson_id": 1,
+            "customer_class": "Retail",
+            "group_key": "ACME",
+            "salesperson_name": "Alice",
+            "q1_sales_2025": 100.0,
+            "q2_sales_2025": 0.0,
+            "q3_sales_2025": 50.0,
+            "q4_sales_2025": 25.0,
+            "q1_gp_percent": 0.25,
+            "q2_gp_percent": None,
+            "q3_gp_percent": 0.1,
+            "q4_gp_percent": 0.0,
+            "full_year_gp_percent": 0.2,
+        },
+        {
+            "salesperson_id": 2,
+            "customer_class": "Hospitality",
+            "group_key": "FLAG",
+            "salesperson_name": "Bob",
+            **{f"{q}_sales_2025": 10.0 for q in QUARTERS},
+            **{f"{q}_gp_percent": None for q in QUARTERS},
+            "full_year_gp_percent": None,
+        },
+    ]
+    budget_rows = [
+        {
+            "salesperson_id": 1,
+            "customer_class": "Retail",
+            "group_key": "ACME",
+            "salesperson_name": "Alice",
+            "brand": None,
+            "quarter_1_sales": 1000.0,
+            "quarter_2_sales": 2000.0,
+            "quarter_3_sales": 0.0,
+            "quarter_4_sales": 10.005,
+        },
+        {
+            # Same key as the line above under the collation
+            "salesperson_id": 1,
+            "customer_class": "RETAIL ",
+            "group_key": "acme",
+            "salesperson_name": "Alice",
+            "brand": None,
+            **{f"quarter_{n}_sales": 7.5 for n in range(1, 5)},
+        },
+        {
+            # Takes Bob's GP group out of the sales-only rows
+            "salesperson_id": 2,
+            "customer_class": "hospitality",
+            "group_key": "Flag  ",
+            "salesperson_name": "Bob",
+            "brand": "B",
+            **{f"quarter_{n}_sales": 1.0 for n in range(1, 5)},
+        },
+        {
+            "salesperson_id": 3,
+            "customer_class": "retail",
+            "group_key": None,
+            "salesperson_name": "carl",
+            "brand": "B",
+            **{f"quarter_{n}_sales": 5.0 for n in range(1, 5)},
+        },
+    ]
+    override_rows = [
+        {
+            "salesperson_id": 1,
+            "customer_class": "Retail",
+            "group_key": "ACME",
+            "custom_q1_gp_percent": None,
+            "custom_q2_gp_percent": 0.5,
+            "custom_q3_gp_percent": None,
+            "custom_q4_gp_percent": None,
+        }
+    ]
+    assert_same_rows(gp_rows, budget_rows, override_rows)
+
+
+def test_empty_inputs():
+    assert project_gross_profit([], [], []) == []
+
+
+def test_matches_sql_semantics_on_random_fixtures():
+    for seed in range(50):
+        assert_same_rows(*random_fixture(seed))
@@ -0,0 +1,86 @@
+import threading
+
+import pytest
+
+from services import cache
+from services.snapshot import Snapshot
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr("services.snapshot.time.monotonic", clock)
+    return clock
+
+
+def counting_compute():
+    calls = []
+
+    def compute():
+        calls.append(None)
+        return len(calls)
+
+    return compute, calls
+
+
+def wait_for_refresh(snapshot):
+    for thread in threading.enumerate():
+        if thread.name == f"snapshot-{snapshot.name}":
+            thread.join(timeout=5)
+
+
+def test_first_read_computes_then_serves_cached(clock):
+    compute, calls = counting_compute()
+    snapshot = Snapshot("fresh", compute, max_age=60)
+    assert snapshot.get() == (1, 0)
+    clock.now += 30
+    assert snapshot.get() == (1, 30)
+    wait_for_refresh(snapshot)
+    assert len(calls) == 1
+
+
+def test_stale_value_is_served_while_refreshing(clock):
+    compute, calls = counting_compute()
+    snapshot = Snapshot("stale", compute, max_age=60)
+    snapshot.get()
+    clock.now += 61
+    # The stale value comes back at once; the refresh runs in the background
+    assert snapshot.get() == (1, 61)
+    wait_for_refresh(snapshot)
+    assert snapshot.get() == (2, 0)
+    assert len(calls) == 2
+
+
+def test_bump_of_a_piece_triggers_refresh(clock):
+    compute, calls = counting_compute()
+    snapshot = Snapshot("bumped", compute, max_age=3600, pieces=(cache.OVERRIDES,))
+    snapshot.get()
+    cache.bump(cache.DIVISIONS)
+    wait_for_refresh(snapshot)
+    assert len(calls) == 1
+    cache.bump(cache.OVERRIDES)
+    wait_for_refresh(snapshot)
+    assert snapshot.get() == (2, 0)
+
+
+def test_failed_refresh_keeps_previous_value(clock):
+    results = iter([1])
+
+    def compute():
+        return next(results)
+
+    snapshot = Snapshot("failing", compute, max_age=60)
+    snapshot.get()
+    clock.now += 61
+    snapshot.get()
+    wait_for_refresh(snapshot)
+    assert snapshot.get()[0] == 1
+    wait_for_refresh(snapshot)
@@ -0,0 +1,49 @@
+from datetime import datetime, timedelta, timezone
+
+import jwt
+import pytest
+
+from middlewares.auth_middleware import TokenCache
+
+
+def payload(minutes):
+    exp = datetime.now(timezone.utc) + timedelta(minutes=minutes)
+    return {"sub": "alice", "exp": int(exp.timestamp())}
+
+
+def test_returns_cached_payload():
+    tokens = TokenCache(max_size=4)
+    assert tokens.get("a") is None
+    tokens.put("a", payload(30))
+    assert tokens.get("a")["sub"] == "alice"
+
+
+def test_expired_entry_raises_and_is_dropped():
+    tokens = TokenCache(max_size=4)
+    tokens.put("a", payload(-1))
+    with pytest.raises(jwt.ExpiredSignatureError):
+        tokens.get("a")
+    assert tokens.get("a") is None
+
+
+def test_payload_without_exp_never_expires():
+    tokens = TokenCache(max_size=4)
+    tokens.put("a", {"sub": "alice"})
+    assert tokens.get("a") == {"sub": "alice"}
+
+
+def test_least_recently_used_token_is_evicted():
+    tokens = TokenCache(max_size=2)
+    tokens.put("a", payload(30))
+    tokens.put("b", payload(30))
+    tokens.get("a")
+    tokens.put("c", payload(30))
+    assert tokens.get("b") is None
+    assert tokens.get("a") is not None
+    assert tokens.get("c") is not None
+
+
+def test_zero_size_disables_the_cache():
+    tokens = TokenCache(max_size=0)
+    tokens.put("a", payload(30))
+    assert tokens.get("a") is None